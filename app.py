@@ -1,15 +1,194 @@
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+import matplotlib.pyplot as plt
 import streamlit as st
-from config import INTERFACE_LANGUAGES, UI_TEXT, EXTENDED_CATEGORIES, USER_SELECTABLE_NEWS_LANGUAGES
+from config import (
+    INTERFACE_LANGUAGES, UI_TEXT, EXTENDED_CATEGORIES, USER_SELECTABLE_NEWS_LANGUAGES, METRICS_PORT,
+    SCHEDULER_ENABLED, SCHEDULER_IN_APP, DASHBOARD_ARTICLES, WORDCLOUD_MAX_WORDS, APP_WARM_UP,
+    CHATBOT_BACKEND
+)
 from modules.login import login_page
-from modules.news_fetcher import get_all_news
-from modules.preprocessing import preprocess_news
-from modules.sentiment_analysis import analyze_sentiment
-from modules.ner_analysis import extract_entities
-from modules.topic_modeling import generate_topics
-from modules.trend_analysis import detect_trends
-from modules.cross_sector import compute_category_correlation, plot_correlation_heatmap
+from modules.news_fetcher import get_all_news, get_cache_stats
+from modules.article_store import (
+    load_articles, load_analyzed_articles, load_trends, upsert_analysis, upsert_entity_index
+)
+from modules.ner_analysis import build_entity_index
+from modules.pipeline import prepare_articles
+from modules.result_cache import analyze_articles_cached, get_result_cache
+from modules.scheduler import start_scheduler
+from modules.article_table import ArticleTable, SORT_COLUMNS
+from modules.compact_frame import compact_frame
+from modules.vector_index import index_articles
+from modules.dedup import representatives, cluster_heads
+from modules.cross_sector import sector_correlation, plot_correlation_heatmap
 from modules.chatbot_integration import chatbot_interface
-from utils.visualization import plot_sentiment_pie, plot_category_bar, generate_wordcloud, plot_timeline
+from modules.model_registry import warm_up
+from modules.term_counts import TermCounter
+from utils.visualization import (
+    plot_sentiment_pie, plot_category_bar, generate_wordcloud_from_counts, plot_timeline, timeline_counts
+)
+from utils.metrics import metrics, profiled, write_prometheus, start_metrics_server
+
+def analyze_for_dashboard(df_news, analyzed=False):
+    """
+    Analyze fetched/stored articles for display, unless they come precomputed
+    from the store (analyzed=True).
+
+    Per-article results are shared by all sessions of this server process
+    (modules.result_cache), so only articles no session has analyzed yet
+    go through the analysis chain; those are also written to the store.
+
+    Returns:
+        tuple: (analyzed DataFrame, trends DataFrame)
+    """
+    if analyzed:
+        df_news = prepare_articles(df_news)
+        return df_news, load_trends(start=df_news["published_at"].min())
+
+    # Analysis chain (preprocess -> sentiment -> NER -> topics -> trends)
+    df_news, trends_df, new = analyze_articles_cached(df_news)
+    if new:
+        upsert_analysis(df_news)
+        upsert_entity_index(build_entity_index(df_news))
+        index_articles(representatives(df_news))  # Makes the stories retrievable by the chatbot
+    return df_news, trends_df
+
+def render_article_table(table, page_size_options=(25, 50, 100)):
+    """
+    Latest News as a filterable, sortable table; only the visible page is
+    built and sent to the browser.
+    """
+    st.subheader("📰 Latest News")
+    cols = st.columns(4)
+    filters = {
+        column: cols[i].multiselect(column.capitalize(), table.options(column), key=f"news_{column}")
+        for i, column in enumerate(["sentiment", "topic", "source"])
+    }
+    entity = cols[3].selectbox("Entity", [""] + table.entity_options(), key="news_entity")
+
+    cols = st.columns(4)
+    dates = cols[0].date_input("Published", value=(), key="news_dates")
+    sort_by = cols[1].selectbox("Sort by", SORT_COLUMNS, key="news_sort")
+    descending = cols[2].checkbox("Descending", value=True, key="news_desc")
+    page_size = cols[3].selectbox("Per page", page_size_options, key="news_page_size")
+
+    start = dates[0] if len(dates) > 0 else None
+    end = datetime.combine(dates[1], datetime.max.time()) if len(dates) == 2 else None
+    rows = table.query(filters, entity=entity or None, start=start, end=end, sort_by=sort_by, descending=descending)
+
+    pages = max(1, -(-len(rows) // page_size))
+    page = min(st.number_input(f"Page (of {pages})", min_value=1, value=1, key="news_page"), pages) - 1
+    st.dataframe(table.page(rows, page, page_size), hide_index=True, use_container_width=True)
+    st.caption(f"{len(rows)} of {len(table)} articles")
+
+def build_dashboard(df_news, trends_df, terms):
+    """
+    Everything the dashboard draws that can be computed once per analysis:
+    the article table's indexes, term counts, the bucketed timeline (both
+    counting syndicated copies once) and the cross-sector correlation. Kept
+    in the session, so reruns only render; the articles are kept in compact
+    form (categoricals, token ids, a long entity table) rather than as
+    per-row lists, since every session holds its own copy.
+
+    `terms` is the session's TermCounter: only articles new to the dashboard
+    are counted and those no longer shown are removed.
+    """
+    unique = cluster_heads(df_news)
+    terms.sync(unique)
+    correlation = sector_correlation()  # Stored history, updated incrementally
+    # Full and cleaned texts are only needed by the analysis, not for display
+    articles = compact_frame(df_news.drop(columns=["content_full", "clean_text", "cleaned_text"], errors="ignore"))
+    return {
+        "articles": articles,
+        "trends_df": trends_df,
+        "table": ArticleTable(articles),
+        "top_terms": terms.top(WORDCLOUD_MAX_WORDS),
+        "timeline": timeline_counts(unique),
+        "correlation": correlation.correlation(),
+        "lead_lag": correlation.lead_lag(min_correlation=0.3),
+        "correlation_bucket": correlation.bucket
+    }
+
+def render_dashboard(articles, trends_df, table, top_terms, timeline, correlation, lead_lag, correlation_bucket):
+    """Render analyzed articles (a CompactFrame), charts and the cross-sector correlation."""
+    render_article_table(table)
+
+    # -----------------------------
+    # Visualizations
+    # -----------------------------
+    fig = plot_sentiment_pie(articles.frame)
+    if fig: st.plotly_chart(fig)
+
+    fig = plot_category_bar(articles.frame)
+    if fig: st.plotly_chart(fig)
+
+    generate_wordcloud_from_counts(top_terms)
+
+    fig = plot_timeline(timeline)
+    if fig: st.plotly_chart(fig)
+
+    # The timeline above counts per category; topic spikes come from the trend detector
+    spikes = trends_df[trends_df["spike_flag"].astype(bool)] if "spike_flag" in trends_df.columns else trends_df.iloc[:0]
+    if not spikes.empty:
+        st.write("**Spiking topics**")
+        st.dataframe(spikes.tail(10), hide_index=True)
+
+    # -----------------------------
+    # Cross-sector correlation
+    # -----------------------------
+    fig = plot_correlation_heatmap(correlation, title="Category Correlation (article counts)")
+    if fig:
+        st.pyplot(fig)
+        plt.close(fig)  # Streamlit keeps no reference; unclosed figures pile up across reruns
+    if not lead_lag.empty:
+        st.write(f"**Leading sectors** (lag in {correlation_bucket}s):")
+        st.dataframe(lead_lag.head(10))
+
+def render_performance_panel():
+    """Per-stage timings, throughput, cache hit rates and memory of this server process."""
+    with st.expander("⏱ Performance"):
+        summary = metrics.summary()
+        if summary.empty:
+            st.write("No stage has run yet.")
+            return
+        st.dataframe(summary)
+        results = get_result_cache().stats()
+        st.write(f"**Analysis result cache:** {results['hit_rate']:.0%} hit rate "
+                 f"({results['entries']} articles cached, shared by all sessions)")
+        fetch_cache = get_cache_stats()
+        st.write(f"**Provider response cache:** {fetch_cache['hit_rate']:.0%} hit rate "
+                 f"({fetch_cache['hits']} fresh, {fetch_cache['stale_hits']} stale, {fetch_cache['misses']} misses)")
+        st.write("**Recent runs**")
+        st.dataframe(metrics.recent().tail(20).iloc[::-1])
+        st.caption(f"Prometheus metrics written to {write_prometheus()}")
+
+def warm_up_models():
+    """Registry models to preload, per config.APP_WARM_UP."""
+    if APP_WARM_UP == "none":
+        return []
+    if APP_WARM_UP != "auto":
+        return [name.strip() for name in APP_WARM_UP.split(",") if name.strip()]
+    models = ["embedding"]  # Chatbot retrieval (and topic modeling)
+    if CHATBOT_BACKEND == "gemini":
+        models.append("gemini_client")
+    if not SCHEDULER_ENABLED or SCHEDULER_IN_APP:
+        models += ["nltk_data", "stopwords", "spacy_en", "spacy_ner", "sentiment"]
+    return models
+
+# Start loading the models the dashboard will use in the background (once per
+# server process) so the first analysis doesn't pay the full load time; reruns
+# return immediately
+startup_models = warm_up_models()
+if startup_models:
+    warm_up(startup_models)
+
+# Optional Prometheus /metrics endpoint (once per server process)
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+
+# Background refresh keeps the store analyzed, so the dashboard only reads it
+if SCHEDULER_ENABLED and SCHEDULER_IN_APP:
+    start_scheduler()
 
 # -----------------------------
 # Login Page
@@ -37,66 +216,59 @@ if st.session_state.get("logged_in", False):
     st.sidebar.markdown("---")
     st.sidebar.write(f"Logged in as: {st.session_state.username}")
 
-    # Fetch News
+    # History range (articles already in the local store)
+    history_range = st.sidebar.date_input(
+        "History range",
+        value=(date.today() - timedelta(days=7), date.today())
+    )
+
+    # One-off cProfile of the next analysis (stats dumped under data/profiles/)
+    profile_next = st.sidebar.checkbox("Profile next analysis", value=False)
+
+    df_news = None
+    analyzed = False
+
+    # Fetch News (precomputed by the background scheduler when it is enabled)
     if st.sidebar.button(UI_TEXT[st.session_state.language]["fetch_news"]):
-        with st.spinner("Fetching news..."):
-            df_news = get_all_news(category=category.lower(), language=user_lang)
-
-            if df_news.empty:
-                st.warning("No news found for the selected category/language.")
-            else:
-                # -----------------------------
-                # Preprocess Text
-                # -----------------------------
-                df_news["clean_text"] = df_news["title"].fillna("") + " " + df_news["content"].fillna("")
-                df_news = preprocess_news(df_news, text_column="clean_text")
-
-                # -----------------------------
-                # Sentiment Analysis
-                # -----------------------------
-                df_news = analyze_sentiment(df_news, text_column="clean_text")
-
-                # -----------------------------
-                # Named Entity Recognition
-                # -----------------------------
-                df_news = extract_entities(df_news, text_column="clean_text")
-
-                # -----------------------------
-                # Topic Modeling
-                # -----------------------------
-                df_news, topic_model, probs = generate_topics(df_news, text_column="clean_text")
-
-                # -----------------------------
-                # Trend Analysis
-                # -----------------------------
-                trends_df = detect_trends(df_news)
-
-                # -----------------------------
-                # Display News
-                # -----------------------------
-                st.subheader("📰 Latest News")
-                for idx, row in df_news.iterrows():
-                    st.markdown(f"**{row.get('title', '')}**")
-                    st.write(row.get('content', ''))
-                    st.write(f"**Source:** {row.get('source','')}")
-                    st.write(f"**Sentiment:** {row.get('sentiment', '')}")
-                    st.write(f"**Entities:** {row.get('entities','')}")
-                    st.write(f"**Topic:** {row.get('topic','')}")
-                    st.markdown("---")
-
-                # -----------------------------
-                # Visualizations
-                # -----------------------------
-                fig = plot_sentiment_pie(df_news)
-                if fig: st.plotly_chart(fig)
-
-                fig = plot_category_bar(df_news)
-                if fig: st.plotly_chart(fig)
-
-                generate_wordcloud(" ".join(df_news["clean_text"].tolist()))
-
-                fig = plot_timeline(trends_df)
-                if fig: st.plotly_chart(fig)
+        if SCHEDULER_ENABLED:
+            df_news = load_analyzed_articles(category=category.lower(), language=user_lang, limit=DASHBOARD_ARTICLES)
+            analyzed = True
+        else:
+            with st.spinner("Fetching news..."):
+                df_news = get_all_news(category=category.lower(), language=user_lang)
+
+    # Load History
+    if st.sidebar.button("Load History") and len(history_range) == 2:
+        start, end = history_range
+        with st.spinner("Loading stored news..."):
+            df_news = load_articles(
+                start=start,
+                end=datetime.combine(end, datetime.max.time()),
+                category=category.lower(),
+                language=user_lang
+            )
+
+    if df_news is not None:
+        if df_news.empty:
+            st.warning("No news found for the selected category/language.")
+            st.session_state.dashboard = None
+        else:
+            profile_path = f"data/profiles/analysis-{datetime.now():%Y%m%d-%H%M%S}.prof"
+            with st.spinner("Analyzing news..."), profiled(profile_path, top=0) if profile_next else nullcontext():
+                df_news, trends_df = analyze_for_dashboard(df_news, analyzed=analyzed)
+                if "term_counter" not in st.session_state:
+                    st.session_state.term_counter = TermCounter()
+                st.session_state.dashboard = build_dashboard(df_news, trends_df, st.session_state.term_counter)
+                st.session_state.news_page = 1
+            if profile_next:
+                st.sidebar.write(f"Profile saved to {profile_path}")
+
+    # The analyzed frame lives in the session, so widget interactions (which
+    # rerun the script) redraw it instead of losing it
+    if st.session_state.get("dashboard") is not None:
+        render_dashboard(**st.session_state.dashboard)
+
+    render_performance_panel()
 
     # Chatbot Section
     st.markdown("## Chatbot Assistant")
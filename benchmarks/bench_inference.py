@@ -0,0 +1,63 @@
+"""
+Parity check and CPU throughput benchmark for the inference backends.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_inference --backends pytorch pytorch-int8 onnx
+    python -m benchmarks.bench_inference --input data/articles.csv --column clean_text --limit 500
+"""
+import argparse
+import json
+import pandas as pd
+from modules.inference_backends import (
+    BACKENDS, REFERENCE_BACKEND, check_sentiment_parity, check_embedding_parity, benchmark_throughput
+)
+
+SAMPLE_TEXTS = [
+    "Stock markets rallied after the central bank held interest rates steady.",
+    "The new vaccine trial reported serious side effects in several patients.",
+    "Local team wins the championship in a dramatic final match.",
+    "Die Regierung kündigte neue Investitionen in erneuerbare Energien an.",
+    "El gobierno anunció nuevas medidas para controlar la inflación.",
+    "भारत ने अंतरिक्ष मिशन में एक और बड़ी सफलता हासिल की।",
+    "Heavy rains caused flooding and power outages across the region.",
+    "Startup raises record funding round to expand its AI platform.",
+]
+
+def load_texts(path, column, limit):
+    if path is None:
+        return SAMPLE_TEXTS * max(1, limit // len(SAMPLE_TEXTS))
+    df = pd.read_json(path, lines=True) if path.endswith(".jsonl") else pd.read_csv(path)
+    return df[column].fillna("").astype(str).head(limit).tolist()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--tasks", nargs="+", default=["sentiment", "embedding"], choices=["sentiment", "embedding"])
+    parser.add_argument("--input", help="CSV or JSONL file with article texts (default: built-in samples)")
+    parser.add_argument("--column", default="clean_text")
+    parser.add_argument("--limit", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    texts = load_texts(args.input, args.column, args.limit)
+    report = {"parity": [], "throughput": []}
+
+    for task in args.tasks:
+        for backend in args.backends:
+            if backend != REFERENCE_BACKEND:
+                check = check_sentiment_parity if task == "sentiment" else check_embedding_parity
+                report["parity"].append(dict(check(texts, backend), task=task))
+            report["throughput"].append(
+                benchmark_throughput(task, backend, texts, batch_size=args.batch_size, repeats=args.repeats)
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
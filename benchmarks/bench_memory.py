@@ -0,0 +1,87 @@
+"""
+Memory footprint of the analyzed news frame: object/list columns vs. the compact columnar form.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_memory --articles 50000
+    python -m benchmarks.bench_memory --articles 200000 --out memory.json
+"""
+import argparse
+import json
+import random
+import time
+import pandas as pd
+from modules.compact_frame import compact_frame, deep_memory_usage
+
+WORDS = (
+    "government market election team match health climate energy startup research "
+    "court police economy growth vaccine players league storm rain budget policy "
+    "minister city state company shares investors inflation season coach hospital"
+).split()
+ENTITIES = [("India", "LOC"), ("Reuters", "ORG"), ("Modi", "PER"), ("Delhi", "LOC"), ("Google", "ORG"),
+            ("Mumbai", "LOC"), ("Biden", "PER"), ("World Bank", "ORG")]
+SOURCES = [f"source-{i}" for i in range(60)]
+
+def _fresh(s):
+    # spaCy returns a new str object per token; copies keep the baseline realistic
+    return s.encode("utf-8").decode("utf-8")
+
+def synthetic_analyzed(n, tokens_per_article=80, seed=0):
+    """An analyzed frame shaped like the pipeline output (without running the models)."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        tokens = [_fresh(w) for w in rng.choices(WORDS, k=tokens_per_article)]
+        rows.append({
+            "article_id": f"{i:032x}",
+            "title": " ".join(tokens[:8]).capitalize(),
+            "language": _fresh(rng.choice(["en", "en", "en", "hi", "de"])),
+            "sentiment": _fresh(rng.choice(["Positive", "Neutral", "Negative"])),
+            "source": _fresh(rng.choice(SOURCES)),
+            "category": _fresh(rng.choice(["business", "sports", "technology", "health"])),
+            "score": rng.random(),
+            "topic": rng.randint(-1, 40),
+            "tokens": tokens,
+            "lemmas": [_fresh(t) for t in tokens],
+            "entities": [tuple(_fresh(x) for x in e) for e in rng.sample(ENTITIES, rng.randint(0, 5))],
+        })
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=80, help="Tokens per article")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    df = synthetic_analyzed(args.articles, args.tokens)
+    original = deep_memory_usage(df)
+
+    start = time.perf_counter()
+    compact = compact_frame(df)
+    to_compact = time.perf_counter() - start
+    size = compact.nbytes()
+
+    start = time.perf_counter()
+    restored = compact.to_frame()
+    to_frame = time.perf_counter() - start
+    roundtrip_ok = all(restored[c].tolist() == df[c].tolist() for c in df.columns)
+
+    report = {
+        "articles": len(df),
+        "tokens_per_article": args.tokens,
+        "vocabulary": len(compact.vocab),
+        "original_bytes": original,
+        "compact_bytes": size,
+        "reduction": original / size if size else None,
+        "to_compact_seconds": to_compact,
+        "to_frame_seconds": to_frame,
+        "roundtrip_ok": roundtrip_ok,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Scaling report for the process-pool executor: articles/sec per stage vs. worker processes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_scaling --articles 2000 --workers 1 2 4 8
+    python -m benchmarks.bench_scaling --input data/articles.jsonl --out scaling.json
+"""
+import argparse
+import json
+import random
+import time
+import pandas as pd
+from modules.executor import SHARDABLE_STAGES, run_stages_parallel, get_pool, default_worker_count, shutdown_pools
+from modules.pipeline import prepare_articles
+
+WORDS = (
+    "government market election team match health climate energy startup research "
+    "court police economy growth vaccine players league storm rain budget policy"
+).split()
+
+def synthetic_articles(n, seed=0):
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        "title": [" ".join(rng.choices(WORDS, k=8)).capitalize() for _ in range(n)],
+        "content": [" ".join(rng.choices(WORDS, k=60)) + "." for _ in range(n)],
+        "url": [f"https://example.com/bench/{i}" for i in range(n)],
+        "language": "en",
+    })
+
+def load_articles(path, n):
+    if path is None:
+        return synthetic_articles(n)
+    df = pd.read_json(path, lines=True) if path.endswith(".jsonl") else pd.read_csv(path)
+    return df.head(n)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", help="CSV or JSONL articles (default: synthetic English articles)")
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--stages", nargs="+", default=list(SHARDABLE_STAGES), choices=list(SHARDABLE_STAGES))
+    parser.add_argument("--workers", nargs="+", type=int,
+                        default=sorted({1, 2, 4, default_worker_count()}))
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    base = prepare_articles(load_articles(args.input, args.articles))
+    report = {"cores": default_worker_count(), "articles": len(base), "results": []}
+
+    for stage in args.stages:
+        for workers in args.workers:
+            if workers > 1:
+                # Start the pool and load its models outside the timed region
+                pool = get_pool(stage, workers)
+                list(pool.map(abs, range(workers)))
+            # Unique texts per run so the persistent result caches don't short-circuit the stage
+            df = base.copy()
+            df["clean_text"] = df["clean_text"] + f" run{stage}{workers}{time.time_ns()}"
+            start = time.perf_counter()
+            run_stages_parallel(df, stages=(stage,), workers={stage: workers})
+            seconds = time.perf_counter() - start
+            report["results"].append({
+                "stage": stage,
+                "workers": workers,
+                "seconds": seconds,
+                "articles_per_sec": len(df) / seconds if seconds > 0 else float("inf"),
+            })
+            print(f"{stage:<11} workers={workers:<3} {len(df) / seconds:10.1f} articles/sec")
+
+    shutdown_pools()
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Reproducible benchmark suite: wall time and peak memory per pipeline stage.
+
+Every stage runs on deterministic synthetic multilingual articles at each
+requested size; fetching goes through a local stub of the news APIs and
+writes to a throwaway article store. Results are JSON, tagged with the git
+commit, so two runs can be compared.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks run --sizes 1000 10000 --out bench/HEAD.json
+    python -m benchmarks.run_benchmarks run --sizes 100000 --stages preprocess trends correlation
+    python -m benchmarks.run_benchmarks compare bench/base.json bench/HEAD.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+STAGES = ["fetch", "preprocess", "sentiment", "ner", "topics", "trends", "correlation"]
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def _peak_rss_bytes():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+    except ImportError:
+        return None
+
+def measure(fn, trace_memory=True):
+    """
+    Run fn() once.
+
+    Returns:
+        tuple: (result, seconds, peak traced Python allocation in bytes or None)
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# -----------------------------
+# Stages
+# -----------------------------
+def _fill_missing(df, seed):
+    """Synthetic sentiment/topic labels when a model stage was skipped, so later stages still run."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    if "sentiment" not in df.columns:
+        df["sentiment"] = rng.choice(["Positive", "Neutral", "Negative"], len(df))
+    if "topic" not in df.columns:
+        df["topic"] = rng.integers(-1, 20, len(df))
+    return df
+
+def run_size(n, stages, seed=0, trace_memory=True, salt=True):
+    """Run the selected stages on n synthetic articles; returns one result dict per stage."""
+    import pandas as pd
+    from benchmarks.synthetic import generate_articles
+    from modules.pipeline import prepare_articles
+
+    df = prepare_articles(generate_articles(n, seed=seed))
+    if salt:
+        # Unique text per run so the persistent sentiment/NER/embedding caches don't short-circuit
+        df["clean_text"] = df["clean_text"] + f" run{time.time_ns()}"
+    results = []
+
+    def record(stage, fn, articles=n):
+        entry = {"stage": stage, "articles": articles}
+        try:
+            result, seconds, peak = measure(fn, trace_memory)
+            entry.update({
+                "seconds": seconds,
+                "articles_per_sec": articles / seconds if seconds > 0 else None,
+                "peak_traced_bytes": peak,
+            })
+        except Exception as e:
+            result = None
+            # Missing models/corpora are expected on slim installs; keep the first line only
+            message = next((line.strip() for line in str(e).splitlines() if re.search(r"\w", line)), "")
+            entry["error"] = f"{type(e).__name__}: {message}"
+        entry["peak_rss_bytes"] = _peak_rss_bytes()
+        results.append(entry)
+        status = entry.get("error") or f"{entry['seconds']:.3f}s"
+        print(f"  {stage:<12} n={articles:<8} {status}", flush=True)
+        return result
+
+    if "fetch" in stages:
+        from modules.news_fetcher import get_all_news
+        # English goes to both providers, so page_size n/2 yields ~n articles
+        record("fetch", lambda: get_all_news("business", "en", use_cache=False, page_size=max(1, n // 2)))
+
+    if "preprocess" in stages:
+        from modules.preprocessing import preprocess_news
+        out = record("preprocess", lambda: preprocess_news(df, text_column="clean_text"))
+        if out is not None:
+            df = out
+    if "sentiment" in stages:
+        from modules.sentiment_analysis import analyze_sentiment
+        out = record("sentiment", lambda: analyze_sentiment(df, text_column="clean_text"))
+        if out is not None:
+            df = out
+    if "ner" in stages:
+        from modules.ner_analysis import extract_entities
+        out = record("ner", lambda: extract_entities(df, text_column="clean_text"))
+        if out is not None:
+            df = out
+    if "topics" in stages:
+        from modules.topic_modeling import generate_topics
+        out = record("topics", lambda: generate_topics(df, text_column="clean_text"))
+        if out is not None:
+            df = out[0]
+
+    df = _fill_missing(df, seed)
+    if "trends" in stages:
+        from modules.trend_analysis import detect_trends
+        record("trends", lambda: detect_trends(df))
+    if "correlation" in stages:
+        from modules.cross_sector import compute_category_correlation, StreamingCorrelation
+        daily = df.assign(published_at=pd.to_datetime(df["published_at"], utc=True).dt.floor("D")) \
+            .groupby(["published_at", "category"]).size().rename("article_count").reset_index()
+        record("correlation", lambda: compute_category_correlation(daily))
+        record("correlation_streaming", lambda: StreamingCorrelation(window=None).update(df).correlation())
+    return results
+
+def run(args):
+    from benchmarks.stub_server import StubNewsServer
+
+    with tempfile.TemporaryDirectory(prefix="newspulse-bench-") as tmp, \
+            StubNewsServer(latency_ms=args.latency_ms) as server:
+        # Must be set before the fetcher/store modules are imported (config reads them once)
+        os.environ["NEWSAPI_BASE_URL"] = server.newsapi_url
+        os.environ["NEWSDATA_BASE_URL"] = server.newsdata_url
+        os.environ["ARTICLE_STORE_DB"] = os.path.join(tmp, "bench_store.db")
+        # The stub has no quota: don't throttle, and don't spend the real providers' shared buckets
+        os.environ["RATE_LIMIT_DB"] = os.path.join(tmp, "bench_rate_limits.db")
+        os.environ["NEWSAPI_DAILY_QUOTA"] = os.environ["NEWSDATA_DAILY_QUOTA"] = str(10 ** 9)
+
+        report = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "seed": args.seed,
+                "sizes": args.sizes,
+                "trace_memory": not args.no_tracemalloc,
+            },
+            "results": [],
+        }
+        for n in args.sizes:
+            print(f"size {n}", flush=True)
+            report["results"].extend(run_size(n, args.stages, seed=args.seed,
+                                              trace_memory=not args.no_tracemalloc, salt=not args.warm))
+        report["meta"]["stub_requests"] = server.requests_served
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"wrote {args.out}")
+    else:
+        print(output)
+
+def compare(args):
+    """Print per-stage time and memory ratios (new / old) between two reports."""
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    before = {(r["stage"], r["articles"]): r for r in old["results"]}
+    print(f"{old['meta'].get('commit', '?')[:10]} -> {new['meta'].get('commit', '?')[:10]}")
+    print(f"{'stage':<22}{'articles':>10}{'old s':>10}{'new s':>10}{'time x':>9}{'mem x':>9}")
+    regressions = 0
+    for r in new["results"]:
+        o = before.get((r["stage"], r["articles"]))
+        if not o or "seconds" not in o or "seconds" not in r:
+            continue
+        time_ratio = r["seconds"] / o["seconds"] if o["seconds"] else float("nan")
+        mem_ratio = (r["peak_traced_bytes"] / o["peak_traced_bytes"]
+                     if r.get("peak_traced_bytes") and o.get("peak_traced_bytes") else float("nan"))
+        flag = "  <-- slower" if time_ratio > 1 + args.tolerance else ""
+        regressions += bool(flag)
+        print(f"{r['stage']:<22}{r['articles']:>10}{o['seconds']:>10.3f}{r['seconds']:>10.3f}"
+              f"{time_ratio:>9.2f}{mem_ratio:>9.2f}{flag}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and write a JSON report")
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    run_parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--latency-ms", type=float, default=0, help="Stub server latency per request")
+    run_parser.add_argument("--no-tracemalloc", action="store_true",
+                            help="Skip Python allocation tracing (cleaner timings, no peak memory)")
+    run_parser.add_argument("--warm", action="store_true",
+                            help="Don't salt texts: measure with the persistent result caches warm")
+    run_parser.add_argument("--out", help="Write the JSON report to this file")
+
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown before flagging")
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == "__main__":
+    main()
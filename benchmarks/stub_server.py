@@ -0,0 +1,125 @@
+"""
+Local stub of the NewsAPI and NewsData.io endpoints the fetcher calls.
+
+Serves generated articles (benchmarks.synthetic) for any category/language,
+with optional per-request latency, so fetch benchmarks are reproducible and
+need neither network access nor API keys.
+
+Usage (from the repository root):
+    python -m benchmarks.stub_server --port 8765 --latency-ms 50
+    NEWSAPI_BASE_URL=http://127.0.0.1:8765/newsapi NEWSDATA_BASE_URL=http://127.0.0.1:8765/newsdata \\
+        streamlit run app.py
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from benchmarks.synthetic import generate_articles, newsapi_payload, newsdata_payload
+
+NEWSDATA_PAGE_SIZE = 10
+
+@lru_cache(maxsize=256)
+def _articles(provider, category, language, n, page=0):
+    # Deterministic per request so repeated runs replay identical payloads
+    key = f"{provider}|{category}|{language}|{page}"
+    df = generate_articles(n, seed=zlib.crc32(key.encode("utf-8")), languages=[language] if language else None,
+                           id_prefix=f"{provider}-{category}-{language}-{page}-")
+    df["category"] = category
+    return df
+
+class _Handler(BaseHTTPRequestHandler):
+    latency = 0.0
+    requests_served = 0
+    _count_lock = threading.Lock()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        if self.latency:
+            time.sleep(self.latency)
+        with self._count_lock:
+            type(self).requests_served += 1
+
+        if parts.path.endswith("/newsapi/top-headlines"):
+            size = min(int(params.get("pageSize", 20)), 10_000)
+            body = newsapi_payload(_articles("newsapi", params.get("category", "general"),
+                                             params.get("language", "en"), size))
+        elif parts.path.endswith("/newsdata/news"):
+            page = int(params.get("page") or 0)
+            body = newsdata_payload(_articles("newsdata", params.get("category", "general"),
+                                              params.get("language", "en"), NEWSDATA_PAGE_SIZE, page),
+                                    next_page=str(page + 1))
+        else:
+            self.send_error(404, "Unknown endpoint")
+            return
+
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+class StubNewsServer:
+    """
+    Threaded stub server; use as a context manager.
+
+    Attributes (once started):
+        newsapi_url, newsdata_url: Base URLs for config.NEWSAPI_BASE_URL / NEWSDATA_BASE_URL.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0):
+        handler = type("Handler", (_Handler,), {"latency": latency_ms / 1000.0, "requests_served": 0})
+        self.handler = handler
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        host, port = self.server.server_address[:2]
+        self.newsapi_url = f"http://{host}:{port}/newsapi"
+        self.newsdata_url = f"http://{host}:{port}/newsdata"
+        self._thread = None
+
+    @property
+    def requests_served(self):
+        return self.handler.requests_served
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-news-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    args = parser.parse_args()
+
+    server = StubNewsServer(args.host, args.port, args.latency_ms)
+    print(f"NEWSAPI_BASE_URL={server.newsapi_url}")
+    print(f"NEWSDATA_BASE_URL={server.newsdata_url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+if __name__ == "__main__":
+    main()
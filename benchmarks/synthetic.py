@@ -0,0 +1,123 @@
+"""
+Deterministic synthetic news articles for benchmarks.
+
+Articles are multilingual (word pools per language, including Indic scripts),
+carry named entities, URLs and punctuation for the cleaning/NER stages, are
+spread over time and categories for trends/correlation, and include a share
+of syndicated near-duplicates. The same (seed, n) always gives the same frame.
+"""
+import random
+import pandas as pd
+
+WORDS = {
+    "en": ("government market election team match health climate energy startup research court police "
+           "economy growth vaccine players league storm rain budget policy minister city investors shares "
+           "inflation season coach hospital announced reported record talks crisis").split(),
+    "hi": ("सरकार बाजार चुनाव टीम मैच स्वास्थ्य जलवायु ऊर्जा शोध अदालत पुलिस अर्थव्यवस्था विकास टीका खिलाड़ी "
+           "बारिश बजट नीति मंत्री शहर निवेशक महंगाई अस्पताल घोषणा रिकॉर्ड बातचीत संकट").split(),
+    "ta": ("அரசு சந்தை தேர்தல் அணி போட்டி சுகாதாரம் காலநிலை ஆற்றல் ஆராய்ச்சி நீதிமன்றம் காவல்துறை பொருளாதாரம் "
+           "வளர்ச்சி தடுப்பூசி வீரர்கள் மழை பட்ஜெட் கொள்கை அமைச்சர் நகரம் மருத்துவமனை அறிவிப்பு").split(),
+    "bn": ("সরকার বাজার নির্বাচন দল ম্যাচ স্বাস্থ্য জলবায়ু শক্তি গবেষণা আদালত পুলিশ অর্থনীতি উন্নয়ন টিকা "
+           "খেলোয়াড় বৃষ্টি বাজেট নীতি মন্ত্রী শহর হাসপাতাল ঘোষণা").split(),
+    "de": ("Regierung Markt Wahl Mannschaft Spiel Gesundheit Klima Energie Forschung Gericht Polizei Wirtschaft "
+           "Wachstum Impfstoff Spieler Regen Haushalt Politik Minister Stadt Anleger Inflation Krankenhaus").split(),
+    "es": ("gobierno mercado elección equipo partido salud clima energía investigación tribunal policía "
+           "economía crecimiento vacuna jugadores lluvia presupuesto política ministro ciudad inflación").split(),
+    "zh": "政府 市场 选举 球队 比赛 健康 气候 能源 研究 法院 警方 经济 增长 疫苗 球员 降雨 预算 政策 部长 城市 通胀 医院".split(),
+}
+# Share of articles per language (NewsAPI + NewsData.io mix, English-heavy)
+LANGUAGE_WEIGHTS = {"en": 6, "hi": 2, "ta": 1, "bn": 1, "de": 1, "es": 1, "zh": 1}
+
+ENTITIES = ["India", "Reuters", "Narendra Modi", "New Delhi", "Google", "Mumbai", "World Bank", "Tata Motors",
+            "Supreme Court", "BCCI", "Chennai", "Infosys", "United Nations", "Kolkata", "RBI"]
+SOURCES = [f"source-{i}" for i in range(40)]
+CATEGORIES = ["business", "entertainment", "general", "health", "science", "sports", "technology"]
+
+def _sentence(rng, words, n_words):
+    body = " ".join(rng.choices(words, k=n_words))
+    return f"{rng.choice(ENTITIES)} {body}, {rng.choice(ENTITIES)}."
+
+def generate_articles(n, seed=0, days=30, duplicate_rate=0.1, languages=None, start="2025-01-01", id_prefix=""):
+    """
+    Generate `n` synthetic articles in the fetcher's normalized format.
+
+    Parameters:
+        n (int): Number of articles.
+        seed (int): Random seed.
+        days (int): Publication dates are spread over this many days from `start`.
+        duplicate_rate (float): Share of articles that are lightly edited
+            copies of an earlier article (syndication).
+        languages (list or None): Restrict to these languages (default: all of WORDS).
+        id_prefix (str): Prefix for article URLs (keeps separately generated batches distinct).
+
+    Returns:
+        pd.DataFrame: title, content, content_full, url, source, author,
+        category, language and published_at columns.
+    """
+    rng = random.Random(seed)
+    langs = languages or list(WORDS)
+    weights = [LANGUAGE_WEIGHTS.get(lang, 1) for lang in langs]
+    start = pd.Timestamp(start, tz="UTC")
+    rows = []
+    for i in range(n):
+        if rows and rng.random() < duplicate_rate:
+            original = rows[rng.randrange(len(rows))]
+            row = dict(original)
+            row["url"] = f"https://{rng.choice(SOURCES)}.example.com/news/{id_prefix}{i}"
+            row["source"] = rng.choice(SOURCES)
+            row["content"] = original["content"] + f" ({row['source']})"
+        else:
+            lang = rng.choices(langs, weights=weights)[0]
+            words = WORDS[lang]
+            content = " ".join(_sentence(rng, words, rng.randint(8, 16)) for _ in range(rng.randint(3, 6)))
+            row = {
+                "title": _sentence(rng, words, 6).rstrip("."),
+                "content": content + f" More at https://example.com/story/{i}",
+                "url": f"https://{rng.choice(SOURCES)}.example.com/news/{id_prefix}{i}",
+                "source": rng.choice(SOURCES),
+                "author": f"Reporter {rng.randint(1, 200)}",
+                "category": rng.choice(CATEGORIES),
+                "language": lang,
+            }
+        row["content_full"] = row["content"]
+        row["published_at"] = (start + pd.Timedelta(seconds=rng.randint(0, days * 86400))).isoformat()
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+# -----------------------------
+# Provider payloads
+# -----------------------------
+def newsapi_payload(articles):
+    """NewsAPI /top-headlines response body for a frame of generated articles."""
+    return {
+        "status": "ok",
+        "totalResults": len(articles),
+        "articles": [{
+            "source": {"id": None, "name": a["source"]},
+            "author": a["author"],
+            "title": a["title"],
+            "description": a["content"],
+            "url": a["url"],
+            "publishedAt": a["published_at"],
+            "content": a["content_full"],
+        } for a in articles.to_dict("records")],
+    }
+
+def newsdata_payload(articles, next_page=None):
+    """NewsData.io /news response body for a frame of generated articles."""
+    return {
+        "status": "success",
+        "totalResults": len(articles),
+        "results": [{
+            "title": a["title"],
+            "link": a["url"],
+            "content": a["content"],
+            "description": a["content"],
+            "pubDate": a["published_at"],
+            "source_id": a["source"],
+            "creator": [a["author"]],
+            "language": a["language"],
+            "category": [a["category"]],
+        } for a in articles.to_dict("records")],
+        "nextPage": next_page,
+    }
@@ -24,6 +24,20 @@ NEWSDATA_LANGUAGES = [
     "en", "hi", "bn", "gu", "kn", "ml", "mr", "or", "pa", "ta", "te", "ur"
 ]
 
+# Writing scripts kept by text cleaning for each news language (ASCII letters
+# and digits are always kept, so embedded English survives). Languages not
+# listed keep every Unicode letter and digit.
+LANGUAGE_SCRIPTS = {
+    "en": [],
+    "hi": ["devanagari"], "mr": ["devanagari"],
+    "bn": ["bengali"], "gu": ["gujarati"], "pa": ["gurmukhi"], "or": ["oriya"],
+    "ta": ["tamil"], "te": ["telugu"], "kn": ["kannada"], "ml": ["malayalam"],
+    "ur": ["arabic"], "ud": ["arabic"], "ar": ["arabic"], "he": ["hebrew"],
+    "ru": ["cyrillic"], "zh": ["cjk"],
+    "de": ["latin"], "es": ["latin"], "fr": ["latin"], "it": ["latin"],
+    "nl": ["latin"], "no": ["latin"], "pt": ["latin"], "sv": ["latin"],
+}
+
 # Combined selectable news languages for the UI
 USER_SELECTABLE_NEWS_LANGUAGES = sorted(list(set(NEWSAPI_LANGUAGES + NEWSDATA_LANGUAGES)))
 
@@ -88,8 +102,249 @@ UI_TEXT = {
     # [Additional UI languages can be added here as needed]
 }
 
+# -------------------------
+# HTTP Fetching
+# -------------------------
+# Provider base URLs (override to point the fetcher at a local stub server)
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2")
+NEWSDATA_BASE_URL = os.getenv("NEWSDATA_BASE_URL", "https://newsdata.io/api/1")
+
+# Per-request (connect, read) timeout in seconds
+HTTP_TIMEOUT = (3.05, 10)
+
+# Upper bound on in-flight provider requests and pooled connections per host
+HTTP_MAX_CONCURRENCY = 8
+HTTP_POOL_SIZE = 16
+
+# NewsData.io returns a fixed number of results per page
+NEWSDATA_RESULTS_PER_PAGE = 10
+
+# Per-provider request quotas (token buckets shared by every process through
+# RATE_LIMIT_DB): burst capacity and sustained requests per day. Defaults fit
+# the free plans (NewsAPI 100 requests/day, NewsData.io 200 credits/day)
+PROVIDER_QUOTAS = {
+    "newsapi": {"capacity": 10, "per_day": int(os.getenv("NEWSAPI_DAILY_QUOTA", "100"))},
+    "newsdataio": {"capacity": 10, "per_day": int(os.getenv("NEWSDATA_DAILY_QUOTA", "200"))},
+}
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "data/rate_limits.db")
+# Longest an interactive request waits for a quota token before giving up
+HTTP_QUOTA_WAIT = 5
+
+# Retries on 5xx/network errors: exponential backoff with full jitter
+# (base * 2**attempt, capped), or the provider's Retry-After when given. A 429
+# is not retried; it drains the provider's quota bucket instead
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_BASE = 1.0
+HTTP_BACKOFF_MAX = 60.0
+
+# -------------------------
+# NLP Pipeline
+# -------------------------
+# spaCy preprocessing: documents per nlp.pipe batch and worker processes
+PREPROCESS_BATCH_SIZE = 256
+PREPROCESS_N_PROCESS = 1
+
+# Sentiment model, inference batch size and token truncation limit
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+SENTIMENT_BATCH_SIZE = 32
+SENTIMENT_MAX_LENGTH = 512
+
+# Multilingual NER: documents per nlp.pipe batch and worker processes
+NER_BATCH_SIZE = 256
+NER_N_PROCESS = 1
+
+# Sentence encoder used for topic modeling
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Sentence-embedding store: fixed-capacity memory-mapped matrix (least
+# recently used rows are reused when full); entries unused for MAX_AGE
+# seconds are dropped after every scheduler cycle and pipeline run
+EMBEDDING_STORE_DIR = "data/embeddings"
+EMBEDDING_STORE_CAPACITY = 200_000
+EMBEDDING_STORE_DTYPE = "float16"
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_STORE_MAX_AGE = 30 * 24 * 3600
+
+# Persistent topic model: fitted once there are TOPIC_MIN_FIT_DOCS documents,
+# then new batches are assigned with transform(). A document whose embedding
+# is less than TOPIC_NOVELTY_MIN_SIMILARITY (cosine) from every topic is
+# assigned the outlier topic -1 and buffered; every TOPIC_UPDATE_MIN_DOCS
+# buffered documents are fitted and merged in as new topics. (A reloaded
+# model assigns by nearest topic and almost never returns -1 by itself.)
+TOPIC_MODEL_DIR = "data/topic_model"
+TOPIC_MIN_FIT_DOCS = 100
+TOPIC_UPDATE_MIN_DOCS = 200
+TOPIC_MERGE_MIN_SIMILARITY = 0.7
+TOPIC_NOVELTY_MIN_SIMILARITY = 0.4
+
+# Before the persistent model exists, a batch is clustered by a throwaway
+# model; batches smaller than this (too few documents for UMAP/HDBSCAN) are
+# all assigned the outlier topic -1 instead
+TOPIC_THROWAWAY_MIN_DOCS = 20
+
+# Trend detection: time bucket ("minute", "hour", "day"), z-score spike
+# threshold and EWMA smoothing factor for the per-topic baseline
+TREND_BUCKET = "hour"
+TREND_SPIKE_Z = 2.0
+TREND_EWMA_ALPHA = 0.3
+
+# Incremental trends keep this many of a topic's most recent buckets open
+# (besides the rolling window), since provider pages and scheduler batches are
+# not time ordered; articles older than those are counted as late and skipped
+TREND_REORDER_BUCKETS = 48
+
+# Dashboard charts: the timeline counts articles per category per
+# TIMELINE_BUCKET and is downsampled (LTTB) to at most TIMELINE_MAX_POINTS
+# points per category; the word cloud shows the WORDCLOUD_MAX_WORDS most
+# frequent lemmas
+TIMELINE_BUCKET = "hour"
+TIMELINE_MAX_POINTS = 500
+WORDCLOUD_MAX_WORDS = 100
+
+# Cross-sector correlation: per-category article counts per bucket, over a
+# sliding window of buckets, with lead/lag correlations up to MAX_LAG buckets
+CORRELATION_BUCKET = "day"
+CORRELATION_WINDOW = 90
+CORRELATION_MAX_LAG = 7
+CORRELATION_HISTORY_DAYS = 90
+
+# CPU inference backend: "pytorch" (reference), "pytorch-int8" (dynamic
+# quantization) or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch")
+SENTIMENT_BACKEND = INFERENCE_BACKEND
+EMBEDDING_BACKEND = INFERENCE_BACKEND
+
+# -------------------------
+# Deduplication
+# -------------------------
+# Syndicated copies of a story are clustered before analysis; only one
+# representative per cluster is analyzed and its results are copied over
+DEDUP_ENABLED = True
+
+# MinHash-LSH over word shingles: NUM_PERM hashes split into BANDS bands
+# (candidates share a whole band; with 16 x 8 the detection curve is centered
+# near THRESHOLD), candidates kept at estimated Jaccard >= THRESHOLD
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16
+DEDUP_SHINGLE_SIZE = 3
+DEDUP_THRESHOLD = 0.7
+
+# Exact headline matches only count for headlines with at least this many words
+DEDUP_MIN_TITLE_WORDS = 5
+
+# -------------------------
+# Chatbot (retrieval-augmented)
+# -------------------------
+# LLM backend: "gemini" or "stub" (local, offline; echoes the assembled prompt)
+CHATBOT_BACKEND = os.getenv("CHATBOT_BACKEND", "gemini")
+CHATBOT_MODEL = "gemini-flash-latest"
+
+# Articles retrieved per question and the prompt token budget for their context
+CHATBOT_TOP_K = 8
+CHATBOT_CONTEXT_TOKENS = 3000
+# An entity filter searches only the newest articles mentioning the entity
+CHATBOT_ENTITY_MAX_ARTICLES = 5000
+
+# Answer cache: exact question match, or a semantically similar question
+# (cosine >= SEMANTIC_THRESHOLD) with the same filters; entries expire after
+# TTL seconds and whenever new articles are indexed
+CHATBOT_CACHE_TTL = 30 * 60
+CHATBOT_CACHE_MAX_ENTRIES = 512
+CHATBOT_CACHE_DB = "data/chat_cache.db"
+CHATBOT_SEMANTIC_THRESHOLD = 0.92
+
+# Backend limits: seconds to the first token and overall, and concurrent requests
+CHATBOT_FIRST_TOKEN_TIMEOUT = 20
+CHATBOT_TIMEOUT = 60
+CHATBOT_MAX_CONCURRENCY = 4
+
+# Persistent vector index over article embeddings
+VECTOR_INDEX_DIR = "data/vector_index"
+
+# Above IVF_MIN_ROWS vectors the index is partitioned into ~sqrt(n) cells and
+# NPROBE cells are scanned per query; filtered queries matching at most
+# BRUTE_FORCE_MAX rows are scanned exactly instead
+VECTOR_INDEX_IVF_MIN_ROWS = 50_000
+VECTOR_INDEX_NPROBE = 16
+VECTOR_INDEX_BRUTE_FORCE_MAX = 50_000
+
+# -------------------------
+# Headless Pipeline
+# -------------------------
+# Articles per chunk streamed through the pipeline, and the number of chunks
+# allowed to wait between two stages (bounds memory)
+PIPELINE_CHUNK_SIZE = 500
+PIPELINE_QUEUE_SIZE = 2
+
+# Worker processes per shardable stage for the process-pool executor
+# (1 = run in the calling process) and torch threads per worker process
+STAGE_WORKERS = {"preprocess": 1, "sentiment": 1, "ner": 1}
+WORKER_TORCH_THREADS = 1
+
 # -------------------------
 # Data & Cache
 # -------------------------
-# Local cache for fetched news to reduce API calls during testing
-NEWS_CACHE_FILE = "data/news_cache.json"
+# Provider response cache: fresh for TTL seconds, then served stale (while a
+# background request revalidates) for up to STALE_TTL more seconds
+RESPONSE_CACHE_TTL = 15 * 60
+RESPONSE_CACHE_STALE_TTL = 60 * 60
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_DB = "data/response_cache.db"
+
+# Sentiment results keyed by (model id, text hash); the oldest entries are
+# dropped beyond MAX_ENTRIES
+SENTIMENT_CACHE_DB = "data/sentiment_cache.db"
+SENTIMENT_CACHE_MAX_ENTRIES = 200_000
+
+# NER results keyed by (model id, text hash); the oldest entries are dropped
+# beyond MAX_ENTRIES
+NER_CACHE_DB = "data/ner_cache.db"
+NER_CACHE_MAX_ENTRIES = 200_000
+
+# Per-article analysis results shared by every dashboard session of a server
+# process, keyed by article text and the model/config versions (least recently
+# used results are evicted beyond this many articles)
+RESULT_CACHE_MAX_ARTICLES = 20_000
+
+# Persistent SQLite article store (articles upserted by normalized URL hash);
+# override to keep benchmark or test runs out of the real store
+ARTICLE_STORE_DB = os.getenv("ARTICLE_STORE_DB", "data/news_store.db")
+
+# -------------------------
+# Metrics & Profiling
+# -------------------------
+# Per-stage timings/counters kept in process (utils.metrics). Tracing peak
+# Python allocations per stage (tracemalloc) slows the stages down noticeably,
+# so it is opt-in; max-RSS growth is always recorded
+METRICS_TRACE_MEMORY = os.getenv("METRICS_TRACE_MEMORY", "0") == "1"
+METRICS_HISTORY = 200  # Recent stage runs kept for the Performance panel
+
+# Prometheus text export: file rewritten after each dashboard refresh, and an
+# optional /metrics HTTP endpoint (disabled unless a port is set)
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", "data/metrics.prom")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0")) or None
+
+# -------------------------
+# Background Refresh
+# -------------------------
+# The scheduler (python -m newspulse schedule) polls every (category, language)
+# pair round-robin, as often as the provider quotas allow, and analyzes only
+# articles not already in the store; the dashboard then reads stored results
+SCHEDULER_INTERVAL = 15 * 60  # Seconds between polling cycles
+SCHEDULER_PAGE_SIZE = 20  # Articles per provider per pair
+SCHEDULER_CATEGORIES = list(EXTENDED_CATEGORIES)
+SCHEDULER_LANGUAGES = USER_SELECTABLE_NEWS_LANGUAGES
+# Set when a scheduler keeps the store fresh: "Fetch News" then loads the
+# newest DASHBOARD_ARTICLES precomputed results instead of fetching and
+# analyzing synchronously
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+DASHBOARD_ARTICLES = 200
+# Run the scheduler inside the dashboard process (turn off when it runs as a
+# separate `newspulse schedule` process)
+SCHEDULER_IN_APP = os.getenv("SCHEDULER_IN_APP", "1") == "1"
+# Models the dashboard loads in the background at startup. "auto" loads only
+# those its active path calls: the analysis models when it analyzes articles
+# itself (no scheduler, or the scheduler runs in-app), otherwise just the
+# chatbot's. "none" turns warm-up off; a comma-separated list of registry
+# names (e.g. "sentiment,embedding") loads exactly those.
+APP_WARM_UP = os.getenv("APP_WARM_UP", "auto")
@@ -0,0 +1,539 @@
+import hashlib
+import json
+import sqlite3
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import pandas as pd
+from config import ARTICLE_STORE_DB
+from modules.trend_analysis import TREND_COLUMNS
+
+# Columns stored as first-class (indexed/queryable) fields; anything else goes to 'extra'
+ARTICLE_COLUMNS = [
+    "article_id", "url", "title", "content", "content_full", "author",
+    "source", "category", "language", "published_at", "fetched_at"
+]
+
+# Query parameters that only track the click and never change the article:
+# any name starting with a prefix, or exactly one of the names
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "cmpid", "ocid"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_id   TEXT PRIMARY KEY,
+    url          TEXT,
+    title        TEXT,
+    content      TEXT,
+    content_full TEXT,
+    author       TEXT,
+    source       TEXT,
+    category     TEXT,
+    language     TEXT,
+    published_at TEXT,
+    fetched_at   TEXT,
+    extra        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles (published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_category ON articles (category, published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_language ON articles (language, published_at);
+CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, published_at);
+
+-- Inverted entity -> article index; published_at is denormalized so
+-- "top entities in a time range" is an index range scan without a join
+CREATE TABLE IF NOT EXISTS entity_mentions (
+    entity_norm  TEXT NOT NULL,
+    entity       TEXT,
+    label        TEXT NOT NULL,
+    article_id   TEXT NOT NULL,
+    count        INTEGER NOT NULL,
+    published_at TEXT,
+    PRIMARY KEY (entity_norm, label, article_id)
+);
+CREATE INDEX IF NOT EXISTS idx_mentions_article ON entity_mentions (article_id);
+CREATE INDEX IF NOT EXISTS idx_mentions_published_at ON entity_mentions (published_at, entity_norm);
+
+-- Per-article analysis results (written by the pipeline / scheduler)
+CREATE TABLE IF NOT EXISTS article_analysis (
+    article_id   TEXT PRIMARY KEY,
+    cleaned_text TEXT,
+    lemmas       TEXT,
+    entities     TEXT,
+    sentiment    TEXT,
+    score        REAL,
+    topic        INTEGER,
+    analyzed_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_sentiment ON article_analysis (sentiment);
+CREATE INDEX IF NOT EXISTS idx_analysis_topic ON article_analysis (topic);
+
+-- Per-topic trend rows per time bucket
+CREATE TABLE IF NOT EXISTS topic_trends (
+    topic             INTEGER NOT NULL,
+    bucket            TEXT NOT NULL,
+    article_count     INTEGER,
+    avg_sentiment     REAL,
+    rolling_count     REAL,
+    rolling_sentiment REAL,
+    ewma_count        REAL,
+    zscore            REAL,
+    spike_flag        INTEGER,
+    PRIMARY KEY (topic, bucket)
+);
+CREATE INDEX IF NOT EXISTS idx_trends_bucket ON topic_trends (bucket);
+"""
+
+ANALYSIS_COLUMNS = ["cleaned_text", "lemmas", "entities", "sentiment", "score", "topic"]
+
+# -----------------------------
+# Article identity
+# -----------------------------
+def normalize_url(url):
+    """Canonicalize a URL so the same article fetched twice maps to one key."""
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not (k.lower().startswith(TRACKING_PARAM_PREFIXES) or k.lower() in TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+def url_hash(url):
+    """Stable article id derived from the normalized URL."""
+    return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()[:32]
+
+def assign_article_ids(df):
+    """
+    Return a copy of df with an 'article_id' column keyed by normalized URL
+    hash. Articles without a URL fall back to a hash of title and source.
+    """
+    df = df.copy()
+    if df.empty:
+        return df
+    urls = df["url"] if "url" in df.columns else pd.Series("", index=df.index)
+    fallback = df.get("title", pd.Series("", index=df.index)).fillna("").astype(str) + "|" + \
+        df.get("source", pd.Series("", index=df.index)).fillna("").astype(str)
+    df["article_id"] = [
+        url_hash(url) if isinstance(url, str) and url.strip()
+        else hashlib.sha256(fb.encode("utf-8")).hexdigest()[:32]
+        for url, fb in zip(urls, fallback)
+    ]
+    return df
+
+def normalize_entity(text):
+    """Case- and whitespace-insensitive lookup key for an entity surface form."""
+    return " ".join(str(text).split()).casefold()
+
+def _to_iso(series):
+    """Normalize timestamps to sortable UTC ISO-8601 strings (None if unparseable)."""
+    ts = pd.to_datetime(series, errors="coerce", utc=True)
+    return [t.strftime("%Y-%m-%dT%H:%M:%SZ") if not pd.isna(t) else None for t in ts]
+
+# -----------------------------
+# Connection
+# -----------------------------
+def connect(db_path=ARTICLE_STORE_DB):
+    """Open the store, creating tables and indexes if needed."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# -----------------------------
+# Writes
+# -----------------------------
+def upsert_articles(df, db_path=ARTICLE_STORE_DB):
+    """
+    Insert new articles and update refetched ones in place.
+
+    Parameters:
+        df (pd.DataFrame): Normalized articles as returned by the fetcher.
+        db_path (str): SQLite database path.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if df.empty:
+        return 0
+    if "article_id" not in df.columns:
+        df = assign_article_ids(df)
+
+    records = pd.DataFrame(index=df.index)
+    for col in ARTICLE_COLUMNS:
+        records[col] = df[col] if col in df.columns else None
+    records["published_at"] = _to_iso(records["published_at"])
+    records["fetched_at"] = pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    extra_cols = [c for c in df.columns if c not in ARTICLE_COLUMNS]
+    records["extra"] = [
+        json.dumps(row, ensure_ascii=False, default=str)
+        for row in df[extra_cols].to_dict(orient="records")
+    ] if extra_cols else None
+
+    columns = ARTICLE_COLUMNS + ["extra"]
+    updates = ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in columns if c != "article_id")
+    sql = (
+        f"INSERT INTO articles ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT(article_id) DO UPDATE SET {updates}"
+    )
+    rows = records[columns].astype(object).where(records[columns].notna(), None).values.tolist()
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(sql, rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+# -----------------------------
+# Reads
+# -----------------------------
+def load_articles(start=None, end=None, category=None, language=None, source=None,
+                  limit=None, db_path=ARTICLE_STORE_DB):
+    """
+    Load stored articles with indexed range/filter queries.
+
+    Parameters:
+        start, end (str or datetime): Inclusive 'published_at' bounds.
+        category, language, source (str): Optional equality filters.
+        limit (int): Maximum rows, newest first.
+        db_path (str): SQLite database path.
+
+    Returns:
+        pd.DataFrame: Matching articles (extra fields expanded back into columns).
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("published_at >= ?")
+        params.append(_to_iso([start])[0])
+    if end is not None:
+        clauses.append("published_at <= ?")
+        params.append(_to_iso([end])[0])
+    for col, value in (("category", category), ("language", language), ("source", source)):
+        if value is not None:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+
+    sql = "SELECT * FROM articles"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY published_at DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+    if df.empty:
+        return df
+    extra = pd.DataFrame([json.loads(x) if x else {} for x in df.pop("extra")], index=df.index)
+    extra = extra[[c for c in extra.columns if c not in df.columns]]
+    return pd.concat([df, extra], axis=1)
+
+def upsert_entity_index(index_df, db_path=ARTICLE_STORE_DB):
+    """
+    Replace the indexed entity mentions of the given articles.
+
+    Parameters:
+        index_df (pd.DataFrame): Long table with 'entity', 'label', 'article_id',
+            'count' and optionally 'published_at' (see ner_analysis.build_entity_index).
+        db_path (str): SQLite database path.
+
+    Returns:
+        int: Number of mention rows written.
+    """
+    if index_df.empty:
+        return 0
+    published = _to_iso(index_df["published_at"]) if "published_at" in index_df.columns \
+        else [None] * len(index_df)
+    rows = list(zip(
+        [normalize_entity(e) for e in index_df["entity"]],
+        index_df["entity"].tolist(),
+        index_df["label"].tolist(),
+        index_df["article_id"].tolist(),
+        index_df["count"].astype(int).tolist(),
+        published
+    ))
+    article_ids = [(a,) for a in index_df["article_id"].unique().tolist()]
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany("DELETE FROM entity_mentions WHERE article_id = ?", article_ids)
+            conn.executemany(
+                "INSERT INTO entity_mentions (entity_norm, entity, label, article_id, count, published_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(entity_norm, label, article_id) "
+                "DO UPDATE SET count = count + excluded.count",
+                rows
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+def articles_mentioning(entity, label=None, limit=None, db_path=ARTICLE_STORE_DB):
+    """
+    Articles that mention an entity (index lookup), newest first.
+
+    Returns:
+        pd.DataFrame: Article rows plus the 'mention_count' of the entity.
+    """
+    sql = (
+        "SELECT a.*, m.count AS mention_count FROM entity_mentions m "
+        "JOIN articles a ON a.article_id = m.article_id WHERE m.entity_norm = ?"
+    )
+    params = [normalize_entity(entity)]
+    if label is not None:
+        sql += " AND m.label = ?"
+        params.append(label)
+    sql += " ORDER BY a.published_at DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    return df.drop(columns=["extra"], errors="ignore")
+
+def article_ids_mentioning(entity, limit=None, db_path=ARTICLE_STORE_DB):
+    """Ids of the articles that mention an entity (index lookup), newest first, at most `limit`."""
+    sql = (
+        "SELECT article_id FROM entity_mentions WHERE entity_norm = ? "
+        "GROUP BY article_id ORDER BY MAX(published_at) DESC"
+    )
+    params = [normalize_entity(entity)]
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    conn = connect(db_path)
+    try:
+        return [article_id for (article_id,) in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def top_entities(start=None, end=None, label=None, limit=20, db_path=ARTICLE_STORE_DB):
+    """
+    Most-mentioned entities within an optional 'published_at' range.
+
+    Returns:
+        pd.DataFrame: entity, label, mentions, articles (sorted by mentions).
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("published_at >= ?")
+        params.append(_to_iso([start])[0])
+    if end is not None:
+        clauses.append("published_at <= ?")
+        params.append(_to_iso([end])[0])
+    if label is not None:
+        clauses.append("label = ?")
+        params.append(label)
+
+    sql = (
+        "SELECT MAX(entity) AS entity, label, SUM(count) AS mentions, "
+        "COUNT(DISTINCT article_id) AS articles FROM entity_mentions"
+    )
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " GROUP BY entity_norm, label ORDER BY mentions DESC LIMIT ?"
+    params.append(int(limit))
+
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+def upsert_analysis(df, db_path=ARTICLE_STORE_DB):
+    """
+    Store per-article analysis results (list columns are stored as JSON).
+
+    Returns:
+        int: Number of rows written.
+    """
+    if df.empty:
+        return 0
+    analyzed_at = pd.Timestamp.now(tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+    cols = {c: (df[c].tolist() if c in df.columns else [None] * len(df)) for c in ANALYSIS_COLUMNS}
+    rows = []
+    for i, article_id in enumerate(df["article_id"].tolist()):
+        row = [article_id]
+        for c in ANALYSIS_COLUMNS:
+            value = cols[c][i]
+            if c in ("lemmas", "entities"):
+                value = json.dumps(list(value), ensure_ascii=False) if value is not None else None
+            elif c == "topic" and value is not None:
+                value = int(value)
+            elif c == "score" and value is not None:
+                value = float(value)
+            row.append(value)
+        row.append(analyzed_at)
+        rows.append(row)
+
+    columns = ["article_id"] + ANALYSIS_COLUMNS + ["analyzed_at"]
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO article_analysis ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+def load_analyzed_articles(start=None, end=None, category=None, language=None, limit=None,
+                           db_path=ARTICLE_STORE_DB):
+    """
+    Load stored articles joined with their analysis results (analyzed articles only).
+
+    Returns:
+        pd.DataFrame: Article columns plus the analysis columns, newest first.
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("a.published_at >= ?")
+        params.append(_to_iso([start])[0])
+    if end is not None:
+        clauses.append("a.published_at <= ?")
+        params.append(_to_iso([end])[0])
+    for col, value in (("category", category), ("language", language)):
+        if value is not None:
+            clauses.append(f"a.{col} = ?")
+            params.append(value)
+
+    sql = (
+        "SELECT a.*, " + ", ".join(f"r.{c}" for c in ANALYSIS_COLUMNS) +
+        " FROM articles a JOIN article_analysis r ON r.article_id = a.article_id"
+    )
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY a.published_at DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    df = df.drop(columns=["extra"], errors="ignore")
+    df["lemmas"] = [json.loads(x) if x else [] for x in df["lemmas"]]
+    df["entities"] = [[tuple(e) for e in json.loads(x)] if x else [] for x in df["entities"]]
+    return df
+
+def analyzed_article_ids(article_ids, db_path=ARTICLE_STORE_DB):
+    """Return the subset of article_ids that already have stored analysis results."""
+    article_ids = list(dict.fromkeys(article_ids))
+    found = set()
+    conn = connect(db_path)
+    try:
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(article_ids), 500):
+            chunk = article_ids[i:i + 500]
+            found.update(a for (a,) in conn.execute(
+                f"SELECT article_id FROM article_analysis WHERE article_id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+    finally:
+        conn.close()
+    return found
+
+def get_articles_by_id(article_ids, db_path=ARTICLE_STORE_DB):
+    """
+    Fetch stored articles by id, with their sentiment/topic when analyzed.
+
+    Returns:
+        pd.DataFrame: One row per id found, in the order requested.
+    """
+    article_ids = list(article_ids)
+    if not article_ids:
+        return pd.DataFrame(columns=["article_id"])
+    unique_ids = list(dict.fromkeys(article_ids))
+    frames = []
+    conn = connect(db_path)
+    try:
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            frames.append(pd.read_sql_query(
+                "SELECT a.*, r.sentiment, r.score, r.topic FROM articles a "
+                "LEFT JOIN article_analysis r ON r.article_id = a.article_id "
+                f"WHERE a.article_id IN ({','.join('?' * len(chunk))})",
+                conn, params=chunk
+            ))
+    finally:
+        conn.close()
+    df = pd.concat(frames, ignore_index=True)
+    order = {a: i for i, a in enumerate(article_ids)}
+    df = df.drop(columns=["extra"], errors="ignore")
+    return df.sort_values("article_id", key=lambda s: s.map(order)).reset_index(drop=True)
+
+def upsert_trends(trends_df, date_column="published_at", topic_column="topic", db_path=ARTICLE_STORE_DB):
+    """Store trend rows (one per topic and time bucket), replacing earlier values."""
+    if trends_df.empty:
+        return 0
+    records = pd.DataFrame({
+        "topic": trends_df[topic_column].astype(int),
+        "bucket": _to_iso(trends_df[date_column]),
+    })
+    for col in TREND_COLUMNS:
+        records[col] = trends_df[col].to_numpy() if col in trends_df.columns else None
+    records["spike_flag"] = records["spike_flag"].astype(bool).astype(int)
+    columns = ["topic", "bucket"] + TREND_COLUMNS
+    rows = records[columns].astype(object).where(records[columns].notna(), None).values.tolist()
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO topic_trends ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+    finally:
+        conn.close()
+    return len(rows)
+
+def load_trends(start=None, end=None, db_path=ARTICLE_STORE_DB):
+    """Load stored trend rows within an optional bucket range."""
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("bucket >= ?")
+        params.append(_to_iso([start])[0])
+    if end is not None:
+        clauses.append("bucket <= ?")
+        params.append(_to_iso([end])[0])
+    sql = "SELECT * FROM topic_trends"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY topic, bucket"
+
+    conn = connect(db_path)
+    try:
+        df = pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+    df["published_at"] = pd.to_datetime(df.pop("bucket"), utc=True)
+    df["spike_flag"] = df["spike_flag"].astype(bool)
+    return df
+
+def count_articles(db_path=ARTICLE_STORE_DB):
+    """Total number of stored articles."""
+    conn = connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+    finally:
+        conn.close()
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from modules.ner_analysis import normalize_entity
+from modules.compact_frame import CompactFrame, entities_long
+
+# Columns a page shows, in order (missing ones are skipped)
+DISPLAY_COLUMNS = ["published_at", "title", "source", "sentiment", "score", "topic", "entities", "url"]
+
+# Columns the table can be filtered on by exact value
+FILTER_COLUMNS = ["sentiment", "topic", "source"]
+
+# Columns the table can be sorted by
+SORT_COLUMNS = ["published_at", "score", "sentiment", "topic", "source"]
+
+class ArticleTable:
+    """
+    Filterable, sortable, paginated view over an analyzed article frame.
+
+    Indexes are built once per frame: value -> row positions for sentiment,
+    topic and source, normalized entity -> row positions, and a stable sort
+    order per sortable column (dates sorted for range lookups). A query is a
+    few vectorized mask operations over those indexes, and only the rows of
+    the requested page are materialized, so rendering cost depends on the
+    page size, not on the number of articles.
+    """
+
+    def __init__(self, df):
+        """
+        Parameters:
+            df (pd.DataFrame or CompactFrame): Analyzed articles. Only the
+                display, filter and sort columns are kept; entities are held
+                as a long (row, entity, label) table.
+        """
+        if isinstance(df, CompactFrame):
+            frame, self._entity_table = df.frame, df.entities
+        else:
+            frame = df.reset_index(drop=True)
+            self._entity_table = entities_long(frame) if "entities" in frame.columns else None
+        keep = dict.fromkeys(DISPLAY_COLUMNS + FILTER_COLUMNS + SORT_COLUMNS)
+        self.df = frame[[c for c in keep if c in frame.columns and c != "entities"]]
+
+        self._postings = {
+            column: {value: np.asarray(rows)
+                     for value, rows in self.df.groupby(column, sort=False, observed=True).indices.items()}
+            for column in FILTER_COLUMNS if column in self.df.columns
+        }
+
+        self._entities = {}  # normalized entity -> row positions
+        self._entity_names = {}  # normalized entity -> first surface form seen
+        if self._entity_table is not None:
+            self._entity_texts = np.asarray(self._entity_table["entity"].cat.categories, dtype=object)
+            self._entity_codes = self._entity_table["entity"].cat.codes.to_numpy()
+            keys = [normalize_entity(text) for text in self._entity_texts]  # Once per distinct surface form
+            rows = {}
+            for row, code in zip(self._entity_table["row"].to_numpy(), self._entity_codes):
+                key = keys[code]
+                rows.setdefault(key, set()).add(int(row))
+                self._entity_names.setdefault(key, self._entity_texts[code].strip())
+            self._entities = {key: np.fromiter(sorted(r), dtype=np.int64, count=len(r)) for key, r in rows.items()}
+            # Start of each row's entities in the (row-ordered) table, for page display
+            self._entity_offsets = np.searchsorted(self._entity_table["row"].to_numpy(), np.arange(len(self.df) + 1))
+
+        # Stable sort order per column (missing values last); dates sort as UTC datetimes
+        keys = self.df[[c for c in SORT_COLUMNS if c in self.df.columns]].copy()
+        if "published_at" in keys.columns:
+            keys["published_at"] = pd.to_datetime(keys["published_at"], utc=True, errors="coerce").dt.tz_convert(None)
+        self._orders = {
+            column: keys.sort_values(column, kind="stable", na_position="last").index.to_numpy()
+            for column in keys.columns
+        }
+
+        # Publication dates in sorted order, for range lookups by binary search
+        # (missing dates sort last as NaT and never fall inside a range)
+        self._sorted_dates = None
+        if "published_at" in keys.columns:
+            self._sorted_dates = keys["published_at"].to_numpy()[self._orders["published_at"]]
+            self._sorted_dates = self._sorted_dates[:int((~np.isnat(self._sorted_dates)).sum())]
+
+    def __len__(self):
+        return len(self.df)
+
+    # -----------------------------
+    # Filter options
+    # -----------------------------
+    def options(self, column):
+        """Distinct values of a filter column, most frequent first."""
+        postings = self._postings.get(column, {})
+        return sorted(postings, key=lambda value: (-len(postings[value]), str(value)))
+
+    def entity_options(self, limit=200):
+        """Most mentioned entities (surface forms), at most `limit`."""
+        keys = sorted(self._entities, key=lambda key: (-len(self._entities[key]), key))[:limit]
+        return [self._entity_names[key] for key in keys]
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _rows_of(self, postings, values):
+        mask = np.zeros(len(self.df), dtype=bool)
+        for value in values:
+            rows = postings.get(value)
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def query(self, filters=None, entity=None, start=None, end=None, sort_by="published_at", descending=True):
+        """
+        Row positions matching the filters, in sort order.
+
+        Parameters:
+            filters (dict or None): column -> accepted values (FILTER_COLUMNS; empty means any).
+            entity (str or None): Only articles mentioning this entity (normalized match).
+            start, end: Inclusive publication date range (either may be None).
+            sort_by (str): One of SORT_COLUMNS.
+            descending (bool): Sort direction.
+
+        Returns:
+            np.ndarray: Matching row positions.
+        """
+        mask = np.ones(len(self.df), dtype=bool)
+        for column, values in (filters or {}).items():
+            if values and column in self._postings:
+                mask &= self._rows_of(self._postings[column], values)
+
+        if entity:
+            mask &= self._rows_of(self._entities, [normalize_entity(entity)])
+
+        if self._sorted_dates is not None and (start is not None or end is not None):
+            dates = self._sorted_dates
+            lo = 0 if start is None else np.searchsorted(dates, _utc_naive(start), side="left")
+            hi = len(dates) if end is None else np.searchsorted(dates, _utc_naive(end), side="right")
+            in_range = np.zeros(len(self.df), dtype=bool)
+            in_range[self._orders["published_at"][lo:hi]] = True
+            mask &= in_range
+
+        order = self._orders.get(sort_by, np.arange(len(self.df)))
+        if descending:
+            order = order[::-1]
+        return order[mask[order]]
+
+    def page(self, rows, page=0, page_size=25):
+        """
+        The display frame for one page of `rows` (only these rows are materialized).
+
+        Returns:
+            pd.DataFrame: At most `page_size` rows of DISPLAY_COLUMNS.
+        """
+        rows = rows[page * page_size:(page + 1) * page_size]
+        view = self.df.iloc[rows].reset_index(drop=True)
+        if self._entity_table is not None:
+            offsets = self._entity_offsets
+            view["entities"] = [
+                ", ".join(dict.fromkeys(self._entity_texts[self._entity_codes[offsets[row]:offsets[row + 1]]]))
+                for row in rows
+            ]
+        view = view[[c for c in DISPLAY_COLUMNS if c in view.columns]]
+        for column in view.columns:
+            if isinstance(view[column].dtype, pd.CategoricalDtype):
+                view[column] = view[column].astype(object)
+        return view
+
+def _utc_naive(value):
+    """A date/datetime as a naive UTC datetime64 (naive inputs are taken as UTC)."""
+    value = pd.Timestamp(value)
+    if value.tzinfo is not None:
+        value = value.tz_convert("UTC").tz_localize(None)
+    return value.to_datetime64()
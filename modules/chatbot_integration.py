@@ -1,27 +1,41 @@
-import os
-from dotenv import load_dotenv
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
 import streamlit as st
+from config import (
+    GEMINI_API_KEY, CHATBOT_BACKEND, CHATBOT_MODEL, CHATBOT_TOP_K, CHATBOT_CONTEXT_TOKENS, CHATBOT_ENTITY_MAX_ARTICLES,
+    CHATBOT_CACHE_TTL, CHATBOT_CACHE_MAX_ENTRIES, CHATBOT_CACHE_DB, CHATBOT_SEMANTIC_THRESHOLD,
+    CHATBOT_FIRST_TOKEN_TIMEOUT, CHATBOT_TIMEOUT, CHATBOT_MAX_CONCURRENCY
+)
+from modules.model_registry import get_model
+from modules.article_store import article_ids_mentioning, get_articles_by_id
+from modules.embedding_store import embed_texts
+from modules.vector_index import get_vector_index
+from utils.cache import DiskCache, content_hash
 
-# Load API key
-load_dotenv()
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
+# The Gemini client is created lazily through the model registry ("gemini_client")
 
-# Import Gemini client
-try:
-    from google.generativeai import Client as GeminiClient
-except ImportError:
-    st.error("Please install google-generativeai package!")
-    raise
+# Rough token estimate for prompt budgeting (~4 characters per token for English text)
+CHARS_PER_TOKEN = 4
 
-# Initialize Gemini client
-if GEMINI_API_KEY:
-    gemini_client = GeminiClient(api_key=GEMINI_API_KEY)
-else:
-    gemini_client = None
-    st.error("GEMINI_API_KEY not found in .env file!")
+SYSTEM_PROMPT = (
+    "You are NewsPulse AI, a news analyst. Answer the question using the numbered "
+    "news articles below. Cite articles as [n]. If they don't contain the answer, say so."
+)
 
+# -----------------------------
+# LLM backends
+# -----------------------------
 def get_gemini_response(prompt: str) -> str:
     """Send user query to Gemini and return response."""
+    try:
+        gemini_client = get_model("gemini_client")
+    except ImportError:
+        return "Error: Please install google-generativeai package!"
     if not gemini_client:
         return "Error: Gemini client not initialized."
     if not prompt.strip():
@@ -29,23 +43,376 @@ def get_gemini_response(prompt: str) -> str:
 
     try:
         response = gemini_client.chat(
-            model="gemini-flash-latest",
+            model=CHATBOT_MODEL,
             prompt=prompt
         )
         return getattr(response, "output_text", "No response from Gemini.")
     except Exception as e:
         return f"Error: {str(e)}"
 
+class GeminiBackend:
+    name = "gemini"
+
+    def generate(self, prompt):
+        return get_gemini_response(prompt)
+
+    def stream(self, prompt):
+        """Yield response text chunks as they arrive (raises on failure)."""
+        gemini_client = get_model("gemini_client")
+        if not gemini_client:
+            raise RuntimeError("Gemini client not initialized.")
+        try:
+            chunks = gemini_client.chat(model=CHATBOT_MODEL, prompt=prompt, stream=True)
+        except TypeError:
+            # Client without streaming support: the whole response is one chunk
+            chunks = [gemini_client.chat(model=CHATBOT_MODEL, prompt=prompt)]
+        for chunk in chunks:
+            text = getattr(chunk, "output_text", None) or getattr(chunk, "text", "")
+            if text:
+                yield text
+
+class StubBackend:
+    """Offline backend (tests, local development): echoes the assembled prompt."""
+    name = "stub"
+
+    def generate(self, prompt):
+        return f"[stub response]\n\n{prompt}"
+
+    def stream(self, prompt):
+        for word in self.generate(prompt).split(" "):
+            yield word + " "
+
+LLM_BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend}
+
+def get_llm_backend(name=CHATBOT_BACKEND):
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown chatbot backend '{name}' (expected one of {sorted(LLM_BACKENDS)})")
+    return LLM_BACKENDS[name]()
+
+_END = object()
+_backend_slots = threading.BoundedSemaphore(CHATBOT_MAX_CONCURRENCY)
+
+def stream_with_limits(backend, prompt, first_token_timeout=CHATBOT_FIRST_TOKEN_TIMEOUT,
+                       timeout=CHATBOT_TIMEOUT):
+    """
+    Stream a backend response with a concurrency limit and timeouts.
+
+    At most CHATBOT_MAX_CONCURRENCY requests are in flight per process; the
+    backend runs in a worker thread so a stalled request can't block the
+    caller past `first_token_timeout` (no output yet) or `timeout` (overall).
+
+    Raises:
+        TimeoutError: No free slot, or the backend was too slow.
+    """
+    if not _backend_slots.acquire(timeout=first_token_timeout):
+        raise TimeoutError("The assistant is busy, please retry in a moment.")
+    chunks = queue.Queue()
+
+    def _produce():
+        try:
+            for chunk in backend.stream(prompt):
+                chunks.put(chunk)
+            chunks.put(_END)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            _backend_slots.release()
+
+    threading.Thread(target=_produce, name="chatbot-backend", daemon=True).start()
+    deadline = time.monotonic() + timeout
+    wait = first_token_timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            item = chunks.get(timeout=max(0.0, min(wait, remaining)))
+        except queue.Empty:
+            raise TimeoutError("The assistant took too long to respond.") from None
+        if item is _END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        wait = remaining
+        yield item
+
+# -----------------------------
+# Answer cache
+# -----------------------------
+def normalize_question(question):
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+class ChatCache:
+    """
+    Answer cache for the chatbot.
+
+    Lookups match the normalized question exactly, or else the most similar
+    cached question (embedding cosine >= `threshold`) asked with the same
+    scope (backend, filters, k). The scope includes the vector index version,
+    so indexing new articles invalidates every earlier answer. Exact entries
+    are also kept on disk; semantic matching uses the in-memory LRU.
+    """
+
+    def __init__(self, ttl=CHATBOT_CACHE_TTL, max_entries=CHATBOT_CACHE_MAX_ENTRIES,
+                 threshold=CHATBOT_SEMANTIC_THRESHOLD, disk_path=CHATBOT_CACHE_DB):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._memory = OrderedDict()  # key -> entry dict, most recently used last
+        self._disk = DiskCache(disk_path, max_entries=max_entries * 4) if disk_path else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(question, scope):
+        return content_hash(normalize_question(question), scope)
+
+    def _fresh(self, entry):
+        return time.time() - entry["stored_at"] <= self.ttl
+
+    def lookup(self, question, query_vector, scope):
+        """Return the cached entry ({'answer', 'sources', ...}) or None."""
+        key = self.make_key(question, scope)
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None and self._disk is not None:
+            stored = self._disk.get(key)
+            entry = stored[0] if stored else None
+        if entry is not None and self._fresh(entry):
+            self._remember(key, entry)
+            return self._record("hits", entry)
+
+        if query_vector is not None:
+            with self._lock:
+                candidates = [e for e in self._memory.values()
+                              if e["scope"] == scope and e["embedding"] is not None and self._fresh(e)]
+            if candidates:
+                q = np.asarray(query_vector, dtype=np.float32)
+                q = q / (np.linalg.norm(q) or 1.0)
+                similarity = np.stack([e["embedding"] for e in candidates]) @ q
+                best = int(np.argmax(similarity))
+                if similarity[best] >= self.threshold:
+                    return self._record("semantic_hits", candidates[best])
+        return self._record("misses", None)
+
+    def put(self, question, query_vector, scope, answer, sources):
+        embedding = None
+        if query_vector is not None:
+            embedding = np.asarray(query_vector, dtype=np.float32)
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+        entry = {"question": question, "scope": scope, "embedding": embedding,
+                 "answer": answer, "sources": sources, "stored_at": time.time()}
+        key = self.make_key(question, scope)
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk.set(key, entry, stored_at=entry["stored_at"])
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _record(self, kind, entry):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+_chat_cache = None
+_chat_cache_lock = threading.Lock()
+
+def get_chat_cache():
+    """Return the process-wide chatbot answer cache."""
+    global _chat_cache
+    with _chat_cache_lock:
+        if _chat_cache is None:
+            _chat_cache = ChatCache()
+    return _chat_cache
+
+# -----------------------------
+# Retrieval
+# -----------------------------
+def retrieve(query, k=CHATBOT_TOP_K, start=None, end=None, category=None, sentiment=None, entity=None,
+             query_vector=None):
+    """
+    Top-k stored articles most similar to the query.
+
+    Parameters:
+        query (str): User question.
+        k (int): Number of articles.
+        start, end (datetime-like): 'published_at' bounds.
+        category (str): Article category (lowercase, as stored).
+        sentiment (str): 'Positive', 'Neutral' or 'Negative'.
+        entity (str): Only articles mentioning this entity (entity index lookup;
+            the newest CHATBOT_ENTITY_MAX_ARTICLES of them).
+        query_vector (np.ndarray): Precomputed query embedding.
+
+    Returns:
+        pd.DataFrame: Article rows with a similarity 'score_sim', best first.
+    """
+    index = get_vector_index()
+    if not len(index) or not query.strip():
+        return pd.DataFrame(columns=["article_id", "score_sim"])
+
+    article_ids = None
+    if entity:
+        article_ids = article_ids_mentioning(entity, limit=CHATBOT_ENTITY_MAX_ARTICLES)
+        if not article_ids:
+            return pd.DataFrame(columns=["article_id", "score_sim"])
+
+    if query_vector is None:
+        query_vector = embed_texts([query], persist=False)[0]
+    hits = index.search(query_vector, k=k, start=start, end=end, category=category,
+                        sentiment=sentiment, article_ids=article_ids)
+    if hits.empty:
+        return pd.DataFrame(columns=["article_id", "score_sim"])
+    articles = get_articles_by_id(hits["article_id"])
+    return articles.merge(hits.rename(columns={"score": "score_sim"}), on="article_id") \
+        .sort_values("score_sim", ascending=False).reset_index(drop=True)
+
+# -----------------------------
+# Prompt assembly
+# -----------------------------
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def build_prompt(question, articles, max_context_tokens=CHATBOT_CONTEXT_TOKENS):
+    """
+    Assemble the LLM prompt: instructions, numbered article context, question.
+
+    Articles are added best first; each one's content is truncated to what is
+    left of the context budget, and articles that no longer fit are dropped.
+
+    Returns:
+        tuple: (prompt, number of articles included)
+    """
+    budget = max_context_tokens * CHARS_PER_TOKEN
+    blocks = []
+    for i, row in enumerate(articles.itertuples(index=False), start=1):
+        meta = ", ".join(str(v) for v in (
+            getattr(row, "source", None), str(getattr(row, "published_at", "") or "")[:10],
+            getattr(row, "sentiment", None)
+        ) if v and str(v) != "nan")
+        header = f"[{i}] {getattr(row, 'title', '') or ''}" + (f" ({meta})" if meta else "")
+        content = str(getattr(row, "content", "") or getattr(row, "description", "") or "")
+        room = budget - len(header) - 1
+        if room <= 0:
+            break
+        block = header + ("\n" + content[:room] if content else "")
+        blocks.append(block)
+        budget -= len(block) + 2
+
+    context = "\n\n".join(blocks) if blocks else "(no matching articles)"
+    prompt = f"{SYSTEM_PROMPT}\n\nArticles:\n{context}\n\nQuestion: {question}\nAnswer:"
+    return prompt, len(blocks)
+
+def stream_answer(question, backend=None, k=CHATBOT_TOP_K, use_cache=True, **filters):
+    """
+    Retrieval-augmented answer over the stored, analyzed articles, streamed.
+
+    Parameters:
+        question (str): User question.
+        backend: LLM backend with a stream(prompt) method (default: config.CHATBOT_BACKEND).
+        k (int): Articles to retrieve.
+        use_cache (bool): Serve/store answers through the chat cache.
+        **filters: start, end, category, sentiment, entity (see retrieve).
+
+    Returns:
+        tuple: (iterator of answer text chunks, DataFrame of the articles used as context)
+    """
+    if not question.strip():
+        return iter(["Please enter a valid query."]), pd.DataFrame()
+    backend = backend or get_llm_backend()
+    index = get_vector_index()
+    query_vector = embed_texts([question], persist=False)[0] if len(index) else None
+
+    cache = get_chat_cache()
+    scope = content_hash(backend.name, k, sorted((f, str(v)) for f, v in filters.items() if v is not None),
+                         index.version)
+    if use_cache:
+        entry = cache.lookup(question, query_vector, scope)
+        if entry is not None:
+            return iter([entry["answer"]]), entry["sources"]
+
+    articles = retrieve(question, k=k, query_vector=query_vector, **filters)
+    prompt, used = build_prompt(question, articles)
+    sources = articles.head(used)
+
+    def _chunks():
+        parts = []
+        try:
+            for chunk in stream_with_limits(backend, prompt):
+                parts.append(chunk)
+                yield chunk
+        except Exception as e:
+            yield f"\n\nError: {e}"
+            return  # Failed or partial answers are never cached
+        if use_cache:
+            cache.put(question, query_vector, scope, "".join(parts), sources)
+
+    return _chunks(), sources
+
+def answer_question(question, backend=None, k=CHATBOT_TOP_K, use_cache=True, **filters):
+    """
+    Non-streaming variant of stream_answer.
+
+    Returns:
+        tuple: (answer text, DataFrame of the articles used as context)
+    """
+    chunks, sources = stream_answer(question, backend=backend, k=k, use_cache=use_cache, **filters)
+    return "".join(chunks), sources
+
+# -----------------------------
+# UI
+# -----------------------------
 def chatbot_interface():
     """Streamlit UI for chatbot."""
     st.subheader("🗨️ Ask NewsPulse AI")
 
+    if CHATBOT_BACKEND == "gemini" and not GEMINI_API_KEY:
+        st.error("GEMINI_API_KEY not found in .env file!")
+
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
 
     if "chat_input" not in st.session_state:
         st.session_state.chat_input = ""
 
+    # Retrieval filters
+    with st.expander("Search filters"):
+        use_dates = st.checkbox("Limit to dates", value=False)
+        date_range = st.date_input("Published between", value=(date.today() - timedelta(days=7), date.today()))
+        category = st.selectbox("Category", ["Any"] + sorted(get_vector_index().categories))
+        sentiment = st.selectbox("Sentiment", ["Any", "Positive", "Neutral", "Negative"])
+        entity = st.text_input("Mentions entity")
+
+    filters = {
+        "category": None if category == "Any" else category,
+        "sentiment": None if sentiment == "Any" else sentiment,
+        "entity": entity.strip() or None,
+    }
+    if use_dates and len(date_range) == 2:
+        filters["start"] = date_range[0]
+        filters["end"] = datetime.combine(date_range[1], datetime.max.time())
+
     # User input box
     user_input = st.text_input(
         "Enter your question or request a summary:",
@@ -54,9 +421,19 @@ def chatbot_interface():
 
     if st.button("Send"):
         if user_input.strip():
-            with st.spinner("Getting response..."):
-                bot_response = get_gemini_response(user_input)
-            st.session_state.chat_history.append({"user": user_input, "bot": bot_response})
+            with st.spinner("Searching articles..."):
+                chunks, sources = stream_answer(user_input, **filters)
+            # Stream tokens as they arrive; the finished answer is shown from the history below
+            live = st.empty()
+            with live.container():
+                st.markdown(f"**You:** {user_input}")
+                bot_response = st.write_stream(chunks)
+            live.empty()
+            st.session_state.chat_history.append({
+                "user": user_input,
+                "bot": bot_response,
+                "sources": sources[["title", "url"]].to_dict("records") if not sources.empty else [],
+            })
             st.session_state.chat_input = ""  # clear input
 
     # Clear chat history
@@ -67,3 +444,5 @@ def chatbot_interface():
     for chat in st.session_state.chat_history:
         st.markdown(f"**You:** {chat['user']}")
         st.markdown(f"**NewsPulse AI:** {chat['bot']}")
+        for i, source in enumerate(chat.get("sources", []), start=1):
+            st.caption(f"[{i}] [{source.get('title') or source.get('url')}]({source.get('url')})")
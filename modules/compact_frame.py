@@ -0,0 +1,210 @@
+import sys
+from itertools import chain
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["language", "sentiment", "source", "category"]
+
+# Per-row token lists stored as ids into one shared vocabulary
+LIST_COLUMNS = ["tokens", "lemmas"]
+
+ENTITIES_COLUMN = "entities"
+
+# -----------------------------
+# Vocabulary and ragged arrays
+# -----------------------------
+class Vocabulary:
+    """Shared term <-> int32 id mapping (ids are assigned in first-seen order)."""
+
+    def __init__(self, terms=()):
+        self._ids = {}
+        self._terms = []
+        self.add_many(terms)
+
+    def add_many(self, terms):
+        """Return the ids of `terms`, adding unseen ones."""
+        ids = np.empty(len(terms), dtype=np.int32)
+        for i, term in enumerate(terms):
+            term_id = self._ids.get(term)
+            if term_id is None:
+                term_id = self._ids[term] = len(self._terms)
+                self._terms.append(term)
+            ids[i] = term_id
+        return ids
+
+    def id_of(self, term):
+        return self._ids.get(term, -1)
+
+    @property
+    def terms(self):
+        """Terms as an object array, indexable by id arrays."""
+        return np.array(self._terms, dtype=object)
+
+    def __len__(self):
+        return len(self._terms)
+
+def encode_ragged(lists, vocab):
+    """
+    Encode a sequence of term lists as flat int32 ids plus int64 row offsets.
+
+    Row i's ids are values[offsets[i]:offsets[i + 1]].
+    """
+    lists = [x if isinstance(x, (list, tuple, np.ndarray)) else [] for x in lists]
+    lengths = np.fromiter((len(x) for x in lists), dtype=np.int64, count=len(lists))
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    # Factorize once so the Python-level vocabulary lookup runs per distinct term, not per token
+    codes, uniques = pd.factorize(pd.Series(list(chain.from_iterable(lists)), dtype=object), sort=False)
+    values = vocab.add_many(list(uniques))[codes] if len(codes) else np.array([], dtype=np.int32)
+    return values.astype(np.int32, copy=False), offsets
+
+def decode_ragged(values, offsets, vocab):
+    """Inverse of encode_ragged: a list of term lists."""
+    if len(offsets) == 1:
+        return []  # No rows (np.split would still return one empty part)
+    terms = vocab.terms[values] if len(values) else np.array([], dtype=object)
+    return [part.tolist() for part in np.split(terms, offsets[1:-1])]
+
+# -----------------------------
+# Compact frame
+# -----------------------------
+class CompactFrame:
+    """
+    Columnar, low-overhead form of the analyzed news frame.
+
+    - `frame`: scalar columns, with CATEGORICAL_COLUMNS as categoricals;
+    - `ragged`: {column: (values, offsets)} token/lemma ids into `vocab`;
+    - `entities`: long table (row, entity, label) with categorical text.
+
+    Use to_frame() to get back the list-of-strings format every analysis
+    module expects.
+    """
+
+    def __init__(self, frame, ragged, vocab, entities, columns=None, dtypes=None):
+        self.frame = frame
+        self.ragged = ragged
+        self.vocab = vocab
+        self.entities = entities
+        self.columns = list(columns) if columns is not None else None  # Original column order
+        self.dtypes = dict(dtypes or {})  # Original dtypes of the categorical columns
+
+    def __len__(self):
+        return len(self.frame)
+
+    def row_terms(self, column, i):
+        values, offsets = self.ragged[column]
+        return self.vocab.terms[values[offsets[i]:offsets[i + 1]]].tolist()
+
+    def term_counts(self, column="lemmas", rows=None):
+        """
+        Term frequencies over a token column (optionally only `rows`).
+
+        Returns:
+            pd.Series: Count per term, most frequent first.
+        """
+        values, offsets = self.ragged[column]
+        if rows is not None:
+            rows = np.asarray(rows)
+            values = np.concatenate([values[offsets[r]:offsets[r + 1]] for r in rows]) if len(rows) else values[:0]
+        counts = np.bincount(values, minlength=len(self.vocab))
+        nonzero = np.flatnonzero(counts)
+        return pd.Series(counts[nonzero], index=self.vocab.terms[nonzero]).sort_values(ascending=False)
+
+    def to_arrow(self, column):
+        """The token column as a pyarrow ListArray of int32 ids (zero-copy; requires pyarrow)."""
+        import pyarrow as pa
+        values, offsets = self.ragged[column]
+        return pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), pa.array(values))
+
+    def to_frame(self):
+        """Rebuild the original analyzed DataFrame (object columns, per-row lists)."""
+        df = self.frame.copy()
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                dtype = self.dtypes.get(col, np.dtype(object))
+                if dtype == object:
+                    df[col] = df[col].astype(object).where(df[col].notna(), None)
+                else:
+                    df[col] = df[col].astype(dtype)
+        for col, (values, offsets) in self.ragged.items():
+            df[col] = decode_ragged(values, offsets, self.vocab)
+        if self.entities is not None:
+            grouped = [[] for _ in range(len(df))]
+            for row, text, label in zip(self.entities["row"].to_numpy(),
+                                        self.entities["entity"].astype(object),
+                                        self.entities["label"].astype(object)):
+                grouped[row].append((text, label))
+            df[ENTITIES_COLUMN] = grouped
+        return df[self.columns] if self.columns is not None else df
+
+    def nbytes(self):
+        """Total memory footprint in bytes."""
+        total = int(self.frame.memory_usage(index=True, deep=True).sum())
+        total += sum(values.nbytes + offsets.nbytes for values, offsets in self.ragged.values())
+        total += sum(sys.getsizeof(t) for t in self.vocab._terms) + sys.getsizeof(self.vocab._terms)
+        total += sys.getsizeof(self.vocab._ids)
+        if self.entities is not None:
+            total += int(self.entities.memory_usage(index=True, deep=True).sum())
+        return total
+
+def entities_long(df, column=ENTITIES_COLUMN):
+    """
+    Explode per-row (text, label) entity lists into a long table.
+
+    Returns:
+        pd.DataFrame: Columns 'row' (int32 position in df), 'entity' and 'label' (categoricals).
+    """
+    lists = [x if isinstance(x, (list, tuple)) else [] for x in df[column]]
+    lengths = np.fromiter((len(x) for x in lists), dtype=np.int64, count=len(lists))
+    pairs = list(chain.from_iterable(lists))
+    return pd.DataFrame({
+        "row": np.repeat(np.arange(len(lists), dtype=np.int32), lengths),
+        "entity": pd.Categorical([p[0] for p in pairs]),
+        "label": pd.Categorical([p[1] for p in pairs]),
+    })
+
+def compact_frame(df, vocab=None):
+    """
+    Convert an analyzed DataFrame to a CompactFrame.
+
+    Parameters:
+        df (pd.DataFrame): Frame with any of the categorical, token and entity columns.
+        vocab (Vocabulary or None): Vocabulary to extend (shared across frames).
+
+    Returns:
+        CompactFrame
+    """
+    vocab = vocab if vocab is not None else Vocabulary()
+    frame = df.drop(columns=[c for c in LIST_COLUMNS + [ENTITIES_COLUMN] if c in df.columns]).reset_index(drop=True)
+    dtypes = {}
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            dtypes[col] = frame[col].dtype
+            frame[col] = frame[col].astype("category")
+    ragged = {col: encode_ragged(df[col].tolist(), vocab) for col in LIST_COLUMNS if col in df.columns}
+    entities = entities_long(df) if ENTITIES_COLUMN in df.columns else None
+    return CompactFrame(frame, ragged, vocab, entities, columns=df.columns, dtypes=dtypes)
+
+def deep_memory_usage(df):
+    """
+    Bytes used by a DataFrame including the contents of list/tuple cells
+    (pandas' deep=True only counts the list objects themselves).
+    """
+    total = int(df.memory_usage(index=True, deep=True).sum())
+    seen = set()
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        for cell in df[col]:
+            if isinstance(cell, (list, tuple)):
+                stack = list(cell)
+                while stack:
+                    item = stack.pop()
+                    if id(item) in seen:
+                        continue
+                    seen.add(id(item))
+                    total += sys.getsizeof(item)
+                    if isinstance(item, (list, tuple)):
+                        stack.extend(item)
+    return total
@@ -1,6 +1,13 @@
+import threading
+from collections import deque
+from itertools import islice
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from config import CORRELATION_BUCKET, CORRELATION_WINDOW, CORRELATION_MAX_LAG, CORRELATION_HISTORY_DAYS
+from modules.article_store import load_articles
+from modules.trend_analysis import BUCKET_FREQS
 
 def compute_category_correlation(trends_df, date_column="published_at", category_column="category", metric_column="article_count"):
     """
@@ -22,6 +29,226 @@ def compute_category_correlation(trends_df, date_column="published_at", category
     corr_matrix = pivot_df.corr()
     return corr_matrix
 
+# -----------------------------
+# Streaming correlation
+# -----------------------------
+def _bucket_counts(df, step, date_column="published_at", category_column="category"):
+    """Yield (bucket start, {category: article count}) in time order."""
+    if df.empty:
+        return
+    dates = pd.to_datetime(df[date_column], errors="coerce", utc=True)
+    valid = dates.notna() & df[category_column].notna()
+    counts = pd.DataFrame({
+        "bucket": dates[valid].dt.floor(step), "category": df[category_column][valid]
+    }).groupby(["bucket", "category"]).size()
+    for when, per_category in counts.groupby(level="bucket"):
+        yield when, per_category.droplevel("bucket").to_dict()
+
+class StreamingCorrelation:
+    """
+    Incremental (lagged) correlation between per-category bucket series.
+
+    Each time bucket is a vector of per-category values. The engine keeps the
+    running sum, the sum of outer products and, for every lag L up to
+    `max_lag`, the sum of x_t x_{t-L}^T, so adding a bucket costs
+    O(max_lag x categories^2) whatever the history length. With a `window`,
+    the oldest bucket's contributions are subtracted as it slides out.
+
+    Gaps between buckets are filled with zero vectors; values for the latest
+    (still open) bucket may be updated in place. Articles older than the open
+    bucket are counted in `late` and otherwise ignored.
+    """
+
+    def __init__(self, bucket=CORRELATION_BUCKET, window=CORRELATION_WINDOW, max_lag=CORRELATION_MAX_LAG):
+        self.bucket = bucket
+        self.step = pd.Timedelta("1" + BUCKET_FREQS.get(bucket, bucket))
+        self.window = window
+        self.max_lag = max_lag
+        self.categories = []
+        self._index = {}
+        self.last_bucket = None
+        self.late = 0
+        self.n = 0
+        self._sum = np.zeros(0)
+        self._outer = np.zeros((0, 0))
+        self._cross = {lag: np.zeros((0, 0)) for lag in range(1, max_lag + 1)}
+        # Buckets still needed: the whole window, or (unbounded history) the
+        # first max_lag buckets plus the last max_lag + 1
+        self._buffer = deque()
+        self._head = []
+
+    # Category bookkeeping
+    def _vector(self, values):
+        new = [c for c in values if c not in self._index]
+        if new:
+            for c in new:
+                self._index[c] = len(self.categories)
+                self.categories.append(c)
+            self._grow(len(self.categories))
+        x = np.zeros(len(self.categories))
+        for c, v in values.items():
+            x[self._index[c]] = v
+        return x
+
+    def _grow(self, size):
+        pad = size - len(self._sum)
+        self._sum = np.pad(self._sum, (0, pad))
+        self._outer = np.pad(self._outer, ((0, pad), (0, pad)))
+        self._cross = {lag: np.pad(m, ((0, pad), (0, pad))) for lag, m in self._cross.items()}
+        self._buffer = deque(np.pad(x, (0, pad)) for x in self._buffer)
+        self._head = [np.pad(x, (0, pad)) for x in self._head]
+
+    # Running sums
+    def _push(self, x):
+        for lag in range(1, min(self.max_lag, len(self._buffer)) + 1):
+            self._cross[lag] += np.outer(x, self._buffer[-lag])
+        self._buffer.append(x)
+        self.n += 1
+        self._sum += x
+        self._outer += np.outer(x, x)
+        if self.window is None:
+            if len(self._head) < self.max_lag:
+                self._head.append(x)
+            while len(self._buffer) > self.max_lag + 1:
+                self._buffer.popleft()
+        elif self.n > self.window:
+            old = self._buffer.popleft()
+            self.n -= 1
+            self._sum -= old
+            self._outer -= np.outer(old, old)
+            for lag in range(1, min(self.max_lag, len(self._buffer)) + 1):
+                self._cross[lag] -= np.outer(self._buffer[lag - 1], old)
+
+    def _pop(self):
+        x = self._buffer.pop()
+        if self.window is None and self.n <= len(self._head):
+            self._head.pop()
+        self.n -= 1
+        self._sum -= x
+        self._outer -= np.outer(x, x)
+        for lag in range(1, min(self.max_lag, len(self._buffer)) + 1):
+            self._cross[lag] -= np.outer(x, self._buffer[-lag])
+        return x
+
+    # Updates
+    def set_bucket(self, when, values):
+        """
+        Set one bucket's per-category values ({category: value}).
+
+        `when` must not be older than the latest bucket; setting the latest
+        bucket again replaces its values.
+        """
+        when = pd.Timestamp(when).floor(self.step)
+        if self.last_bucket is not None and when < self.last_bucket:
+            raise ValueError(f"Bucket {when} is older than the latest bucket {self.last_bucket}")
+        x = self._vector(values)
+        if self.last_bucket is not None and when == self.last_bucket:
+            self._pop()
+        elif self.last_bucket is not None:
+            gap = int((when - self.last_bucket) / self.step) - 1
+            if self.window is not None:
+                gap = min(gap, self.window + self.max_lag)  # Older zeros would slide out anyway
+            for _ in range(gap):
+                self._push(np.zeros(len(self.categories)))
+        self._push(x)
+        self.last_bucket = when
+
+    def update(self, df, date_column="published_at", category_column="category"):
+        """Add articles (one count per article) to their category's bucket series."""
+        for when, values in _bucket_counts(df, self.step, date_column, category_column):
+            if self.last_bucket is not None and when < self.last_bucket:
+                self.late += int(sum(values.values()))
+                continue
+            if when == self.last_bucket:
+                current = self._buffer[-1]
+                for c in self.categories:
+                    values[c] = values.get(c, 0) + current[self._index[c]]
+            self.set_bucket(when, values)
+        return self
+
+    # Results
+    def _first(self, lag):
+        source = self._head if self.window is None else self._buffer
+        return list(islice(source, lag))
+
+    def correlation(self, lag=0):
+        """
+        Pearson correlation matrix over the window.
+
+        Entry [a, b] correlates category a at time t with category b at time
+        t - lag, so a high value at lag > 0 means b's news leads a's.
+        """
+        k = len(self.categories)
+        m = self.n - lag
+        if lag > self.max_lag or lag < 0:
+            raise ValueError(f"lag must be between 0 and max_lag ({self.max_lag})")
+        if m < 2:
+            return pd.DataFrame(np.full((k, k), np.nan), index=self.categories, columns=self.categories)
+
+        diag = np.diag(self._outer)
+        if lag == 0:
+            products, lead_sum, lag_sum, lead_sq, lag_sq = self._outer, self._sum, self._sum, diag, diag
+        else:
+            first = np.array(self._first(lag)).reshape(-1, k)
+            last = np.array(list(self._buffer)[-lag:]).reshape(-1, k)
+            products = self._cross[lag]
+            lead_sum, lead_sq = self._sum - first.sum(axis=0), diag - (first ** 2).sum(axis=0)
+            lag_sum, lag_sq = self._sum - last.sum(axis=0), diag - (last ** 2).sum(axis=0)
+
+        cov = m * products - np.outer(lead_sum, lag_sum)
+        lead_var = m * lead_sq - lead_sum ** 2
+        lag_var = m * lag_sq - lag_sum ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.sqrt(np.outer(lead_var, lag_var))
+        corr[~np.isfinite(corr)] = np.nan
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.categories, columns=self.categories)
+
+    def lead_lag(self, min_correlation=0.0):
+        """
+        Best positive lag for every ordered pair of categories.
+
+        Returns:
+            pd.DataFrame: 'leader', 'follower', 'lag' (buckets) and 'correlation',
+            strongest first.
+        """
+        rows = []
+        for lag in range(1, self.max_lag + 1):
+            corr = self.correlation(lag).to_numpy()
+            for follower, leader in zip(*np.nonzero(np.isfinite(corr))):
+                if follower != leader and corr[follower, leader] > min_correlation:
+                    rows.append((self.categories[leader], self.categories[follower], lag, corr[follower, leader]))
+        result = pd.DataFrame(rows, columns=["leader", "follower", "lag", "correlation"])
+        if result.empty:
+            return result
+        best = result.loc[result.groupby(["leader", "follower"])["correlation"].idxmax()]
+        return best.sort_values("correlation", ascending=False).reset_index(drop=True)
+
+_sector_state = None
+_sector_lock = threading.Lock()
+
+def sector_correlation(history_days=CORRELATION_HISTORY_DAYS, db_path=None):
+    """
+    Process-wide category correlation state, brought up to date from the article store.
+
+    The first call loads `history_days` of articles; later calls only read
+    articles from the open bucket onwards, which replace the open bucket's counts.
+    """
+    global _sector_state
+    with _sector_lock:
+        if _sector_state is None:
+            _sector_state = StreamingCorrelation()
+        state = _sector_state
+        start = state.last_bucket if state.last_bucket is not None else \
+            pd.Timestamp.now(tz="UTC").floor(state.step) - pd.Timedelta(days=history_days)
+        kwargs = {"db_path": db_path} if db_path else {}
+        for when, values in _bucket_counts(load_articles(start=start, **kwargs), state.step):
+            if state.last_bucket is None or when >= state.last_bucket:
+                state.set_bucket(when, values)
+        return state
+
+# -----------------------------
+# Plotting
+# -----------------------------
 def plot_correlation_heatmap(corr_matrix, title="Category Correlation Heatmap"):
     """
     Plot a heatmap of the correlation matrix.
@@ -29,9 +256,14 @@ def plot_correlation_heatmap(corr_matrix, title="Category Correlation Heatmap"):
     Parameters:
         corr_matrix (pd.DataFrame): Correlation matrix of categories.
         title (str): Plot title.
+
+    Returns:
+        matplotlib.figure.Figure: The heatmap figure (None if there is nothing to plot).
     """
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", fmt=".2f")
-    plt.title(title)
-    plt.tight_layout()
-    plt.show()
+    if corr_matrix is None or corr_matrix.empty:
+        return None
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(corr_matrix, annot=True, cmap="coolwarm", fmt=".2f", vmin=-1, vmax=1, ax=ax)
+    ax.set_title(title)
+    fig.tight_layout()
+    return fig
@@ -0,0 +1,251 @@
+import hashlib
+import re
+import zlib
+import numpy as np
+import pandas as pd
+from config import (
+    ARTICLE_STORE_DB, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD, DEDUP_MIN_TITLE_WORDS
+)
+from modules.article_store import connect
+from utils.cache import content_hash
+
+# Near-duplicate detection state lives next to the articles: MinHash signatures
+# with their cluster, the LSH band buckets (indexed, so candidate lookup is a
+# few index probes per article however large the store gets) and normalized
+# title keys for exact headline matches.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_signatures (
+    article_id TEXT PRIMARY KEY,
+    cluster_id TEXT NOT NULL,
+    signature  BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_signatures_cluster ON dedup_signatures (cluster_id);
+
+CREATE TABLE IF NOT EXISTS dedup_buckets (
+    band       INTEGER NOT NULL,
+    bucket     INTEGER NOT NULL,
+    article_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, article_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dedup_titles (
+    title_key  TEXT PRIMARY KEY,
+    cluster_id TEXT NOT NULL
+);
+"""
+
+# Universal hashing (a*x + b) mod p with fixed coefficients, so signatures
+# stored by earlier runs stay comparable
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)
+PERM_A = _rng.integers(1, _PRIME, DEDUP_NUM_PERM, dtype=np.int64)
+PERM_B = _rng.integers(0, _PRIME, DEDUP_NUM_PERM, dtype=np.int64)
+
+# Trailing " - Reuters" / " | BBC News" style source suffixes on syndicated headlines
+SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]{1,40}$")
+WORD = re.compile(r"\w+")
+
+# -----------------------------
+# Normalization and signatures
+# -----------------------------
+def normalize_title(title):
+    """Lowercased headline words without the source suffix ('' when too short to be distinctive)."""
+    if not isinstance(title, str):
+        return ""
+    words = WORD.findall(SOURCE_SUFFIX.sub("", title.strip()).lower())
+    return " ".join(words) if len(words) >= DEDUP_MIN_TITLE_WORDS else ""
+
+def shingle_hashes(text, size=DEDUP_SHINGLE_SIZE):
+    """CRC32 hashes of the distinct word `size`-grams of a text."""
+    words = WORD.findall(text.lower()) if isinstance(text, str) else []
+    if not words:
+        return np.array([], dtype=np.int64)
+    grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.int64, count=len(grams))
+
+def minhash_signature(hashes):
+    """MinHash signature (DEDUP_NUM_PERM values) of a shingle set, or None for an empty text."""
+    if len(hashes) == 0:
+        return None
+    x = hashes % _PRIME
+    return ((x[:, None] * PERM_A + PERM_B) % _PRIME).min(axis=0).astype(np.uint32)
+
+def band_keys(signature, bands=DEDUP_BANDS):
+    """One 64-bit bucket key per LSH band."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in signature.reshape(bands, -1)
+    ]
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(sig_a == sig_b))
+
+# -----------------------------
+# Clustering
+# -----------------------------
+def _select_in(conn, sql, values):
+    """Run `sql` (with one {} placeholder list) over values in chunks under SQLite's parameter limit."""
+    values = list(values)
+    rows = []
+    for i in range(0, len(values), 500):
+        chunk = values[i:i + 500]
+        rows.extend(conn.execute(sql.format(", ".join("?" * len(chunk))), chunk).fetchall())
+    return rows
+
+def assign_clusters(df, text_column="clean_text", title_column="title", db_path=ARTICLE_STORE_DB):
+    """
+    Group syndicated copies of the same story.
+
+    Articles join an existing cluster when they were seen before (same
+    article id, i.e. same normalized URL), when a MinHash-LSH candidate's
+    estimated Jaccard similarity reaches DEDUP_THRESHOLD, or when their
+    normalized headline matches exactly. Otherwise they start a cluster named
+    after themselves. Signatures and band buckets are persisted, so later
+    batches are matched against everything stored.
+
+    Parameters:
+        df (pd.DataFrame): Articles with 'article_id' and the text column.
+        text_column (str): Text to shingle (title + content).
+
+    Returns:
+        pd.DataFrame: df with 'cluster_id' and 'is_representative' columns
+        (see mark_representatives).
+    """
+    df = df.copy()
+    if df.empty:
+        df["cluster_id"] = pd.Series(dtype=object)
+        df["is_representative"] = pd.Series(dtype=bool)
+        return df
+
+    ids = df["article_id"].tolist()
+    texts = df[text_column].tolist() if text_column in df.columns else [""] * len(df)
+    titles = df[title_column].tolist() if title_column in df.columns else [""] * len(df)
+
+    conn = connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        known = dict(_select_in(
+            conn, "SELECT article_id, cluster_id FROM dedup_signatures WHERE article_id IN ({})", ids
+        ))
+
+        clusters = []
+        batch_signatures = {}   # article_id -> (signature, cluster_id) for this frame
+        batch_buckets = {}      # (band, bucket) -> [article_id] for this frame
+        batch_titles = {}       # title_key -> cluster_id for this frame
+        new_signatures, new_buckets, new_titles = [], [], []
+
+        for article_id, text, title in zip(ids, texts, titles):
+            if article_id in known:
+                clusters.append(known[article_id])
+                continue
+            if article_id in batch_signatures:
+                clusters.append(batch_signatures[article_id][1])
+                continue
+
+            signature = minhash_signature(shingle_hashes(text))
+            keys = band_keys(signature) if signature is not None else []
+            cluster_id = None
+
+            if keys:
+                # Candidates: stored and same-frame articles sharing at least one band bucket
+                stored = [r[0] for r in conn.execute(
+                    "SELECT DISTINCT article_id FROM dedup_buckets WHERE (band, bucket) IN (VALUES "
+                    + ", ".join("(?, ?)" for _ in keys) + ")",
+                    [v for band, key in enumerate(keys) for v in (band, key)]
+                )]
+                in_batch = {a for band, key in enumerate(keys) for a in batch_buckets.get((band, key), [])}
+                best = 0.0
+                for cand_id, cand_cluster, cand_sig in _select_in(
+                    conn, "SELECT article_id, cluster_id, signature FROM dedup_signatures WHERE article_id IN ({})",
+                    stored
+                ):
+                    if cand_sig is not None:
+                        score = similarity(signature, np.frombuffer(cand_sig, dtype=np.uint32))
+                        if score >= DEDUP_THRESHOLD and score > best:
+                            best, cluster_id = score, cand_cluster
+                for cand_id in in_batch:
+                    score = similarity(signature, batch_signatures[cand_id][0])
+                    if score >= DEDUP_THRESHOLD and score > best:
+                        best, cluster_id = score, batch_signatures[cand_id][1]
+
+            title_key = normalize_title(title)
+            if cluster_id is None and title_key:
+                cluster_id = batch_titles.get(title_key)
+                if cluster_id is None:
+                    row = conn.execute(
+                        "SELECT cluster_id FROM dedup_titles WHERE title_key = ?", (content_hash(title_key),)
+                    ).fetchone()
+                    cluster_id = row[0] if row else None
+            cluster_id = cluster_id or article_id
+
+            clusters.append(cluster_id)
+            batch_signatures[article_id] = (signature, cluster_id)
+            new_signatures.append((article_id, cluster_id, signature.tobytes() if signature is not None else None))
+            for band, key in enumerate(keys):
+                batch_buckets.setdefault((band, key), []).append(article_id)
+                new_buckets.append((band, key, article_id))
+            if title_key and title_key not in batch_titles:
+                batch_titles[title_key] = cluster_id
+                new_titles.append((content_hash(title_key), cluster_id))
+
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO dedup_signatures VALUES (?, ?, ?)", new_signatures)
+            conn.executemany("INSERT OR IGNORE INTO dedup_buckets VALUES (?, ?, ?)", new_buckets)
+            conn.executemany("INSERT OR IGNORE INTO dedup_titles VALUES (?, ?)", new_titles)
+    finally:
+        conn.close()
+
+    df["cluster_id"] = clusters
+    return mark_representatives(df)
+
+def mark_representatives(df):
+    """
+    Set 'is_representative' on the article that started each cluster (a
+    cluster is named after its first article), so a syndicated copy arriving
+    in a later batch than its original is not counted, indexed or stored as
+    a trend again. Use cluster_heads() for one article per cluster within a
+    frame instead.
+    """
+    df["is_representative"] = (df["article_id"] == df["cluster_id"]) & ~df["article_id"].duplicated()
+    return df
+
+def propagate_to_duplicates(df, analyzed, columns):
+    """
+    Copy analysis results from each cluster's representative to all its articles.
+
+    Parameters:
+        df (pd.DataFrame): All articles, with 'cluster_id'.
+        analyzed (pd.DataFrame): The analyzed representatives (one row per cluster).
+        columns (list): Result columns to copy.
+
+    Returns:
+        pd.DataFrame: df with the result columns filled for every article.
+    """
+    by_cluster = analyzed.drop_duplicates("cluster_id").set_index("cluster_id")
+    positions = by_cluster.index.get_indexer(df["cluster_id"])
+    for col in columns:
+        if col in by_cluster.columns:
+            values = by_cluster[col].to_numpy()
+            df[col] = [values[p] if p >= 0 else None for p in positions]
+    return df
+
+def representatives(df):
+    """
+    Articles that represent their cluster across batches (all articles when
+    the frame was not clustered): the ones to count in stored trends and to
+    index, once per story however many copies arrive later.
+    """
+    if "is_representative" not in df.columns:
+        return df
+    return df[df["is_representative"].astype(bool)].reset_index(drop=True)
+
+def cluster_heads(df):
+    """
+    The first article of each duplicate cluster within this frame (all
+    articles when not clustered): the ones to analyze, and to count in
+    statistics over the frame alone.
+    """
+    if "cluster_id" not in df.columns:
+        return df
+    return df[~df["cluster_id"].duplicated()].reset_index(drop=True)
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBEDDING_STORE_DIR, EMBEDDING_STORE_CAPACITY,
+    EMBEDDING_STORE_DTYPE, EMBEDDING_BATCH_SIZE, EMBEDDING_STORE_MAX_AGE
+)
+from modules.model_registry import get_model
+from utils.cache import content_hash
+from utils.metrics import track
+
+class EmbeddingStore:
+    """
+    Persistent sentence-embedding cache.
+
+    Vectors live in a fixed-capacity memory-mapped NumPy matrix (so only the
+    pages actually touched are resident); a SQLite index maps content hash ->
+    matrix row and records when each row was last used. When the matrix is
+    full, the least recently used rows are evicted and reused.
+
+    The files may be shared by several processes (the dashboard and a
+    `newspulse schedule` process): rows are allocated inside a SQLite write
+    transaction, so two processes never hand out the same row.
+    """
+
+    def __init__(self, path=EMBEDDING_STORE_DIR, capacity=EMBEDDING_STORE_CAPACITY,
+                 dtype=EMBEDDING_STORE_DTYPE):
+        self.path = path
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._matrix = None
+        os.makedirs(path, exist_ok=True)
+        self._matrix_path = os.path.join(path, "vectors.npy")
+        # isolation_level=None: write transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(os.path.join(path, "index.db"), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._enable_wal()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL, last_used REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_rows_last_used ON rows (last_used);
+            CREATE TABLE IF NOT EXISTS free_rows (row INTEGER PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._import_legacy_meta()
+
+    # -----------------------------
+    # Storage
+    # -----------------------------
+    def _enable_wal(self, timeout=30):
+        # Switching a new database to WAL skips the busy timeout, so processes
+        # opening the store at the same time retry instead of failing
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+
+    def _import_legacy_meta(self):
+        # Stores created before the allocator moved into SQLite kept it in meta.json
+        legacy = os.path.join(self.path, "meta.json")
+        try:
+            with open(legacy, encoding="utf-8") as f:
+                next_row = json.load(f).get("next_row", 0)
+        except FileNotFoundError:
+            return
+        with self._transaction():
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('next_row', ?)", (next_row,))
+        try:
+            os.remove(legacy)
+        except FileNotFoundError:
+            pass  # Another process imported it first
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that also serializes other processes sharing the store."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _open_matrix(self, dim=None):
+        """The memory-mapped matrix (created with `dim` columns, inside a write transaction, if missing)."""
+        if self._matrix is None:
+            if os.path.exists(self._matrix_path):
+                self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+            elif dim is not None:
+                self._matrix = np.lib.format.open_memmap(
+                    self._matrix_path, mode="w+", dtype=self.dtype, shape=(self.capacity, int(dim))
+                )
+        return self._matrix
+
+    def _allocate_rows(self, n):
+        """Return n free matrix rows, evicting least recently used entries if needed (inside a transaction)."""
+        rows = [r for (r,) in self._conn.execute("SELECT row FROM free_rows LIMIT ?", (n,))]
+        self._conn.executemany("DELETE FROM free_rows WHERE row = ?", [(r,) for r in rows])
+
+        next_row = self._conn.execute("SELECT value FROM meta WHERE key = 'next_row'").fetchone()
+        next_row = next_row[0] if next_row else 0
+        fresh = min(n - len(rows), self.capacity - next_row)
+        rows.extend(range(next_row, next_row + fresh))
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_row', ?)", (next_row + fresh,))
+
+        if len(rows) < n:
+            victims = self._conn.execute(
+                "SELECT key, row FROM rows ORDER BY last_used LIMIT ?", (n - len(rows),)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM rows WHERE key = ?", [(k,) for k, _ in victims])
+            rows.extend(r for _, r in victims)
+        return rows
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def _find_rows(self, keys):
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            found.update(self._conn.execute(
+                f"SELECT key, row FROM rows WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        return found
+
+    def lookup(self, keys):
+        """Return {key: row} for the keys present, marking them as recently used."""
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            found = self._find_rows(keys)
+            if found:
+                now = time.time()
+                with self._transaction():
+                    self._conn.executemany(
+                        "UPDATE rows SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                    )
+        return found
+
+    def put(self, keys, vectors):
+        """
+        Store vectors (n x dim) under keys; returns {key: row}.
+
+        Keys already stored (e.g. by another process since they were looked
+        up) keep their row, so no allocated row is ever left unreferenced.
+        """
+        vectors = np.asarray(vectors)
+        if len(keys) > self.capacity:
+            # Only the most recent `capacity` vectors can be kept
+            keys, vectors = keys[-self.capacity:], vectors[-self.capacity:]
+        with self._lock:
+            with self._transaction():
+                stored = self._find_rows(list(dict.fromkeys(keys)))
+                # Last vector per key not stored yet
+                new = {key: i for i, key in enumerate(keys) if key not in stored}
+                if new:
+                    matrix = self._open_matrix(vectors.shape[1])
+                    rows = self._allocate_rows(len(new))
+                    matrix[rows] = vectors[list(new.values())].astype(self.dtype)
+                    matrix.flush()
+                    stored.update(zip(new, rows))
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT INTO rows (key, row, last_used) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET last_used = excluded.last_used",
+                    [(k, r, now) for k, r in stored.items()]
+                )
+        return stored
+
+    def vectors(self, rows):
+        """Read rows from the matrix as float32."""
+        with self._lock:
+            return np.asarray(self._open_matrix()[rows], dtype=np.float32)
+
+    def get_embeddings(self, texts, encoder, model_id, batch_size=EMBEDDING_BATCH_SIZE, persist=True):
+        """
+        Embeddings for texts, encoding only those not already stored.
+
+        Parameters:
+            texts (list): Input texts.
+            encoder: Object with a SentenceTransformer-style .encode().
+            model_id (str): Identifies the encoder; part of the content key.
+            batch_size (int): Encoding batch size for unseen texts.
+            persist (bool): Store newly encoded texts (off for one-off texts such as chat questions).
+
+        Returns:
+            np.ndarray: float32 matrix (len(texts) x dim), in input order.
+        """
+        with track("embedding", items=len(texts)) as run:
+            keys = [content_hash(model_id, text) for text in texts]
+            rows = self.lookup(keys)
+            missing = {key: text for key, text in zip(keys, texts) if key not in rows}
+            hits = len(keys) - sum(1 for key in keys if key in missing)
+            self.hits += hits
+            self.misses += len(missing)
+            run.cache(hits, len(missing))
+
+            if not keys:
+                matrix = self._open_matrix()
+                return np.zeros((0, matrix.shape[1] if matrix is not None else 0), dtype=np.float32)
+
+            # Read stored vectors before writing, since new rows may evict old ones
+            found = list(rows)
+            vectors = dict(zip(found, self.vectors([rows[k] for k in found]))) if found else {}
+
+            if missing:
+                encoded = np.asarray(encoder.encode(list(missing.values()), batch_size=batch_size), dtype=np.float32)
+                if persist:
+                    self.put(list(missing), encoded)
+                vectors.update(zip(missing, encoded))
+
+            return np.stack([vectors[k] for k in keys])
+
+    def evict_older_than(self, max_age_seconds):
+        """Drop entries not used for max_age_seconds; their rows are reused. Returns count."""
+        cutoff = time.time() - max_age_seconds
+        with self._lock:
+            with self._transaction():
+                rows = self._conn.execute("SELECT row FROM rows WHERE last_used < ?", (cutoff,)).fetchall()
+                self._conn.execute("DELETE FROM rows WHERE last_used < ?", (cutoff,))
+                self._conn.executemany("INSERT OR IGNORE INTO free_rows (row) VALUES (?)", rows)
+        return len(rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+            "capacity": self.capacity,
+        }
+
+# -----------------------------
+# Shared store for the configured encoder
+# -----------------------------
+EMBEDDING_MODEL_ID = f"{EMBEDDING_MODEL}@{EMBEDDING_BACKEND}"
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_embedding_store():
+    """Return the process-wide embedding store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EmbeddingStore()
+    return _store
+
+def embed_texts(texts, persist=True):
+    """Embed texts with the configured encoder, reusing stored embeddings (and storing new ones if `persist`)."""
+    return get_embedding_store().get_embeddings(
+        list(texts), get_model("embedding"), EMBEDDING_MODEL_ID, persist=persist
+    )
+
+def evict_stale_embeddings(max_age_seconds=EMBEDDING_STORE_MAX_AGE):
+    """Drop stored embeddings unused for `max_age_seconds`; returns the number dropped."""
+    return get_embedding_store().evict_older_than(max_age_seconds)
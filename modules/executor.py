@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import STAGE_WORKERS, WORKER_TORCH_THREADS
+
+# Per-article stages that can be sharded: the columns each one reads, the
+# columns it adds, and the registry models a worker should load up front
+SHARDABLE_STAGES = {
+    "preprocess": {"inputs": ["clean_text", "language"], "outputs": ["cleaned_text", "tokens", "lemmas"],
+                   "models": ["nltk_data", "stopwords", "spacy_en"]},
+    "sentiment": {"inputs": ["clean_text"], "outputs": ["sentiment", "score"], "models": ["sentiment"]},
+    "ner": {"inputs": ["clean_text"], "outputs": ["entities"], "models": ["spacy_ner"]},
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def _init_worker(models):
+    """Runs once per worker process: limit intra-op threads and load the stage's models."""
+    try:
+        import torch
+        torch.set_num_threads(WORKER_TORCH_THREADS)
+    except ImportError:
+        pass
+    from modules.model_registry import warm_up
+    warm_up(models, background=False)
+
+def _run_shard(stage, shard):
+    """Apply one stage to a shard; returns only article_id plus the stage's output columns."""
+    if stage == "preprocess":
+        from modules.preprocessing import preprocess_news
+        result = preprocess_news(shard, text_column="clean_text", n_process=1)
+    elif stage == "sentiment":
+        from modules.sentiment_analysis import analyze_sentiment
+        result = analyze_sentiment(shard, text_column="clean_text")
+    elif stage == "ner":
+        from modules.ner_analysis import extract_entities
+        result = extract_entities(shard, text_column="clean_text", n_process=1)
+    else:
+        raise ValueError(f"Stage '{stage}' cannot be sharded")
+    return result[["article_id"] + SHARDABLE_STAGES[stage]["outputs"]]
+
+# -----------------------------
+# Driver side
+# -----------------------------
+def get_pool(stage, workers):
+    """Return the long-lived process pool for a stage (models stay loaded between calls)."""
+    with _pools_lock:
+        pool, size = _pools.get(stage, (None, 0))
+        if pool is None or size != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(SHARDABLE_STAGES[stage]["models"],)
+            )
+            _pools[stage] = (pool, workers)
+        return pool
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool, _ in _pools.values():
+            pool.shutdown(wait=True)
+        _pools.clear()
+
+def run_stages_parallel(df, stages=("preprocess", "sentiment", "ner"), workers=None):
+    """
+    Run independent per-article stages concurrently, each sharded across its own process pool.
+
+    Only 'article_id' plus each stage's input columns are sent to the workers;
+    outputs are merged back by article id as new columns (the frame itself is
+    not copied).
+
+    Parameters:
+        df (pd.DataFrame): Articles with 'article_id', 'clean_text' and 'language'.
+        stages (tuple): Stage names from SHARDABLE_STAGES.
+        workers (dict or None): Worker processes per stage (default config.STAGE_WORKERS);
+            0 or 1 runs the stage in this process.
+
+    Returns:
+        pd.DataFrame: The same frame with the stages' output columns added.
+    """
+    workers = dict(STAGE_WORKERS, **(workers or {}))
+    if df.empty:
+        return df
+    if "language" not in df.columns:
+        df["language"] = "en"
+
+    pending, inline = {}, []
+    for stage in stages:
+        n = max(1, int(workers.get(stage, 1)))
+        if n == 1:
+            inline.append(stage)
+            continue
+        pool = get_pool(stage, n)
+        subset = df[["article_id"] + SHARDABLE_STAGES[stage]["inputs"]]
+        # A few shards per worker keeps workers busy when shard costs differ
+        shards = np.array_split(np.arange(len(df)), min(len(df), n * 2))
+        pending[stage] = [pool.submit(_run_shard, stage, subset.iloc[idx]) for idx in shards if len(idx)]
+
+    # Single-worker stages run here while the pools are busy
+    for stage in inline:
+        pending[stage] = [_run_shard(stage, df[["article_id"] + SHARDABLE_STAGES[stage]["inputs"]])]
+
+    for stage, parts in pending.items():
+        results = pd.concat([p if isinstance(p, pd.DataFrame) else p.result() for p in parts], ignore_index=True)
+        results = results.drop_duplicates("article_id").set_index("article_id").reindex(df["article_id"])
+        for col in SHARDABLE_STAGES[stage]["outputs"]:
+            df[col] = results[col].to_numpy()
+    return df
+
+def default_worker_count():
+    """CPU cores available to this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
@@ -0,0 +1,153 @@
+import time
+from functools import lru_cache
+import numpy as np
+from config import SENTIMENT_MODEL, EMBEDDING_MODEL, SENTIMENT_MAX_LENGTH
+
+# Backends selectable via config.SENTIMENT_BACKEND / config.EMBEDDING_BACKEND:
+# - "pytorch":      full-precision PyTorch reference
+# - "pytorch-int8": PyTorch with nn.Linear layers dynamically quantized to int8
+# - "onnx":         ONNX Runtime (CPUExecutionProvider)
+BACKENDS = ["pytorch", "pytorch-int8", "onnx"]
+REFERENCE_BACKEND = "pytorch"
+
+def _check_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}'. Choose from {BACKENDS}.")
+
+def _quantize(model):
+    """Dynamically quantize all Linear layers to int8 (CPU inference only)."""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+# -----------------------------
+# Sentiment (sequence classification)
+# -----------------------------
+@lru_cache(maxsize=None)
+def load_sentiment_backend(name, model_name=SENTIMENT_MODEL):
+    """
+    Build a sentiment pipeline for the given backend.
+    Every backend is a transformers pipeline, so callers get identical
+    [{"label": ..., "score": ...}] outputs.
+    """
+    _check_backend(name)
+    from transformers import pipeline, AutoTokenizer
+
+    if name == "pytorch":
+        return pipeline("sentiment-analysis", model=model_name)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if name == "pytorch-int8":
+        from transformers import AutoModelForSequenceClassification
+        model = _quantize(AutoModelForSequenceClassification.from_pretrained(model_name).eval())
+    else:
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend requires: pip install optimum[onnxruntime]") from e
+        model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+# -----------------------------
+# Sentence embeddings
+# -----------------------------
+@lru_cache(maxsize=None)
+def load_embedding_backend(name, model_name=EMBEDDING_MODEL):
+    """
+    Build a SentenceTransformer for the given backend.
+    All backends expose the same .encode() used by BERTopic.
+    """
+    _check_backend(name)
+    from sentence_transformers import SentenceTransformer
+
+    if name == "onnx":
+        try:
+            return SentenceTransformer(model_name, backend="onnx", device="cpu")
+        except (ImportError, TypeError) as e:
+            raise ImportError(
+                "The 'onnx' backend requires sentence-transformers>=3.2 and optimum[onnxruntime]"
+            ) from e
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if name == "pytorch-int8":
+        model = _quantize(model)
+    return model
+
+# -----------------------------
+# Parity check & throughput benchmark
+# -----------------------------
+def _run_sentiment(backend, texts, batch_size):
+    return backend(texts, batch_size=batch_size, truncation=True, max_length=SENTIMENT_MAX_LENGTH)
+
+def check_sentiment_parity(texts, backend, reference=REFERENCE_BACKEND, batch_size=16):
+    """
+    Compare a backend's sentiment outputs with the reference backend.
+
+    Returns:
+        dict: label agreement rate and mean/max absolute score difference.
+    """
+    ref = _run_sentiment(load_sentiment_backend(reference), texts, batch_size)
+    out = _run_sentiment(load_sentiment_backend(backend), texts, batch_size)
+    agree = np.array([r["label"] == o["label"] for r, o in zip(ref, out)])
+    diff = np.abs(np.array([r["score"] for r in ref]) - np.array([o["score"] for o in out]))
+    return {
+        "backend": backend,
+        "reference": reference,
+        "n_texts": len(texts),
+        "label_agreement": float(agree.mean()) if len(agree) else 1.0,
+        "mean_score_diff": float(diff.mean()) if len(diff) else 0.0,
+        "max_score_diff": float(diff.max()) if len(diff) else 0.0,
+    }
+
+def check_embedding_parity(texts, backend, reference=REFERENCE_BACKEND, batch_size=32):
+    """
+    Compare a backend's embeddings with the reference backend.
+
+    Returns:
+        dict: mean/min cosine similarity between paired embeddings.
+    """
+    ref = load_embedding_backend(reference).encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    out = load_embedding_backend(backend).encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    cos = np.sum(np.asarray(ref) * np.asarray(out), axis=1)
+    return {
+        "backend": backend,
+        "reference": reference,
+        "n_texts": len(texts),
+        "mean_cosine": float(cos.mean()) if len(cos) else 1.0,
+        "min_cosine": float(cos.min()) if len(cos) else 1.0,
+    }
+
+def benchmark_throughput(task, backend, texts, batch_size=32, repeats=3):
+    """
+    Measure steady-state throughput (texts/sec) of a backend.
+
+    Parameters:
+        task (str): "sentiment" or "embedding".
+        backend (str): Backend name.
+        texts (list): Input texts.
+        batch_size (int): Inference batch size.
+        repeats (int): Timed runs after one warm-up run; the best is reported.
+    """
+    if task == "sentiment":
+        model = load_sentiment_backend(backend)
+        run = lambda: _run_sentiment(model, texts, batch_size)
+    elif task == "embedding":
+        model = load_embedding_backend(backend)
+        run = lambda: model.encode(texts, batch_size=batch_size)
+    else:
+        raise ValueError("task must be 'sentiment' or 'embedding'")
+
+    run()  # Warm-up (graph building, allocator, lazy init)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "task": task,
+        "backend": backend,
+        "n_texts": len(texts),
+        "batch_size": batch_size,
+        "best_seconds": best,
+        "texts_per_sec": len(texts) / best if best > 0 else float("inf"),
+    }
@@ -0,0 +1,130 @@
+import threading
+from config import SENTIMENT_BACKEND, EMBEDDING_BACKEND, GEMINI_API_KEY
+
+# Process-wide model registry.
+#
+# Models are loaded on first use, exactly once, behind a per-model lock. The
+# registry lives in this module's globals, so under Streamlit it survives
+# reruns and is shared by every session of the server process (same effect as
+# st.cache_resource, without importing Streamlit into the pipeline modules).
+
+_loaders = {}
+_models = {}
+_locks = {}
+_registry_lock = threading.Lock()
+_warm_up_thread = None
+
+def register_model(name, loader):
+    """Register a zero-argument loader under `name` (replaces any previous loader)."""
+    with _registry_lock:
+        _loaders[name] = loader
+        _locks.setdefault(name, threading.Lock())
+        _models.pop(name, None)
+
+def get_model(name):
+    """Return the model registered under `name`, loading it on first use."""
+    if name in _models:
+        return _models[name]
+    with _registry_lock:
+        if name not in _loaders:
+            raise KeyError(f"No model registered under '{name}'")
+        lock = _locks[name]
+    with lock:
+        # Another thread may have finished loading while we waited
+        if name not in _models:
+            _models[name] = _loaders[name]()
+    return _models[name]
+
+def is_loaded(name):
+    return name in _models
+
+def registered_models():
+    with _registry_lock:
+        return list(_loaders)
+
+def warm_up(names=None, background=True):
+    """
+    Load models ahead of first use.
+
+    Parameters:
+        names (list or None): Models to load (None = all registered).
+        background (bool): Load in a daemon thread and return immediately.
+
+    Returns:
+        threading.Thread or None: The warm-up thread (only one is ever started).
+    """
+    global _warm_up_thread
+    names = registered_models() if names is None else list(names)
+
+    def _load_all():
+        for name in names:
+            try:
+                get_model(name)
+            except Exception:
+                pass  # Failures surface again (with context) on first real use
+
+    if not background:
+        _load_all()
+        return None
+    with _registry_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_load_all, name="model-warm-up", daemon=True)
+            _warm_up_thread.start()
+        return _warm_up_thread
+
+# -----------------------------
+# Default loaders (heavy imports happen inside, never at import time)
+# -----------------------------
+def _load_nltk_data():
+    import nltk
+    # Download only what is missing, and only when first needed
+    # (punkt_tab is the tokenizer table newer NLTK releases load for word_tokenize)
+    for resource, package in (("corpora/stopwords", "stopwords"), ("tokenizers/punkt", "punkt"),
+                              ("tokenizers/punkt_tab", "punkt_tab")):
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(package, quiet=True)
+    return True
+
+def _load_stopwords():
+    get_model("nltk_data")
+    from nltk.corpus import stopwords
+    return {
+        "en": set(stopwords.words("english")),
+        "hi": set(stopwords.words("hindi")) if "hindi" in stopwords.fileids() else set(),
+        # Add more languages if needed with appropriate stopwords
+    }
+
+def _load_spacy_en():
+    import spacy
+    # Parser and NER are never used for preprocessing; the lemmatizer only
+    # needs tok2vec + tagger + attribute_ruler
+    return spacy.load("en_core_web_sm", exclude=["parser", "ner"])
+
+def _load_spacy_ner():
+    import spacy
+    # Multilingual spaCy NER model (supports 50+ languages)
+    return spacy.load("xx_ent_wiki_sm")
+
+def _load_sentiment():
+    from modules.inference_backends import load_sentiment_backend
+    return load_sentiment_backend(SENTIMENT_BACKEND)
+
+def _load_embedding():
+    from modules.inference_backends import load_embedding_backend
+    return load_embedding_backend(EMBEDDING_BACKEND)
+
+def _load_gemini_client():
+    if not GEMINI_API_KEY:
+        return None
+    from google.generativeai import Client as GeminiClient
+    return GeminiClient(api_key=GEMINI_API_KEY)
+
+register_model("nltk_data", _load_nltk_data)
+register_model("stopwords", _load_stopwords)
+register_model("spacy_en", _load_spacy_en)
+register_model("spacy_ner", _load_spacy_ner)
+register_model("sentiment", _load_sentiment)
+register_model("embedding", _load_embedding)
+register_model("gemini_client", _load_gemini_client)
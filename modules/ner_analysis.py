@@ -1,27 +1,96 @@
+from importlib.metadata import version, PackageNotFoundError
 import pandas as pd
-import spacy
+from config import NER_BATCH_SIZE, NER_N_PROCESS, NER_CACHE_DB, NER_CACHE_MAX_ENTRIES
+from modules.article_store import normalize_entity
+from modules.model_registry import get_model
+from utils.cache import DiskCache, content_hash
+from utils.metrics import track
 
-# Load multilingual spaCy NER model (supports 50+ languages)
-nlp = spacy.load("xx_ent_wiki_sm")  
+# The multilingual spaCy NER model (xx_ent_wiki_sm) is loaded lazily through
+# the model registry as "spacy_ner"; its id comes from package metadata so
+# fully cached batches never load the model
+try:
+    NER_MODEL_ID = f"xx_ent_wiki_sm@{version('xx_ent_wiki_sm')}"
+except PackageNotFoundError:
+    NER_MODEL_ID = "xx_ent_wiki_sm"
 
-def extract_entities(df, text_column="cleaned_text"):
+# Persistent cache so previously processed texts are never re-parsed
+ner_cache = DiskCache(NER_CACHE_DB, max_entries=NER_CACHE_MAX_ENTRIES)
+cache_stats = {"hits": 0, "misses": 0}
+
+def extract_entities(df, text_column="cleaned_text", batch_size=NER_BATCH_SIZE, n_process=NER_N_PROCESS):
     """
     Extract named entities from news articles (multi-language).
     
     Parameters:
         df (pd.DataFrame): DataFrame containing news articles.
         text_column (str): Column name containing preprocessed text.
+        batch_size (int): Documents per nlp.pipe batch.
+        n_process (int): Worker processes for nlp.pipe.
     
     Returns:
         pd.DataFrame: Original DataFrame with additional 'entities' column.
     """
     df = df.copy()
     
-    entities_list = []
-    for doc in nlp.pipe(df[text_column].tolist(), disable=["tagger", "parser", "lemmatizer"]):
-        # Extract entities as (text, label)
-        entities = [(ent.text, ent.label_) for ent in doc.ents]
-        entities_list.append(entities)
+    texts = df[text_column].fillna("").tolist()
+    with track("ner", items=len(texts)) as run:
+        keys = [content_hash(NER_MODEL_ID, text) for text in texts]
+        cached = ner_cache.get_many(keys)
+        
+        # Only unseen (and de-duplicated) texts go through spaCy
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        hits = len(keys) - sum(1 for key in keys if key in missing)
+        cache_stats["hits"] += hits
+        cache_stats["misses"] += len(missing)
+        run.cache(hits, len(missing))
+        
+        if missing:
+            parsed = {}
+            docs = get_model("spacy_ner").pipe(list(missing.values()), batch_size=batch_size, n_process=n_process,
+                            disable=["tagger", "parser", "lemmatizer"])
+            for key, doc in zip(missing, docs):
+                # Extract entities as (text, label)
+                parsed[key] = [(ent.text, ent.label_) for ent in doc.ents]
+            ner_cache.set_many(parsed)
+            cached.update(parsed)
     
-    df["entities"] = entities_list
+    df["entities"] = [cached[key] for key in keys]
     return df
+
+def build_entity_index(df, id_column="article_id", entities_column="entities", date_column="published_at"):
+    """
+    Build a normalized entity -> article inverted index from extracted entities.
+    
+    Parameters:
+        df (pd.DataFrame): DataFrame with an 'entities' column of (text, label) lists.
+        id_column (str): Column identifying each article (row index if missing).
+        entities_column (str): Column with extracted entities.
+        date_column (str): Publication date carried into the index (optional).
+    
+    Returns:
+        pd.DataFrame: One row per (entity, label, article_id) with a mention 'count'.
+    """
+    columns = ["entity", "label", "article_id", "count"]
+    ids = df[id_column].tolist() if id_column in df.columns else df.index.tolist()
+    dates = df[date_column].tolist() if date_column in df.columns else [None] * len(df)
+    
+    counts, surface, published = {}, {}, {}
+    for article_id, entities, date in zip(ids, df[entities_column], dates):
+        for text, label in entities or []:
+            key = (normalize_entity(text), label, article_id)
+            counts[key] = counts.get(key, 0) + 1
+            surface.setdefault(key, text.strip())
+            published[key] = date
+    
+    if not counts:
+        return pd.DataFrame(columns=columns + [date_column])
+    
+    index_df = pd.DataFrame({
+        "entity": [surface[key] for key in counts],
+        "label": [key[1] for key in counts],
+        "article_id": [key[2] for key in counts],
+        "count": list(counts.values()),
+        date_column: [published[key] for key in counts],
+    })
+    return index_df
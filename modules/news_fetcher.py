@@ -1,6 +1,22 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import pandas as pd
-from config import NEWS_API_KEY, NEWSDATAIO_API_KEY, NEWS_CACHE_FILE, DEFAULT_NEWS_LANGUAGE
+from requests.adapters import HTTPAdapter
+from config import (
+    NEWS_API_KEY, NEWSDATAIO_API_KEY, DEFAULT_NEWS_LANGUAGE,
+    NEWSAPI_BASE_URL, NEWSDATA_BASE_URL, HTTP_TIMEOUT, HTTP_MAX_CONCURRENCY,
+    HTTP_POOL_SIZE, NEWSDATA_RESULTS_PER_PAGE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_STALE_TTL,
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_DB, PROVIDER_QUOTAS, RATE_LIMIT_DB, HTTP_QUOTA_WAIT,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+)
+from modules.article_store import assign_article_ids, upsert_articles
+from utils.cache import DiskCache, content_hash
+from utils.metrics import track, record_cache
+from utils.rate_limit import TokenBucket, backoff_delay
 
 # -----------------------------
 # Column normalization helpers
@@ -35,51 +51,331 @@ def normalize_newsdataio_columns(df):
         "creator": "author",
         "language": "language"
     })
+    if "author" in df.columns:
+        # NewsData.io sends creators as a list
+        df["author"] = df["author"].apply(lambda x: ", ".join(map(str, x)) if isinstance(x, list) else x)
     if "language" not in df.columns:
         df["language"] = "en"  # Default English
     return df
 
 # -----------------------------
-# Fetching functions
+# Shared HTTP layer
+# -----------------------------
+_session = None
+_executor = None
+_http_lock = threading.Lock()
+
+def get_session():
+    """Return the process-wide pooled HTTP session."""
+    global _session
+    with _http_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+def _get_executor():
+    """Return the shared thread pool that bounds in-flight requests."""
+    global _executor
+    with _http_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HTTP_MAX_CONCURRENCY, thread_name_prefix="news-fetch")
+    return _executor
+
+def _request_json(url, params, headers=None, timeout=HTTP_TIMEOUT):
+    """
+    GET a URL and decode JSON.
+    Returns (status_code, payload, response_headers); network or decode errors yield (None, {}, {}).
+    """
+    try:
+        response = get_session().get(url, params=params, headers=headers, timeout=timeout)
+        payload = response.json() if response.status_code != 304 else {}
+        return response.status_code, payload, response.headers
+    except (requests.RequestException, ValueError):
+        return None, {}, {}
+
+# -----------------------------
+# Provider quotas and retries
+# -----------------------------
+_buckets = {}
+
+def get_quota(provider):
+    """Return the process-wide token bucket for a provider (state shared across processes)."""
+    with _http_lock:
+        if provider not in _buckets:
+            quota = PROVIDER_QUOTAS[provider]
+            _buckets[provider] = TokenBucket(provider, quota["capacity"], quota["per_day"] / 86400,
+                                             db_path=RATE_LIMIT_DB)
+    return _buckets[provider]
+
+def _is_retryable(status):
+    return status is None or status >= 500
+
+def _provider_request(provider, url, params, headers=None, quota_wait=HTTP_QUOTA_WAIT):
+    """
+    _request_json under the provider's quota, retrying 5xx/network errors
+    with exponential backoff (or the provider's Retry-After).
+
+    A request that cannot get a quota token within `quota_wait` seconds is
+    not sent and reported as (429, {}, {}). A 429 from the provider is
+    returned at once, without retrying: it means the provider's quota is
+    spent, so the local bucket is drained to stop every caller (and process)
+    from spending requests until it refills.
+    """
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        if not get_quota(provider).take(timeout=quota_wait):
+            return 429, {}, {}
+        status, payload, response_headers = _request_json(url, params, headers=headers)
+        if status == 429:
+            get_quota(provider).drain()
+            break
+        if not _is_retryable(status) or attempt == HTTP_MAX_RETRIES:
+            break
+        time.sleep(backoff_delay(attempt, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX,
+                                 retry_after=response_headers.get("Retry-After")))
+    return status, payload, response_headers
+
+# -----------------------------
+# Provider response cache
+# -----------------------------
+class ResponseCache:
+    """
+    TTL + LRU cache for provider API responses with an on-disk backing store.
+
+    Entries younger than `ttl` are served directly. Entries up to `ttl + stale_ttl`
+    old are served immediately while a background request revalidates them
+    (using ETag/Last-Modified when the provider sent them). Older entries are
+    refetched synchronously.
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, stale_ttl=RESPONSE_CACHE_STALE_TTL,
+                 max_entries=RESPONSE_CACHE_MAX_ENTRIES, disk_path=RESPONSE_CACHE_DB):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> entry dict, most recently used last
+        self._disk = DiskCache(disk_path, max_entries=max_entries * 4) if disk_path else None
+        self._lock = threading.Lock()
+        self._revalidating = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def make_key(provider, url, params):
+        """Key on provider, endpoint and normalized params (API key excluded)."""
+        normalized = sorted(
+            (str(k).lower(), str(v)) for k, v in params.items() if str(k).lower() != "apikey"
+        )
+        return content_hash(provider, url, normalized)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        if self._disk is None:
+            return None
+        stored = self._disk.get(key)
+        if stored is None:
+            return None
+        entry = stored[0]
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self._disk is not None:
+            self._disk.set(key, entry, stored_at=entry["stored_at"])
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def record(self, kind):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+
+    def begin_revalidation(self, key):
+        """Return True if the caller should revalidate `key` (only one in flight per key)."""
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            return True
+
+    def end_revalidation(self, key):
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+_response_cache = None
+
+def get_response_cache():
+    """Return the process-wide provider response cache."""
+    global _response_cache
+    with _http_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache()
+    return _response_cache
+
+def get_cache_stats():
+    """Hit/miss counters of the provider response cache."""
+    return get_response_cache().stats()
+
+def _is_cacheable(status, payload):
+    return status == 200 and payload.get("status") in ("ok", "success")
+
+def _fetch_and_store(cache, key, provider, url, params, entry=None):
+    """Fetch (conditionally, if a previous entry exists) and update the cache."""
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    status, payload, response_headers = _provider_request(provider, url, params, headers=headers or None)
+
+    if status == 304 and entry is not None:
+        cache.record("not_modified")
+        entry = dict(entry, stored_at=time.time())
+        cache.put(key, entry)
+        return entry["payload"]
+
+    if entry is not None and _is_retryable(status):
+        return entry["payload"]  # Provider unavailable or over quota: keep serving the old copy
+
+    if _is_cacheable(status, payload):
+        cache.put(key, {
+            "payload": payload,
+            "stored_at": time.time(),
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+        })
+    return payload
+
+def _revalidate(cache, key, provider, url, params, entry):
+    try:
+        _fetch_and_store(cache, key, provider, url, params, entry)
+    finally:
+        cache.end_revalidation(key)
+
+def _cached_request_json(provider, url, params, use_cache=True):
+    """Serve a provider request from the response cache when possible."""
+    if not use_cache:
+        return _provider_request(provider, url, params)[1]
+
+    cache = get_response_cache()
+    key = cache.make_key(provider, url, params)
+    entry = cache.get(key)
+    if entry is not None:
+        age = time.time() - entry["stored_at"]
+        if age < cache.ttl:
+            cache.record("hits")
+            record_cache("fetch", hit=True)
+            return entry["payload"]
+        if age < cache.ttl + cache.stale_ttl:
+            cache.record("stale_hits")
+            record_cache("fetch", hit=True)
+            if cache.begin_revalidation(key):
+                _get_executor().submit(_revalidate, cache, key, provider, url, params, entry)
+            return entry["payload"]
+
+    cache.record("misses")
+    record_cache("fetch", hit=False)
+    return _fetch_and_store(cache, key, provider, url, params, entry)
+
+def _run_requests(jobs, use_cache=True):
+    """Run (provider, url, params) jobs concurrently and return payloads in job order."""
+    if not jobs:
+        return []
+    futures = [
+        _get_executor().submit(_cached_request_json, provider, url, params, use_cache)
+        for provider, url, params in jobs
+    ]
+    return [future.result() for future in futures]
+
 # -----------------------------
-def fetch_news_newsapi(category="general", language=DEFAULT_NEWS_LANGUAGE, page_size=20):
-    url = "https://newsapi.org/v2/top-headlines"
+# Request planning / result assembly
+# -----------------------------
+def _newsapi_jobs(category, language, page_size):
+    url = f"{NEWSAPI_BASE_URL}/top-headlines"
     params = {
         "apiKey": NEWS_API_KEY,
         "category": category,
         "language": language,
         "pageSize": page_size
     }
-    response = requests.get(url, params=params)
-    data = response.json()
+    return [("newsapi", url, params)]
+
+def _newsdataio_jobs(country, language, category, page_size):
+    # All pages needed to fill page_size are prefetched in parallel
+    url = f"{NEWSDATA_BASE_URL}/news"
+    n_pages = max(1, math.ceil(page_size / NEWSDATA_RESULTS_PER_PAGE))
+    return [("newsdataio", url, {
+        "apikey": NEWSDATAIO_API_KEY,
+        "country": country,
+        "language": language,
+        "category": category,
+        "page": page
+    }) for page in range(n_pages)]
+
+def _newsapi_frame(payloads, language):
+    data = payloads[0] if payloads else {}
     if data.get("status") != "ok":
         return pd.DataFrame()
     df = pd.DataFrame(data.get("articles", []))
     df["language"] = language  # Tag all articles with requested language
     return normalize_newsapi_columns(df)
 
-def fetch_news_newsdataio(country="in", language=DEFAULT_NEWS_LANGUAGE, category="general", page_size=20):
-    url = "https://newsdata.io/api/1/news"
-    params = {
-        "apikey": NEWSDATAIO_API_KEY,
-        "country": country,
-        "language": language,
-        "category": category,
-        "page": 0
-    }
+def _newsdataio_frame(payloads, language, page_size):
     all_articles = []
-    while len(all_articles) < page_size:
-        response = requests.get(url, params=params)
-        data = response.json()
+    for data in payloads:
         results = data.get("results", [])
         if not results:
-            break
+            break  # Pages after the first empty one are discarded
         all_articles.extend(results)
-        params["page"] += 1
     df = pd.DataFrame(all_articles[:page_size])
     df["language"] = language  # Tag all articles
     return normalize_newsdataio_columns(df)
 
+# -----------------------------
+# Fetching functions
+# -----------------------------
+def fetch_news_newsapi(category="general", language=DEFAULT_NEWS_LANGUAGE, page_size=20, use_cache=True):
+    payloads = _run_requests(_newsapi_jobs(category, language, page_size), use_cache)
+    return _newsapi_frame(payloads, language)
+
+def fetch_news_newsdataio(country="in", language=DEFAULT_NEWS_LANGUAGE, category="general", page_size=20, use_cache=True):
+    payloads = _run_requests(_newsdataio_jobs(country, language, category, page_size), use_cache)
+    return _newsdataio_frame(payloads, language, page_size)
+
 # -----------------------------
 # Combined function with language-based API selection
 # -----------------------------
@@ -87,30 +383,76 @@ INDIAN_LANGUAGES = [
     "hi", "mr", "ta", "te", "kn", "ml", "gu", "pa", "or", "bn", "ur"
 ]
 
-def get_all_news(category="general", language=DEFAULT_NEWS_LANGUAGE):
+def providers_for_language(language):
     """
-    Fetch news according to language:
+    Select providers by language:
     - Indian languages -> NewsData.io
     - Foreign languages -> NewsAPI
     - English/Hindi -> both APIs
     """
-    df_newsapi, df_newsdataio = pd.DataFrame(), pd.DataFrame()
-    
-    # English/Hindi: both APIs
     if language in ["en", "hi"]:
-        df_newsapi = fetch_news_newsapi(category, language)
-        df_newsdataio = fetch_news_newsdataio(language=language, category=category)
-    # Indian languages: NewsData.io only
-    elif language in INDIAN_LANGUAGES:
-        df_newsdataio = fetch_news_newsdataio(language=language, category=category)
-    # Foreign languages: NewsAPI only
-    else:
-        df_newsapi = fetch_news_newsapi(category, language)
-
-    # Combine results
-    df_combined = pd.concat([df_newsapi, df_newsdataio], ignore_index=True)
-    
-    # Cache locally
-    df_combined.to_json(NEWS_CACHE_FILE, orient="records", force_ascii=False)
+        return ["newsapi", "newsdataio"]
+    if language in INDIAN_LANGUAGES:
+        return ["newsdataio"]
+    return ["newsapi"]
+
+def get_news_batch(categories, languages, page_size=20, use_cache=True):
+    """
+    Fetch every (category, language) pair in one concurrent fan-out.
+
+    Parameters:
+        categories (list): Category names to fetch.
+        languages (list): Language codes to fetch.
+        page_size (int): Maximum articles per provider per pair.
+        use_cache (bool): Serve repeated requests from the response cache.
+
+    Returns:
+        pd.DataFrame: Combined articles tagged with their 'category'.
+    """
+    # Plan every provider request (and page) up front, then run them all at once
+    plan, jobs = [], []
+    for category in categories:
+        for language in languages:
+            for provider in providers_for_language(language):
+                if provider == "newsapi":
+                    provider_jobs = _newsapi_jobs(category, language, page_size)
+                else:
+                    provider_jobs = _newsdataio_jobs("in", language, category, page_size)
+                plan.append((provider, category, language, len(jobs), len(provider_jobs)))
+                jobs.extend(provider_jobs)
+
+    with track("fetch.requests", items=len(jobs)):
+        payloads = _run_requests(jobs, use_cache)
+
+    frames = []
+    for provider, category, language, offset, count in plan:
+        provider_payloads = payloads[offset:offset + count]
+        if provider == "newsapi":
+            df = _newsapi_frame(provider_payloads, language)
+        else:
+            df = _newsdataio_frame(provider_payloads, language, page_size)
+        if not df.empty:
+            df["category"] = category
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def get_all_news(category="general", language=DEFAULT_NEWS_LANGUAGE, use_cache=True, page_size=20):
+    """
+    Fetch news according to language:
+    - Indian languages -> NewsData.io
+    - Foreign languages -> NewsAPI
+    - English/Hindi -> both APIs (fetched in parallel)
+    """
+    with track("fetch") as run:
+        df_combined = assign_article_ids(
+            get_news_batch([category], [language], page_size=page_size, use_cache=use_cache)
+        )
+        run.count(len(df_combined))
+        
+        # Persist to the article store (refetched articles are upserted, not duplicated)
+        upsert_articles(df_combined)
     
     return df_combined
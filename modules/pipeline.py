@@ -0,0 +1,336 @@
+import json
+import os
+import pickle
+import queue
+import threading
+import time
+import pandas as pd
+from config import ARTICLE_STORE_DB, PIPELINE_CHUNK_SIZE, PIPELINE_QUEUE_SIZE, DEDUP_ENABLED
+from modules.article_store import (
+    assign_article_ids, upsert_articles, upsert_analysis, upsert_entity_index, upsert_trends
+)
+from modules.preprocessing import preprocess_news
+from modules.sentiment_analysis import analyze_sentiment
+from modules.ner_analysis import extract_entities, build_entity_index
+from modules.topic_modeling import generate_topics
+from modules.trend_analysis import detect_trends, TrendState
+from modules.executor import run_stages_parallel
+from modules.dedup import assign_clusters, propagate_to_duplicates, representatives, cluster_heads, mark_representatives
+from modules.vector_index import index_articles, vector_index_path
+from modules.embedding_store import evict_stale_embeddings
+from utils.metrics import track
+
+# Columns produced by the analysis stages (never written back as raw article fields)
+DERIVED_COLUMNS = ["clean_text", "cleaned_text", "tokens", "lemmas", "entities", "sentiment", "score", "topic"]
+
+# Duplicate-cluster columns added by the dedup stage (kept in the dedup tables, not on articles)
+CLUSTER_COLUMNS = ["cluster_id", "is_representative"]
+
+# -----------------------------
+# Analysis stages
+# -----------------------------
+def prepare_articles(df):
+    """Assign article ids and build the text every stage analyzes (title + content)."""
+    df = df.reset_index(drop=True)
+    if "article_id" not in df.columns:
+        df = assign_article_ids(df)
+    title = df["title"].fillna("") if "title" in df.columns else ""
+    content = df["content"].fillna("") if "content" in df.columns else ""
+    df["clean_text"] = title + " " + content
+    return df
+
+def _dedup_stage(df):
+    df = prepare_articles(df)
+    if not DEDUP_ENABLED:
+        return mark_representatives(df.assign(cluster_id=df["article_id"]))
+    with track("dedup", items=len(df)):
+        return assign_clusters(df)
+
+def _on_cluster_heads(stage):
+    """Run a stage on one article per duplicate cluster in the frame and copy its results to the duplicates."""
+    def run(df):
+        if "cluster_id" not in df.columns or df["cluster_id"].is_unique:
+            return stage(df)
+        analyzed = stage(cluster_heads(df))
+        columns = [c for c in analyzed.columns if c not in df.columns]
+        return propagate_to_duplicates(df.copy(), analyzed, columns)
+    return run
+
+def _preprocess_stage(df):
+    return preprocess_news(prepare_articles(df), text_column="clean_text")
+
+def _sentiment_stage(df):
+    return analyze_sentiment(df, text_column="clean_text")
+
+def _ner_stage(df):
+    return extract_entities(df, text_column="clean_text")
+
+def _topic_stage(df):
+    return generate_topics(df, text_column="clean_text")[0]
+
+def _parallel_stage(df):
+    # Preprocessing, sentiment and NER are independent per article: shard them
+    # across per-stage process pools (config.STAGE_WORKERS); the workers'
+    # own stage metrics stay in their processes, so the shard is timed here
+    with track("per_article", items=len(df)):
+        return run_stages_parallel(prepare_articles(df))
+
+# Ordered (name, function) stages; each takes and returns a DataFrame chunk
+STAGES = [
+    ("dedup", _dedup_stage),
+    ("preprocess", _on_cluster_heads(_preprocess_stage)),
+    ("sentiment", _on_cluster_heads(_sentiment_stage)),
+    ("ner", _on_cluster_heads(_ner_stage)),
+    ("topics", _on_cluster_heads(_topic_stage)),
+]
+
+PARALLEL_STAGES = [
+    ("dedup", _dedup_stage),
+    ("per_article", _on_cluster_heads(_parallel_stage)),
+    ("topics", _on_cluster_heads(_topic_stage)),
+]
+
+def run_stages(df, parallel=False, exclude=()):
+    """Run the per-article stages (dedup -> preprocess -> sentiment -> NER -> topics) on one frame, minus `exclude`."""
+    for name, stage in (PARALLEL_STAGES if parallel else STAGES):
+        if name not in exclude:
+            df = stage(df)
+    return df
+
+def analyze_articles(df, parallel=False):
+    """
+    Run the full analysis chain on one frame (dedup -> preprocess -> sentiment -> NER -> topics -> trends).
+
+    Syndicated duplicates are analyzed once (results are copied to every
+    copy) and counted once in the trends.
+
+    Parameters:
+        df (pd.DataFrame): Articles to analyze.
+        parallel (bool): Shard the per-article stages across process pools.
+
+    Returns:
+        tuple: (analyzed DataFrame, trends DataFrame)
+    """
+    df = run_stages(df, parallel)
+    return df, detect_trends(cluster_heads(df))
+
+def store_results(df, trend_state, db_path=ARTICLE_STORE_DB):
+    """
+    Write an analyzed frame to the store: articles, analysis, entity index,
+    incremental trends (through `trend_state`; None leaves trends to the
+    caller, see store_trends) and the vector index belonging to the store
+    (see vector_index_path).
+    """
+    upsert_articles(df.drop(columns=DERIVED_COLUMNS + CLUSTER_COLUMNS, errors="ignore"), db_path=db_path)
+    upsert_analysis(df, db_path=db_path)
+    upsert_entity_index(build_entity_index(df), db_path=db_path)
+    unique = representatives(df)
+    if trend_state is not None:
+        store_trends(unique, trend_state, db_path=db_path)
+    index_articles(unique, path=vector_index_path(db_path))
+
+def store_trends(df, trend_state, db_path=ARTICLE_STORE_DB):
+    """Fold analyzed (representative) articles into `trend_state` in time order and store the touched buckets."""
+    if not df.empty:
+        df = df.sort_values("published_at", kind="stable")
+    upsert_trends(trend_state.update(df), db_path=db_path)
+
+# -----------------------------
+# Input streaming
+# -----------------------------
+def read_chunks(path, chunk_size=PIPELINE_CHUNK_SIZE, skip_rows=0):
+    """
+    Stream a CSV or JSONL article file as DataFrame chunks.
+
+    Parameters:
+        path (str): Input file (.csv, or .jsonl/.ndjson with one article per line).
+        chunk_size (int): Articles per chunk.
+        skip_rows (int): Leading articles to skip (already processed).
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False)
+    elif path.endswith(".csv"):
+        reader = pd.read_csv(path, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Unsupported input format: {path} (expected .csv or .jsonl)")
+
+    with reader:
+        for chunk in reader:
+            if skip_rows >= len(chunk):
+                skip_rows -= len(chunk)
+                continue
+            if skip_rows:
+                chunk = chunk.iloc[skip_rows:]
+                skip_rows = 0
+            yield chunk
+
+# -----------------------------
+# Streaming pipeline
+# -----------------------------
+_DONE = object()
+
+def _put(q, item, stop):
+    """
+    Blocking put that gives up once the pipeline is stopping.
+
+    The end-of-stream marker is never given up on: every consumer keeps
+    draining its queue until it sees the marker, so the put completes, and
+    dropping it would leave the downstream threads waiting forever.
+    """
+    while True:
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            if stop.is_set() and item is not _DONE:
+                return False
+
+class Pipeline:
+    """
+    Headless, streaming analysis pipeline.
+
+    Chunks flow through one thread per stage connected by bounded queues, so
+    stages overlap while at most `queue_size` chunks wait between any two of
+    them. The sink writes each finished chunk to the article store (articles,
+    analysis, entity index, incremental trends) and then records a checkpoint,
+    so an interrupted run resumes after the last stored chunk.
+    """
+
+    def __init__(self, out=ARTICLE_STORE_DB, chunk_size=PIPELINE_CHUNK_SIZE,
+                 queue_size=PIPELINE_QUEUE_SIZE, checkpoint_path=None, stages=None, parallel=False):
+        self.out = out
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.checkpoint_path = checkpoint_path or f"{out}.checkpoint.json"
+        self.stages = stages or (PARALLEL_STAGES if parallel else STAGES)
+        self.stage_stats = {name: {"seconds": 0.0, "articles": 0} for name, _ in self.stages}
+
+    # Checkpoints
+    def _load_checkpoint(self, path):
+        if not os.path.exists(self.checkpoint_path):
+            return 0, TrendState()
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("input") != os.path.abspath(path):
+            return 0, TrendState()
+        trend_state = TrendState()
+        if os.path.exists(checkpoint.get("trend_state", "")):
+            with open(checkpoint["trend_state"], "rb") as f:
+                trend_state = pickle.load(f)
+        return checkpoint.get("rows_done", 0), trend_state
+
+    def _save_checkpoint(self, path, rows_done, trend_state):
+        trend_path = f"{self.checkpoint_path}.trends.pkl"
+        with open(trend_path + ".tmp", "wb") as f:
+            pickle.dump(trend_state, f)
+        os.replace(trend_path + ".tmp", trend_path)
+        checkpoint = {
+            "input": os.path.abspath(path),
+            "rows_done": rows_done,
+            "trend_state": trend_path,
+            "updated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        }
+        with open(self.checkpoint_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+
+    # Threads
+    def _source(self, chunks, out_q, stop, errors):
+        try:
+            for chunk in chunks:
+                if stop.is_set() or not _put(out_q, chunk, stop):
+                    break
+        except Exception as e:
+            errors.append(("source", e))
+            stop.set()
+        finally:
+            _put(out_q, _DONE, stop)
+
+    def _stage(self, name, fn, in_q, out_q, stop, errors):
+        while True:
+            item = in_q.get()
+            if item is _DONE:
+                _put(out_q, _DONE, stop)
+                return
+            if stop.is_set():
+                continue  # Drain so upstream threads can finish
+            try:
+                start = time.perf_counter()
+                result = fn(item)
+                self.stage_stats[name]["seconds"] += time.perf_counter() - start
+                self.stage_stats[name]["articles"] += len(result)
+            except Exception as e:
+                errors.append((name, e))
+                stop.set()
+                continue
+            _put(out_q, result, stop)
+
+    def _sink(self, df, trend_state):
+        store_results(df, trend_state, db_path=self.out)
+
+    def run(self, path, resume=True):
+        """
+        Process an input file end to end.
+
+        Returns:
+            dict: Summary with article counts, wall time and per-stage timings.
+        """
+        rows_done, trend_state = self._load_checkpoint(path) if resume else (0, TrendState())
+        resumed_from = rows_done
+        started = time.perf_counter()
+
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(
+            target=self._source,
+            args=(read_chunks(path, self.chunk_size, skip_rows=rows_done), queues[0], stop, errors),
+            name="pipeline-source", daemon=True
+        )]
+        for i, (name, fn) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._stage, args=(name, fn, queues[i], queues[i + 1], stop, errors),
+                name=f"pipeline-{name}", daemon=True
+            ))
+        for thread in threads:
+            thread.start()
+
+        # Sink runs in the calling thread; chunks arrive in input order
+        try:
+            while True:
+                df = queues[-1].get()
+                if df is _DONE:
+                    break
+                if stop.is_set():
+                    continue
+                self._sink(df, trend_state)
+                rows_done += len(df)
+                self._save_checkpoint(path, rows_done, trend_state)
+        except BaseException as e:
+            stop.set()
+            errors.append(("sink", e))
+            # Unblock and drain so every stage thread can exit
+            while any(t.is_alive() for t in threads):
+                try:
+                    queues[-1].get(timeout=0.1)
+                except queue.Empty:
+                    pass
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            stage, error = errors[0]
+            raise RuntimeError(f"Pipeline failed in stage '{stage}' after {rows_done} articles") from error
+
+        evicted = evict_stale_embeddings()
+
+        return {
+            "input": path,
+            "out": self.out,
+            "articles": rows_done - resumed_from,
+            "resumed_from": resumed_from,
+            "seconds": time.perf_counter() - started,
+            "stages": self.stage_stats,
+            "late_trend_articles": trend_state.late,
+            "embeddings_evicted": evicted,
+        }
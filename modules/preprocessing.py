@@ -1,52 +1,123 @@
 import pandas as pd
 import re
 import nltk
-import spacy
-from nltk.corpus import stopwords
+from config import (
+    PREPROCESS_BATCH_SIZE, PREPROCESS_N_PROCESS, LANGUAGE_SCRIPTS, NEWSAPI_LANGUAGES, NEWSDATA_LANGUAGES
+)
+from modules.model_registry import get_model
+from utils.metrics import track
 
-# Download NLTK data
-nltk.download("stopwords")
-nltk.download("punkt")
+# Languages with stopword support (see the "stopwords" registry loader);
+# the English spaCy model and NLTK data are loaded lazily via the model registry
+STOPWORD_LANGUAGES = ["en", "hi"]
 
-# Load English spaCy model
-nlp_en = spacy.load("en_core_web_sm")
+# -----------------------------
+# Text cleaning
+# -----------------------------
+# Lowercase letters, combining marks and digits of each script, without the
+# script's punctuation (dandas, Arabic comma/full stop, Hebrew maqaf, ...).
+# Indic and Arabic-script text also keeps ZWNJ/ZWJ, which change spelling.
+SCRIPT_CHARS = {
+    "latin": "\u00df-\u00f6\u00f8-\u00ff\u0100-\u024f",
+    "devanagari": "\u0900-\u0963\u0966-\u097f\u200c\u200d",
+    "bengali": "\u0980-\u09ff\u200c\u200d",
+    "gurmukhi": "\u0a00-\u0a7f\u200c\u200d",
+    "gujarati": "\u0a80-\u0aff\u200c\u200d",
+    "oriya": "\u0b00-\u0b7f\u200c\u200d",
+    "tamil": "\u0b80-\u0bff\u200c\u200d",
+    "telugu": "\u0c00-\u0c7f\u200c\u200d",
+    "kannada": "\u0c80-\u0cff\u200c\u200d",
+    "malayalam": "\u0d00-\u0d7f\u200c\u200d",
+    "arabic": "\u0620-\u0669\u066e-\u06d3\u06d5-\u06ff\u0750-\u077f\u200c\u200d",
+    "hebrew": "\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7\u05d0-\u05ea\u05f0-\u05f2",
+    "cyrillic": "\u0430-\u045f\u0460-\u04ff",
+    "cjk": "\u3400-\u4dbf\u4e00-\u9fff",
+}
+
+URL_PATTERN = r"http\S+|www\S+|https\S+"
 
-# Stopwords dictionary for supported languages
-STOPWORDS_DICT = {
-    "en": set(stopwords.words("english")),
-    "hi": set(nltk.corpus.stopwords.words("hindi")) if "hindi" in nltk.corpus.stopwords.fileids() else set(),
-    # Add more languages if needed with appropriate stopwords
+def _removal_pattern(scripts):
+    """
+    One compiled pass removing URLs and every run of characters outside
+    ASCII + `scripts` (a URL always starts with a kept letter, so the two
+    alternatives never overlap and one pass equals removing URLs first).
+    """
+    if scripts is None:
+        # Unknown language: keep all Unicode letters and digits
+        return re.compile(URL_PATTERN + r"|(?:[^\w\s]|_)+")
+    keep = "a-z0-9" + "".join(SCRIPT_CHARS[s] for s in scripts)
+    return re.compile(URL_PATTERN + f"|[^{keep}\\s]+")
+
+# Per-language cleaning rules, compiled once for every language we fetch
+CLEANING_RULES = {
+    lang: _removal_pattern(LANGUAGE_SCRIPTS.get(lang))
+    for lang in dict.fromkeys(NEWSAPI_LANGUAGES + NEWSDATA_LANGUAGES + list(LANGUAGE_SCRIPTS))
 }
+DEFAULT_CLEANING_RULE = _removal_pattern(None)
 
-def clean_text(text: str) -> str:
-    """Clean text: lowercasing, remove URLs, punctuation, extra spaces."""
+def clean_text(text: str, lang="en") -> str:
+    """Clean text: lowercasing, remove URLs, punctuation (script-aware per language), extra spaces."""
     if not isinstance(text, str):
         return ""
-    text = text.lower()
-    text = re.sub(r"http\S+|www\S+|https\S+", "", text)  # Remove URLs
-    text = re.sub(r"[^a-zA-Z0-9\s]", "", text)  # Remove punctuation
-    text = re.sub(r"\s+", " ", text).strip()  # Remove extra spaces
-    return text
+    # str.split() splits on exactly the characters re's \s matches, so this
+    # equals re.sub(r"\s+", " ", text).strip()
+    return " ".join(CLEANING_RULES.get(lang, DEFAULT_CLEANING_RULE).sub("", text.lower()).split())
+
+def clean_series(texts: pd.Series, languages=None) -> pd.Series:
+    """
+    clean_text over a whole Series.
+
+    Rows are grouped by language and each group is cleaned with its compiled
+    rule in one fused pass per text (lowercase, removal, whitespace), which
+    beats chaining Series.str methods that each loop over the column
+    (missing values become "").
+
+    Parameters:
+        texts (pd.Series): Raw texts.
+        languages (pd.Series, str or None): Language per row (default "en").
+    """
+    values = [t if isinstance(t, str) else "" for t in texts.tolist()]
+    if languages is None or isinstance(languages, str):
+        groups = {languages or "en": range(len(values))}
+    else:
+        langs = pd.Series(languages).fillna("en").to_numpy()
+        groups = pd.Series(langs).groupby(langs).indices
+    cleaned = [None] * len(values)
+    for lang, positions in groups.items():
+        rule = CLEANING_RULES.get(lang, DEFAULT_CLEANING_RULE)
+        for i in positions:
+            cleaned[i] = " ".join(rule.sub("", values[i].lower()).split())
+    return pd.Series(cleaned, index=texts.index, dtype=object)
 
 def tokenize_and_lemmatize(text: str, lang="en") -> tuple:
     """
     Tokenize and lemmatize text based on language.
     Returns tokens and lemmas.
     """
+    return next(_tokenize_batch([text], lang))
+
+def _tokenize_batch(texts, lang="en", batch_size=PREPROCESS_BATCH_SIZE, n_process=PREPROCESS_N_PROCESS):
+    """Yield (tokens, lemmas) for each text, running spaCy once over the whole batch."""
     if lang == "en":
-        doc = nlp_en(text)
-        tokens = [token.text for token in doc if token.text not in STOPWORDS_DICT.get(lang, set())]
-        lemmas = [token.lemma_ for token in doc if token.text not in STOPWORDS_DICT.get(lang, set())]
+        stop = get_model("stopwords").get(lang, set())
+        for doc in get_model("spacy_en").pipe(texts, batch_size=batch_size, n_process=n_process):
+            kept = [token for token in doc if token.text not in stop]
+            yield [token.text for token in kept], [token.lemma_ for token in kept]
     else:
         # For other languages, basic tokenization and lowercasing
-        tokens = [word for word in nltk.word_tokenize(text)]
-        lemmas = tokens  # No proper lemmatization without language-specific models
-    return tokens, lemmas
+        get_model("nltk_data")
+        for text in texts:
+            tokens = nltk.word_tokenize(text)
+            yield tokens, tokens  # No proper lemmatization without language-specific models
 
-def preprocess_news(df: pd.DataFrame, text_column="content", lang_column="language") -> pd.DataFrame:
+def preprocess_news(df: pd.DataFrame, text_column="content", lang_column="language",
+                    batch_size=PREPROCESS_BATCH_SIZE, n_process=PREPROCESS_N_PROCESS) -> pd.DataFrame:
     """
     Apply cleaning, tokenization, and lemmatization.
     Adds 'cleaned_text', 'tokens', 'lemmas' columns.
+
+    Rows are grouped by language so each language goes through a single
+    batched nlp.pipe pass (`batch_size` docs per batch, `n_process` workers).
     """
     df = df.copy()
     
@@ -54,16 +125,22 @@ def preprocess_news(df: pd.DataFrame, text_column="content", lang_column="langua
     if lang_column not in df.columns:
         df[lang_column] = "en"  # default
     
-    df["cleaned_text"] = df[text_column].apply(clean_text)
+    with track("preprocess.clean", items=len(df)):
+        df["cleaned_text"] = clean_series(df[text_column], df[lang_column])
+    
+    # Languages without stopword support fall back to the English pipeline
+    langs = df[lang_column].where(df[lang_column].isin(STOPWORD_LANGUAGES), "en").to_numpy()
+    texts = df["cleaned_text"].tolist()
     
-    tokens_list = []
-    lemmas_list = []
+    tokens_list = [None] * len(texts)
+    lemmas_list = [None] * len(texts)
     
-    for idx, row in df.iterrows():
-        lang = row[lang_column] if row[lang_column] in STOPWORDS_DICT else "en"
-        tokens, lemmas = tokenize_and_lemmatize(row["cleaned_text"], lang)
-        tokens_list.append(tokens)
-        lemmas_list.append(lemmas)
+    with track("preprocess.tokenize", items=len(texts)):
+        for lang, positions in pd.Series(langs).groupby(langs).indices.items():
+            results = _tokenize_batch([texts[i] for i in positions], lang, batch_size, n_process)
+            for i, (tokens, lemmas) in zip(positions, results):
+                tokens_list[i] = tokens
+                lemmas_list[i] = lemmas
     
     df["tokens"] = tokens_list
     df["lemmas"] = lemmas_list
@@ -0,0 +1,177 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from config import (
+    RESULT_CACHE_MAX_ARTICLES, LANGUAGE_SCRIPTS, DEDUP_ENABLED, DEDUP_NUM_PERM, DEDUP_BANDS,
+    DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD, DEDUP_MIN_TITLE_WORDS
+)
+from modules.pipeline import analyze_articles, prepare_articles, run_stages, STAGES, DERIVED_COLUMNS, CLUSTER_COLUMNS
+from modules.preprocessing import STOPWORD_LANGUAGES
+from modules.sentiment_analysis import SENTIMENT_MODEL_ID
+from modules.ner_analysis import NER_MODEL_ID
+from modules.embedding_store import EMBEDDING_MODEL_ID
+from modules.topic_modeling import topic_model_version
+from modules.trend_analysis import detect_trends
+from modules.dedup import cluster_heads, mark_representatives
+from utils.cache import content_hash
+from utils.metrics import track
+
+# Bump when a stage's output changes in a way the ids below don't capture
+RESULT_CACHE_VERSION = 2
+
+# Columns reused from a cached analysis (everything the stages add)
+RESULT_COLUMNS = DERIVED_COLUMNS + ["cluster_id"]
+
+def analysis_config_hash():
+    """
+    Hash of everything besides the article text that determines the
+    topic-independent results: model ids, cleaning and dedup settings. Any
+    change makes earlier results unreachable. Topic assignments are tagged
+    with the topic model version instead, so a refit or merge only reruns
+    the (cheap) topic assignment.
+    """
+    return content_hash(
+        RESULT_CACHE_VERSION, SENTIMENT_MODEL_ID, NER_MODEL_ID, EMBEDDING_MODEL_ID,
+        sorted(LANGUAGE_SCRIPTS.items()), STOPWORD_LANGUAGES, DEDUP_ENABLED, DEDUP_NUM_PERM, DEDUP_BANDS,
+        DEDUP_SHINGLE_SIZE, DEDUP_THRESHOLD, DEDUP_MIN_TITLE_WORDS
+    )
+
+class ResultCache:
+    """
+    Process-wide LRU cache of per-article analysis results.
+
+    Entries are keyed by (analysis config hash, article id, analyzed text),
+    so every Streamlit session of the server shares them and a frame is
+    looked up article by article: a frame seen before is served entirely
+    from the cache, and a frame that overlaps an earlier one only analyzes
+    the articles that are new. At most `max_articles` results are kept.
+    """
+
+    def __init__(self, max_articles=RESULT_CACHE_MAX_ARTICLES):
+        self.max_articles = max_articles
+        self._entries = OrderedDict()  # key -> {column: value}, most recently used last
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """Return {key: result} for the keys present (marking them recently used)."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = entry
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            for key, entry in items.items():
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_articles:
+                self._entries.popitem(last=False)
+
+    def update_many(self, updates):
+        """Merge {key: {column: value}} into the entries still present (not counted as lookups)."""
+        with self._lock:
+            for key, values in updates.items():
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries[key] = {**entry, **values}
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Return the process-wide analysis result cache."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+    return _result_cache
+
+def analyze_articles_cached(df, parallel=False, cache=None):
+    """
+    analyze_articles with cross-session reuse of per-article results.
+
+    Only articles without a cached result (for the current analysis config)
+    go through the analysis chain; the rest are filled in from the cache.
+    Topics are reassigned (one transform() over stored embeddings) only for
+    articles whose cached topic came from another version of the persisted
+    topic model. Duplicate-cluster representatives and trends are recomputed
+    for the whole frame (trends count each cluster in the frame once).
+
+    Until the persistent topic model is fitted, topics come from a throwaway
+    model whose ids mean nothing outside the batch it was fitted on, so they
+    are not cached: topics are then assigned to the whole frame in one go.
+
+    Parameters:
+        df (pd.DataFrame): Articles to analyze.
+        parallel (bool): Shard the per-article stages of the delta across process pools.
+        cache (ResultCache or None): Cache to use (default: the process-wide one).
+
+    Returns:
+        tuple: (analyzed DataFrame, trends DataFrame, number of articles analyzed)
+    """
+    cache = cache or get_result_cache()
+    df = prepare_articles(df.drop(columns=RESULT_COLUMNS + CLUSTER_COLUMNS, errors="ignore"))
+    if df.empty:
+        analyzed, trends = analyze_articles(df, parallel)
+        return analyzed, trends, 0
+
+    with track("result_cache", items=len(df)) as run:
+        config = analysis_config_hash()
+        keys = [content_hash(config, article_id, text) for article_id, text in zip(df["article_id"], df["clean_text"])]
+        found = cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        run.cache(len(keys) - len(missing), len(missing))
+
+    if missing:
+        delta = run_stages(df.iloc[missing], parallel, exclude=("topics",))
+        fresh = {}
+        for key, record in zip((keys[i] for i in missing), delta.to_dict("records")):
+            fresh[key] = {c: record.get(c) for c in RESULT_COLUMNS if c in record}
+        cache.put_many(fresh)
+        found.update(fresh)
+
+    results = pd.DataFrame([found[key] for key in keys], index=df.index)
+    df = pd.concat([df, results.drop(columns=[c for c in results.columns if c in df.columns])], axis=1)
+    df = _assign_topics(mark_representatives(df), keys, cache)
+    return df, detect_trends(cluster_heads(df)), len(missing)
+
+def _assign_topics(df, keys, cache):
+    """
+    Fill in 'topic', reassigning the cluster heads whose cached topic does
+    not come from the current topic model (all of them while it is unfitted)
+    and copying each head's topic to its duplicates.
+    """
+    topic_version = topic_model_version()
+    tagged = df.pop("topic_version") if "topic_version" in df.columns else pd.Series(None, index=df.index)
+    heads = ~df["cluster_id"].duplicated()
+    stale = heads & ((tagged != topic_version) | (topic_version == "unfitted"))
+    if stale.any():
+        assigned = dict(STAGES)["topics"](df.loc[stale].drop(columns="topic", errors="ignore"))
+        df.loc[stale, "topic"] = assigned["topic"].to_numpy()
+        # Tag with the version that assigned them (the stage may have just fitted or merged the model)
+        topic_version = topic_model_version()
+        if topic_version != "unfitted":
+            stale_keys = [key for key, is_stale in zip(keys, stale) if is_stale]
+            cache.update_many({key: {"topic": topic, "topic_version": topic_version}
+                               for key, topic in zip(stale_keys, df.loc[stale, "topic"])})
+    topics = df.loc[heads].set_index("cluster_id")["topic"]
+    df["topic"] = df["cluster_id"].map(topics).astype(int)
+    return df
@@ -0,0 +1,185 @@
+import logging
+import math
+import os
+import pickle
+import threading
+import time
+import pandas as pd
+from config import (
+    ARTICLE_STORE_DB, NEWSDATA_RESULTS_PER_PAGE, SCHEDULER_INTERVAL, SCHEDULER_PAGE_SIZE,
+    SCHEDULER_CATEGORIES, SCHEDULER_LANGUAGES
+)
+from modules.news_fetcher import get_news_batch, get_quota, providers_for_language
+from modules.article_store import assign_article_ids, upsert_articles, analyzed_article_ids
+from modules.pipeline import run_stages, store_results, store_trends
+from modules.dedup import representatives
+from modules.embedding_store import evict_stale_embeddings
+from modules.trend_analysis import TrendState
+from utils.metrics import track
+
+logger = logging.getLogger(__name__)
+
+class RefreshScheduler:
+    """
+    Background refresher for the article store.
+
+    Every cycle walks the (category, language) pairs round-robin, continuing
+    where the previous cycle stopped. A pair is only fetched when every
+    provider it needs has enough quota tokens for all of its requests;
+    otherwise the cycle ends there and the remaining pairs wait for the next
+    one, so a tight quota is shared fairly instead of always spending it on
+    the first pairs. Fetched articles are upserted; only those without stored
+    analysis go through the analysis stages. Newly analyzed articles of the
+    whole cycle are folded into the trend state once, in publication order,
+    so one pair's recent articles don't push the others' older ones out of the
+    trend window. The cursor and trend state are persisted next to the store.
+    """
+
+    def __init__(self, categories=SCHEDULER_CATEGORIES, languages=SCHEDULER_LANGUAGES,
+                 interval=SCHEDULER_INTERVAL, page_size=SCHEDULER_PAGE_SIZE, db_path=ARTICLE_STORE_DB,
+                 state_path=None):
+        self.pairs = [(category.lower(), language) for category in categories for language in languages]
+        self.interval = interval
+        self.page_size = page_size
+        self.db_path = db_path
+        self.state_path = state_path or f"{db_path}.scheduler.pkl"
+        self.cursor = 0
+        self.trend_state = TrendState()
+        self.last_polled = {}  # (category, language) -> unix time
+        self.last_cycle = None
+        self._cycle_articles = []  # Analyzed representatives awaiting the end-of-cycle trend update
+        self._stop = threading.Event()
+        self._thread = None
+        self._load_state()
+
+    # State
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, "rb") as f:
+            state = pickle.load(f)
+        self.cursor = state.get("cursor", 0) % max(1, len(self.pairs))
+        self.trend_state = state.get("trend_state", self.trend_state)
+        self.last_polled = state.get("last_polled", {})
+        self._cycle_articles = state.get("pending_trends", [])
+
+    def _save_state(self):
+        with open(self.state_path + ".tmp", "wb") as f:
+            pickle.dump({"cursor": self.cursor, "trend_state": self.trend_state,
+                         "last_polled": self.last_polled, "pending_trends": self._cycle_articles}, f)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    # Quota
+    def requests_needed(self, language):
+        """Provider requests one poll of a pair in `language` costs, per provider."""
+        pages = max(1, math.ceil(self.page_size / NEWSDATA_RESULTS_PER_PAGE))
+        return {provider: (1 if provider == "newsapi" else pages) for provider in providers_for_language(language)}
+
+    def has_quota(self, language):
+        return all(get_quota(provider).available() >= n for provider, n in self.requests_needed(language).items())
+
+    # Polling
+    def poll_pair(self, category, language):
+        """
+        Fetch one pair, store the articles and analyze the new ones (their
+        trends are added by the end of the cycle, see flush_trends).
+
+        Returns:
+            dict: Articles fetched and newly analyzed.
+        """
+        with track("scheduler.poll") as run:
+            df = assign_article_ids(get_news_batch([category], [language], page_size=self.page_size))
+            run.count(len(df))
+            if df.empty:
+                return {"fetched": 0, "analyzed": 0}
+            df = df.drop_duplicates("article_id").reset_index(drop=True)
+            upsert_articles(df, db_path=self.db_path)
+
+            new = df[~df["article_id"].isin(analyzed_article_ids(df["article_id"], db_path=self.db_path))]
+            if not new.empty:
+                analyzed = run_stages(new.reset_index(drop=True))
+                store_results(analyzed, None, db_path=self.db_path)
+                self._cycle_articles.append(representatives(analyzed))
+            return {"fetched": len(df), "analyzed": len(new)}
+
+    def flush_trends(self):
+        """Fold the articles analyzed since the last flush into the trend state, in time order."""
+        if self._cycle_articles:
+            articles, self._cycle_articles = pd.concat(self._cycle_articles, ignore_index=True), []
+            store_trends(articles, self.trend_state, db_path=self.db_path)
+
+    def run_cycle(self):
+        """
+        Poll pairs round-robin until every pair was polled once or quota runs out.
+
+        Returns:
+            dict: Pairs polled, articles fetched/analyzed, pairs left for lack
+            of quota, articles too late for the trends, stale embeddings
+            evicted and failed pairs.
+        """
+        summary = {"started_at": pd.Timestamp.now(tz="UTC").isoformat(), "pairs_polled": 0, "fetched": 0,
+                   "analyzed": 0, "deferred": 0, "late_trend_articles": 0, "errors": []}
+        late_before = self.trend_state.late
+        for done in range(len(self.pairs)):
+            category, language = self.pairs[self.cursor]
+            if self._stop.is_set() or not self.has_quota(language):
+                summary["deferred"] = len(self.pairs) - done
+                break
+            try:
+                result = self.poll_pair(category, language)
+                summary["pairs_polled"] += 1
+                summary["fetched"] += result["fetched"]
+                summary["analyzed"] += result["analyzed"]
+                self.last_polled[(category, language)] = time.time()
+            except Exception as e:
+                logger.exception("Refreshing %s/%s failed", category, language)
+                summary["errors"].append(f"{category}/{language}: {type(e).__name__}: {e}")
+            self.cursor = (self.cursor + 1) % len(self.pairs)
+            self._save_state()  # Pending trend articles included, so a crash doesn't lose them
+        try:
+            self.flush_trends()
+        except Exception as e:
+            logger.exception("Updating trends failed")
+            summary["errors"].append(f"trends: {type(e).__name__}: {e}")
+        try:
+            summary["embeddings_evicted"] = evict_stale_embeddings()
+        except Exception as e:
+            logger.exception("Evicting stale embeddings failed")
+            summary["errors"].append(f"embeddings: {type(e).__name__}: {e}")
+        summary["late_trend_articles"] = self.trend_state.late - late_before
+        self._save_state()
+        self.last_cycle = summary
+        return summary
+
+    def run_forever(self):
+        """Run a cycle every `interval` seconds until stop() is called."""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            summary = self.run_cycle()
+            logger.info("Refresh cycle: %d pairs, %d new articles, %d deferred",
+                        summary["pairs_polled"], summary["analyzed"], summary["deferred"])
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # Background thread
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="refresh-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def start_scheduler(**kwargs):
+    """Start the process-wide background scheduler (once; later calls return it)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler(**kwargs).start()
+    return _scheduler
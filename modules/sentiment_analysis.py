@@ -1,19 +1,62 @@
 import pandas as pd
-from transformers import pipeline
-
-# Initialize multilingual sentiment analysis pipeline
-sentiment_pipeline = pipeline(
-    "sentiment-analysis",
-    model="nlptown/bert-base-multilingual-uncased-sentiment"
+from config import (
+    SENTIMENT_MODEL, SENTIMENT_BACKEND, SENTIMENT_BATCH_SIZE, SENTIMENT_MAX_LENGTH, SENTIMENT_CACHE_DB,
+    SENTIMENT_CACHE_MAX_ENTRIES
 )
+from modules.model_registry import get_model
+from utils.cache import DiskCache, content_hash
+from utils.metrics import track
+
+# The multilingual sentiment pipeline (on the configured backend) is loaded
+# lazily through the model registry as "sentiment"
+
+# Backends can differ slightly in scores, so the backend is part of the model id
+SENTIMENT_MODEL_ID = f"{SENTIMENT_MODEL}@{SENTIMENT_BACKEND}"
 
-def analyze_sentiment(df, text_column="cleaned_text"):
+# Persistent cache so previously scored articles never hit the model again
+sentiment_cache = DiskCache(SENTIMENT_CACHE_DB, max_entries=SENTIMENT_CACHE_MAX_ENTRIES)
+cache_stats = {"hits": 0, "misses": 0}
+
+def stars_to_sentiment(label):
+    """Map nlptown labels ('1 star' to '5 stars') to Positive/Neutral/Negative."""
+    stars = int(label[0])
+    if stars <= 2:
+        return "Negative"
+    elif stars == 3:
+        return "Neutral"
+    return "Positive"
+
+def score_texts(texts, batch_size=SENTIMENT_BATCH_SIZE):
+    """
+    Run the sentiment model over texts in length-sorted batches.
+    Sorting by length keeps texts of similar size together, so little
+    compute is spent on padding; inputs are truncated to the model limit.
+
+    Returns:
+        list: (label, score) per input text, in input order.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        bucket = order[start:start + batch_size]
+        outputs = get_model("sentiment")(
+            [texts[i] for i in bucket],
+            batch_size=batch_size,
+            truncation=True,
+            max_length=SENTIMENT_MAX_LENGTH
+        )
+        for i, item in zip(bucket, outputs):
+            results[i] = (item["label"], item["score"])
+    return results
+
+def analyze_sentiment(df, text_column="cleaned_text", batch_size=SENTIMENT_BATCH_SIZE):
     """
     Analyze sentiment of news articles, supports multiple languages.
     
     Parameters:
         df (pd.DataFrame): DataFrame containing news articles.
         text_column (str): Column name containing preprocessed text.
+        batch_size (int): Texts per inference batch.
     
     Returns:
         pd.DataFrame: Original DataFrame with additional 'sentiment' and 'score' columns.
@@ -22,22 +65,25 @@ def analyze_sentiment(df, text_column="cleaned_text"):
     
     # Replace empty text with neutral placeholder to avoid errors
     df[text_column] = df[text_column].fillna("No content")
+    texts = df[text_column].tolist()
     
-    sentiments = sentiment_pipeline(df[text_column].tolist())
+    with track("sentiment", items=len(texts)) as run:
+        # Only texts not scored before (by this model) go through the model
+        keys = [content_hash(SENTIMENT_MODEL_ID, text) for text in texts]
+        cached = sentiment_cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        hits = len(keys) - sum(1 for key in keys if key in missing)
+        cache_stats["hits"] += hits
+        cache_stats["misses"] += len(missing)
+        run.cache(hits, len(missing))
+        
+        if missing:
+            scored = dict(zip(missing, score_texts(list(missing.values()), batch_size)))
+            sentiment_cache.set_many(scored)
+            cached.update(scored)
     
     # Extract sentiment label and map numeric scores to Positive/Neutral/Negative
-    df["sentiment"] = []
-    df["score"] = []
-    
-    for item in sentiments:
-        # For nlptown model: labels are '1 star' to '5 stars'
-        stars = int(item["label"][0])
-        df["score"].append(item["score"])
-        if stars <= 2:
-            df["sentiment"].append("Negative")
-        elif stars == 3:
-            df["sentiment"].append("Neutral")
-        else:
-            df["sentiment"].append("Positive")
+    df["sentiment"] = [stars_to_sentiment(cached[key][0]) for key in keys]
+    df["score"] = [cached[key][1] for key in keys]
     
     return df
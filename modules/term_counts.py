@@ -0,0 +1,71 @@
+import heapq
+from collections import Counter
+from operator import itemgetter
+
+def _is_term(term):
+    """Keep words (any script); drop single characters, numbers and punctuation."""
+    return isinstance(term, str) and len(term) > 1 and any(ch.isalpha() for ch in term)
+
+class TermCounter:
+    """
+    Incrementally maintained term frequencies over the `lemmas` column.
+
+    Per-article counts are kept, so articles can be added and removed (e.g.
+    as a window slides) in O(their terms) without recounting the rest; each
+    article is counted at most once. `top(k)` selects the most frequent
+    terms with a heap instead of sorting the whole vocabulary.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self._articles = {}  # article_id -> Counter of its terms
+
+    def __len__(self):
+        return len(self._articles)
+
+    def add(self, df, column="lemmas", id_column="article_id"):
+        """
+        Count the terms of articles not counted yet.
+
+        Returns:
+            int: Articles added.
+        """
+        if df.empty or column not in df.columns:
+            return 0
+        ids = df[id_column] if id_column in df.columns else df.index
+        added = 0
+        for article_id, terms in zip(ids, df[column]):
+            if article_id in self._articles:
+                continue
+            article_counts = Counter(t for t in terms if _is_term(t)) if isinstance(terms, (list, tuple)) else Counter()
+            self._articles[article_id] = article_counts
+            self.counts.update(article_counts)
+            added += 1
+        return added
+
+    def remove(self, article_ids):
+        """Forget the given articles' terms (unknown ids are ignored)."""
+        for article_id in article_ids:
+            article_counts = self._articles.pop(article_id, None)
+            if article_counts:
+                self.counts.subtract(article_counts)
+                for term in article_counts:
+                    if self.counts[term] <= 0:
+                        del self.counts[term]
+
+    def sync(self, df, column="lemmas", id_column="article_id"):
+        """
+        Make the counted articles exactly those of `df`: removes the articles
+        no longer present and adds only the new ones.
+
+        Returns:
+            tuple: (articles added, articles removed)
+        """
+        ids = set(df[id_column] if id_column in df.columns else df.index)
+        gone = [article_id for article_id in self._articles if article_id not in ids]
+        self.remove(gone)
+        return self.add(df, column, id_column), len(gone)
+
+    def top(self, k=100):
+        """The k most frequent terms as {term: count}, most frequent first."""
+        return dict(heapq.nlargest(k, self.counts.items(), key=itemgetter(1)))
@@ -1,10 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
-from bertopic import BERTopic
+from config import (
+    EMBEDDING_MODEL, TOPIC_MODEL_DIR, TOPIC_MIN_FIT_DOCS, TOPIC_UPDATE_MIN_DOCS,
+    TOPIC_MERGE_MIN_SIMILARITY, TOPIC_NOVELTY_MIN_SIMILARITY, TOPIC_THROWAWAY_MIN_DOCS
+)
+from modules.embedding_store import embed_texts
+from modules.model_registry import get_model
+from utils.metrics import track
+
+MODEL_PATH = os.path.join(TOPIC_MODEL_DIR, "model")
+PENDING_PATH = os.path.join(TOPIC_MODEL_DIR, "pending.json")
+
+_topic_model = None
+_topic_model_version = None
+_model_lock = threading.Lock()
+
+# -----------------------------
+# Persistence
+# -----------------------------
+def _new_model(n_topics=None):
+    from bertopic import BERTopic  # Heavy import, deferred to first use
+    # Use multilingual sentence embeddings (on the configured backend) for topic modeling
+    return BERTopic(
+        embedding_model=get_model("embedding"),
+        nr_topics=n_topics
+    )
+
+def load_topic_model():
+    """
+    Return the persisted topic model, or None. Kept in memory per process and
+    reloaded when another process has saved a newer version.
+    """
+    global _topic_model, _topic_model_version
+    version = topic_model_version()
+    if version == "unfitted":
+        _topic_model, _topic_model_version = None, None
+    elif version != _topic_model_version:
+        from bertopic import BERTopic
+        _topic_model = BERTopic.load(MODEL_PATH, embedding_model=get_model("embedding"))
+        _topic_model_version = version
+    return _topic_model
+
+def save_topic_model(topic_model):
+    """Persist the topic model (safetensors; UMAP/HDBSCAN are not needed for transform)."""
+    global _topic_model, _topic_model_version
+    os.makedirs(TOPIC_MODEL_DIR, exist_ok=True)
+    topic_model.save(MODEL_PATH, serialization="safetensors", save_ctfidf=True,
+                     save_embedding_model=EMBEDDING_MODEL)
+    _topic_model, _topic_model_version = topic_model, topic_model_version()
+
+@contextmanager
+def _exclusive():
+    """
+    Hold the topic model's write lock: a thread lock plus an inter-process one
+    (a SQLite write transaction on a lock file, as for the vector index), so
+    the read-modify-write of pending.json and a save of the model never
+    interleave with another process's.
+    """
+    os.makedirs(TOPIC_MODEL_DIR, exist_ok=True)
+    with _model_lock:
+        conn = sqlite3.connect(os.path.join(TOPIC_MODEL_DIR, "write.lock"), timeout=300, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+def topic_model_version():
+    """Version of the persisted topic model (changes on every refit/update), or "unfitted"."""
+    if not os.path.exists(MODEL_PATH):
+        return "unfitted"
+    # The model is a directory whose files are rewritten in place on save
+    paths = [os.path.join(MODEL_PATH, name) for name in os.listdir(MODEL_PATH)] if os.path.isdir(MODEL_PATH) else [MODEL_PATH]
+    return str(max(os.stat(path).st_mtime_ns for path in paths + [MODEL_PATH]))
+
+def _load_pending():
+    if not os.path.exists(PENDING_PATH):
+        return []
+    with open(PENDING_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_pending(texts):
+    os.makedirs(TOPIC_MODEL_DIR, exist_ok=True)
+    with open(PENDING_PATH, "w", encoding="utf-8") as f:
+        json.dump(texts, f, ensure_ascii=False)
+
+def _add_pending(texts):
+    """Buffer documents for the next fit/update; returns the whole buffer."""
+    pending = _load_pending()
+    seen = set(pending)
+    pending.extend(t for t in dict.fromkeys(texts) if t and t not in seen)
+    _save_pending(pending)
+    return pending
+
+# -----------------------------
+# Topic assignment
+# -----------------------------
+def topic_similarity(topic_model, embeddings):
+    """Cosine similarity of each embedding to its nearest topic (the outlier topic excluded)."""
+    topics = np.asarray(topic_model.topic_embeddings_, dtype=np.float32)[getattr(topic_model, "_outliers", 0):]
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if not len(topics) or not len(embeddings):
+        return np.zeros(len(embeddings), dtype=np.float32)
+    topics = topics / np.maximum(np.linalg.norm(topics, axis=1, keepdims=True), 1e-12)
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    return (embeddings @ topics.T).max(axis=1)
+
+def _mark_novel(topic_model, topics, embeddings):
+    """Topics with documents far from every topic set to the outlier topic -1."""
+    novel = topic_similarity(topic_model, embeddings) < TOPIC_NOVELTY_MIN_SIMILARITY
+    return np.where(novel, -1, np.asarray(topics)).tolist()
 
 def generate_topics(df, text_column="cleaned_text", n_topics=None):
     """
     Perform topic modeling on news articles using BERTopic with multilingual embeddings.
     
+    A persisted model is reused across runs so topic ids stay stable: new
+    articles are assigned with transform(), and documents that fall outside
+    every known topic (outliers, or less than TOPIC_NOVELTY_MIN_SIMILARITY
+    from every topic's embedding) get topic -1 and are buffered until enough
+    accumulate to fit a model on them and merge its new topics into the
+    persisted one.
+    
     Parameters:
         df (pd.DataFrame): DataFrame containing news articles.
         text_column (str): Column containing preprocessed text.
@@ -13,19 +137,64 @@ def generate_topics(df, text_column="cleaned_text", n_topics=None):
     Returns:
         tuple:
             - df (pd.DataFrame): Original DataFrame with a 'topic' column.
-            - topic_model (BERTopic): Fitted BERTopic model object.
+            - topic_model (BERTopic or None): Fitted BERTopic model object
+              (None for a batch too small to cluster before the persistent model exists).
             - probs (list): Topic probabilities for each document.
     """
     df = df.copy()
-    texts = df[text_column].tolist()
+    texts = df[text_column].fillna("").tolist()
     
-    # Use multilingual sentence embeddings for topic modeling
-    topic_model = BERTopic(
-        embedding_model="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-        nr_topics=n_topics
-    )
+    with track("topics", items=len(texts)):
+        # Precomputed embeddings: only texts never seen before are encoded
+        embeddings = embed_texts(texts)
     
-    topics, probs = topic_model.fit_transform(texts)
+        with _exclusive():
+            topic_model = load_topic_model()
+        
+            if topic_model is None:
+                pending = _add_pending(texts)
+                if len(pending) >= TOPIC_MIN_FIT_DOCS:
+                    # Enough history: fit the persistent model once
+                    topic_model = _new_model(n_topics)
+                    with track("topics.fit", items=len(pending)):
+                        topic_model.fit(pending, embeddings=embed_texts(pending))
+                    save_topic_model(topic_model)
+                    _save_pending([])
+                    topics, probs = topic_model.transform(texts, embeddings=embeddings)
+                elif len(texts) < TOPIC_THROWAWAY_MIN_DOCS:
+                    # Too few documents to cluster at all: everything is an outlier
+                    topic_model, topics, probs = None, [-1] * len(texts), None
+                else:
+                    # Not enough documents for a stable model yet: fit a throwaway one
+                    topic_model = _new_model(n_topics)
+                    with track("topics.fit", items=len(texts)):
+                        topics, probs = topic_model.fit_transform(texts, embeddings=embeddings)
+            else:
+                with track("topics.transform", items=len(texts)):
+                    topics, probs = topic_model.transform(texts, embeddings=embeddings)
+                # Nearest-topic assignment forces new stories into old topics; treat
+                # documents far from every topic as outliers instead
+                topics = _mark_novel(topic_model, topics, embeddings)
+                outliers = [text for text, topic in zip(texts, topics) if topic == -1]
+                pending = _add_pending(outliers) if outliers else _load_pending()
+                
+                if len(pending) >= TOPIC_UPDATE_MIN_DOCS:
+                    # Fit on the buffered outliers and merge: existing topic ids are
+                    # kept and only genuinely new topics are appended
+                    update_model = _new_model(n_topics)
+                    with track("topics.fit", items=len(pending)):
+                        update_model.fit(pending, embeddings=embed_texts(pending))
+                    from bertopic import BERTopic
+                    topic_model = BERTopic.merge_models(
+                        [topic_model, update_model],
+                        min_similarity=TOPIC_MERGE_MIN_SIMILARITY,
+                        embedding_model=get_model("embedding")
+                    )
+                    save_topic_model(topic_model)
+                    _save_pending([])
+                    if outliers:
+                        topics, probs = topic_model.transform(texts, embeddings=embeddings)
+                        topics = _mark_novel(topic_model, topics, embeddings)
     
     # Add topic assignments to DataFrame
     df["topic"] = topics
@@ -1,15 +1,41 @@
 import pandas as pd
 import numpy as np
+from bisect import bisect_left
+from config import TREND_BUCKET, TREND_SPIKE_Z, TREND_EWMA_ALPHA, TREND_REORDER_BUCKETS
+from utils.metrics import track
+
+# Numeric codes for sentiment labels (HF-style and the app's own labels)
+SENTIMENT_SCORES = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0, "Positive": 1, "Negative": -1, "Neutral": 0}
+
+# Time bucket aliases accepted for `bucket`
+BUCKET_FREQS = {"minute": "min", "hour": "h", "day": "D"}
+
+TREND_COLUMNS = ["article_count", "avg_sentiment", "rolling_count", "rolling_sentiment",
+                 "ewma_count", "zscore", "spike_flag"]
 
 def sentiment_to_score(sentiment_label):
     """
     Convert sentiment label to numerical score.
     Maps Hugging Face sentiment output to numbers.
     """
-    mapping = {"POSITIVE": 1, "NEGATIVE": -1, "NEUTRAL": 0, "Positive": 1, "Negative": -1, "Neutral": 0}
-    return mapping.get(sentiment_label, 0)
+    return SENTIMENT_SCORES.get(sentiment_label, 0)
+
+def _bucketed(df, date_column, topic_column, sentiment_column, bucket):
+    """Floor timestamps to buckets and sum article counts / sentiment codes per (topic, bucket)."""
+    dates = pd.to_datetime(df[date_column], errors="coerce", utc=True)
+    valid = dates.notna()
+    # Vectorized label -> code mapping (unknown labels count as neutral)
+    codes = df[sentiment_column].map(SENTIMENT_SCORES).fillna(0).astype("float64")
+    frame = pd.DataFrame({
+        topic_column: df[topic_column][valid].to_numpy(),
+        date_column: dates[valid].dt.floor(BUCKET_FREQS.get(bucket, bucket)).to_numpy(),
+        "sentiment_code": codes[valid].to_numpy(),
+    })
+    grouped = frame.groupby([topic_column, date_column], sort=True)["sentiment_code"].agg(["size", "sum"])
+    return grouped.rename(columns={"size": "article_count", "sum": "sentiment_sum"}).reset_index()
 
-def detect_trends(df, date_column="published_at", topic_column="topic", sentiment_column="sentiment", window=3):
+def detect_trends(df, date_column="published_at", topic_column="topic", sentiment_column="sentiment", window=3,
+                  bucket=TREND_BUCKET, z_threshold=TREND_SPIKE_Z, alpha=TREND_EWMA_ALPHA):
     """
     Detect trends and spikes/dips in news topics and sentiment over time.
 
@@ -18,33 +44,159 @@ def detect_trends(df, date_column="published_at", topic_column="topic", sentimen
         date_column (str): Column with publication date of articles.
         topic_column (str): Column with topic assigned to each article.
         sentiment_column (str): Column with sentiment label or score.
-        window (int): Rolling window size for trend calculation.
+        window (int): Rolling window size (in buckets) for trend calculation.
+        bucket (str): Time bucket: "minute", "hour", "day" (or any pandas frequency).
+        z_threshold (float): Z-score above which a bucket is flagged as a spike.
+        alpha (float): EWMA smoothing factor for the count baseline.
 
     Returns:
-        pd.DataFrame: Aggregated trends per topic with rolling counts and sentiment averages.
+        pd.DataFrame: Aggregated trends per topic and time bucket with rolling counts,
+        sentiment averages, EWMA baseline, z-score and spike flag.
     """
-    df = df.copy()
+    with track("trends", items=len(df)):
+        trends = _bucketed(df, date_column, topic_column, sentiment_column, bucket)
+        if trends.empty:
+            return pd.DataFrame(columns=[topic_column, date_column] + TREND_COLUMNS)
+
+        trends["avg_sentiment"] = trends["sentiment_sum"] / trends["article_count"]
+
+        # One groupby-rolling pass over both metrics
+        rolled = trends.groupby(topic_column)[["article_count", "avg_sentiment"]] \
+            .rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+        trends["rolling_count"] = rolled["article_count"]
+        trends["rolling_sentiment"] = rolled["avg_sentiment"]
+
+        # Spike detection against the *previous* buckets' EWMA mean/std
+        prev = trends.groupby(topic_column)["article_count"].shift(1)
+        ewm = prev.groupby(trends[topic_column]).ewm(alpha=alpha, adjust=False, ignore_na=True)
+        baseline = ewm.mean().reset_index(level=0, drop=True)
+        spread = np.sqrt(ewm.var(bias=True).reset_index(level=0, drop=True))
+        trends["ewma_count"] = baseline
+        trends["zscore"] = ((trends["article_count"] - baseline) / spread.replace(0, np.nan)).fillna(0.0)
+        trends["spike_flag"] = trends["zscore"] > z_threshold
+
+        return trends.drop(columns=["sentiment_sum"])
+
+class TrendState:
+    """
+    Incremental trend engine.
+
+    Keeps, per topic, the most recent buckets (the last `window` plus a
+    reorder window of `reorder_buckets`) and the EWMA mean/variance of the
+    bucket counts before them, so `update()` costs O(new articles + retained
+    buckets) instead of recomputing history. Batches need not be time-ordered:
+    articles for any retained bucket are merged into it (or open a new bucket
+    in a gap), and that bucket and every later one are recomputed and
+    re-emitted. Articles older than the retained buckets can no longer be
+    placed; they are counted in `late` instead.
+    """
+
+    def __init__(self, window=3, bucket=TREND_BUCKET, z_threshold=TREND_SPIKE_Z, alpha=TREND_EWMA_ALPHA,
+                 reorder_buckets=TREND_REORDER_BUCKETS, date_column="published_at", topic_column="topic",
+                 sentiment_column="sentiment"):
+        self.window = window
+        self.bucket = bucket
+        self.z_threshold = z_threshold
+        self.alpha = alpha
+        self.reorder_buckets = reorder_buckets
+        self.date_column = date_column
+        self.topic_column = topic_column
+        self.sentiment_column = sentiment_column
+        # topic -> {"buckets": [[time, count, sentiment_sum], ...] in time order,
+        #           "mean", "var", "n": EWMA baseline over the buckets dropped before them}
+        self.topics = {}
+        self.late = 0  # Articles that arrived after their bucket was dropped
+
+    def __setstate__(self, state):
+        # States pickled before the reorder window kept the retained buckets in
+        # a deque with the EWMA already covering all but the open bucket
+        self.__dict__.update(state)
+        self.__dict__.setdefault("reorder_buckets", TREND_REORDER_BUCKETS)
+        self.__dict__.setdefault("late", 0)
+        for topic_state in self.topics.values():
+            if not isinstance(topic_state["buckets"], list):
+                topic_state["buckets"] = [list(topic_state["buckets"][-1])] if topic_state["buckets"] else []
+
+    def _fold(self, stats, count):
+        # Fold a bucket's count into an EWMA baseline (mean, var, n)
+        mean, var, n = stats
+        if n == 0:
+            return float(count), 0.0, 1
+        diff = count - mean
+        incr = self.alpha * diff
+        return mean + incr, (1 - self.alpha) * (var + diff * incr), n + 1
 
-    # Ensure date is in datetime format
-    df[date_column] = pd.to_datetime(df[date_column], errors="coerce")
+    def _stats_row(self, topic, buckets, i, stats):
+        when, count, sentiment_sum = buckets[i]
+        recent = buckets[max(0, i - self.window + 1):i + 1]
+        mean, var, n = stats
+        std = np.sqrt(var) if n > 1 else np.nan
+        zscore = (count - mean) / std if n > 1 and std > 0 else 0.0
+        return {
+            self.topic_column: topic,
+            self.date_column: when,
+            "article_count": count,
+            "avg_sentiment": sentiment_sum / count,
+            "rolling_count": float(np.mean([b[1] for b in recent])),
+            "rolling_sentiment": float(np.mean([b[2] / b[1] for b in recent])),
+            "ewma_count": mean if n > 0 else np.nan,
+            "zscore": float(zscore),
+            "spike_flag": bool(zscore > self.z_threshold),
+        }
 
-    # Remove rows with invalid dates
-    df = df.dropna(subset=[date_column])
+    def _place(self, state, when, count, sentiment_sum):
+        """Merge a (bucket, count, sentiment) into the retained buckets; index touched, or None if too old."""
+        buckets = state["buckets"]
+        times = [b[0] for b in buckets]
+        # Once buckets have been dropped, the first `window - 1` retained ones
+        # only feed rolling means and can no longer change
+        earliest = times[min(self.window, len(times)) - 1] if state["n"] and times else None
+        if earliest is not None and when < earliest:
+            return None
+        i = bisect_left(times, when)
+        if i < len(buckets) and times[i] == when:
+            buckets[i][1] += count
+            buckets[i][2] += sentiment_sum
+        else:
+            buckets.insert(i, [when, count, sentiment_sum])
+        return i
 
-    # Group by topic and date
-    trends = df.groupby([topic_column, date_column]).agg(
-        article_count=pd.NamedAgg(column=topic_column, aggfunc="count"),
-        avg_sentiment=pd.NamedAgg(column=sentiment_column, aggfunc=lambda x: np.mean([sentiment_to_score(s) for s in x]))
-    ).reset_index()
+    def _emit(self, topic, state, start):
+        """Trend rows for buckets[start:], then drop buckets beyond the retention."""
+        buckets = state["buckets"]
+        stats = (state["mean"], state["var"], state["n"])
+        rows = []
+        for i in range(len(buckets)):
+            if i >= start:
+                rows.append(self._stats_row(topic, buckets, i, stats))
+            stats = self._fold(stats, buckets[i][1])
+        while len(buckets) > self.window + self.reorder_buckets:
+            state["mean"], state["var"], state["n"] = self._fold((state["mean"], state["var"], state["n"]),
+                                                                  buckets.pop(0)[1])
+        return rows
 
-    # Sort for rolling calculation
-    trends = trends.sort_values(by=[topic_column, date_column])
+    def update(self, df):
+        """
+        Add a batch of articles (in any time order).
 
-    # Rolling averages to detect spikes/dips
-    trends["rolling_count"] = trends.groupby(topic_column)["article_count"].transform(lambda x: x.rolling(window, min_periods=1).mean())
-    trends["rolling_sentiment"] = trends.groupby(topic_column)["avg_sentiment"].transform(lambda x: x.rolling(window, min_periods=1).mean())
+        Returns:
+            pd.DataFrame: Trend rows for every (topic, bucket) touched by the
+            batch and every later bucket of those topics.
+        """
+        batch = _bucketed(df, self.date_column, self.topic_column, self.sentiment_column, self.bucket)
+        touched = {}  # topic -> earliest bucket index changed
+        for topic, when, count, sentiment_sum in batch.itertuples(index=False):
+            state = self.topics.setdefault(topic, {"buckets": [], "mean": 0.0, "var": 0.0, "n": 0})
+            i = self._place(state, when, int(count), float(sentiment_sum))
+            if i is None:
+                self.late += int(count)
+                continue
+            touched[topic] = min(i, touched.get(topic, i))
 
-    # Flag significant spikes
-    trends["spike_flag"] = trends["article_count"] > (trends["rolling_count"] * 1.5)
+        rows = []
+        for topic, start in touched.items():
+            rows.extend(self._emit(topic, self.topics[topic], start))
 
-    return trends
+        if not rows:
+            return pd.DataFrame(columns=[self.topic_column, self.date_column] + TREND_COLUMNS)
+        return pd.DataFrame(rows)
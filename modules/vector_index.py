@@ -0,0 +1,397 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from config import ARTICLE_STORE_DB, VECTOR_INDEX_DIR, VECTOR_INDEX_IVF_MIN_ROWS, VECTOR_INDEX_NPROBE, VECTOR_INDEX_BRUTE_FORCE_MAX
+
+# Sentiment labels are stored as small integer codes for vectorized filtering
+SENTIMENT_CODES = {"Negative": 0, "Neutral": 1, "Positive": 2}
+
+def _to_ns(ts):
+    """UTC nanoseconds since epoch (naive timestamps are taken as UTC)."""
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+    return ts.value
+
+class VectorIndex:
+    """
+    Local cosine-similarity index over article embeddings, persisted to disk.
+
+    Vectors are L2-normalized float32 rows in a memory-mapped, capacity-doubling
+    matrix; per-row metadata (published time, category, sentiment) lives in
+    NumPy arrays so filters are vectorized masks. Small indexes and selective
+    filters are scanned exactly; once the index is large it is partitioned
+    into IVF cells (FAISS IndexIVFFlat-style) and only the cells nearest the
+    query are scored.
+
+    The files may be shared by several processes (the dashboard and a
+    `newspulse schedule` process): writers hold an inter-process lock
+    (`exclusive()`) and reload the other processes' additions first, and
+    readers reload whenever the saved metadata changed (`refresh()`).
+    """
+
+    def __init__(self, path=VECTOR_INDEX_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self._vectors = None
+        self._size = 0
+        self.article_ids = np.array([], dtype=object)
+        self.published = np.array([], dtype="int64")       # ns since epoch (NaT -> min int)
+        self.category_codes = np.array([], dtype="int32")  # index into self.categories (-1 = none)
+        self.sentiment_codes = np.array([], dtype="int8")   # SENTIMENT_CODES (-1 = none)
+        self.categories = []
+        self._row_of = {}
+        self.version = 0        # Bumped on every add (corpus fingerprint for downstream caches)
+        self.centroids = None   # IVF cell centroids (None until the index is large enough)
+        self.list_of = None     # IVF cell of each row
+        self._trained_size = 0
+        self._lists = None
+        self._signature = None  # (mtime, size) of the metadata file this state was loaded from / saved to
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, "vectors.npy")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.npz")
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        signature = self._file_signature()
+        if signature is None:
+            return
+        self._signature = signature
+        meta = np.load(self._meta_path, allow_pickle=True)
+        self.article_ids = meta["article_ids"]
+        self.published = meta["published"]
+        self.category_codes = meta["category_codes"]
+        self.sentiment_codes = meta["sentiment_codes"]
+        self.categories = json.loads(str(meta["categories"]))
+        self._size = len(self.article_ids)
+        self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+        self._row_of = {a: i for i, a in enumerate(self.article_ids)}
+        self.version = int(meta["version"]) if "version" in meta.files else 0
+        if "centroids" in meta.files:
+            self.centroids = meta["centroids"]
+            self.list_of = meta["list_of"]
+            self._trained_size = int(meta["trained_size"])
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if self._vectors is not None:
+                self._vectors.flush()
+            tmp = self._meta_path + ".tmp.npz"
+            np.savez(
+                tmp,
+                article_ids=self.article_ids,
+                published=self.published,
+                category_codes=self.category_codes,
+                sentiment_codes=self.sentiment_codes,
+                categories=np.array(json.dumps(self.categories)),
+                version=np.array(self.version),
+                **({} if self.centroids is None else {
+                    "centroids": self.centroids,
+                    "list_of": self.list_of,
+                    "trained_size": np.array(self._trained_size),
+                })
+            )
+            os.replace(tmp, self._meta_path)
+            self._signature = self._file_signature()
+
+    def refresh(self):
+        """Reload the index if another process saved it since it was loaded."""
+        with self._lock:
+            if self._file_signature() != self._signature:
+                self._reset()
+                self._load()
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Hold the index's inter-process write lock (a SQLite write transaction
+        on a lock file next to it) with the latest saved state loaded, so an
+        add() + save() inside never overwrites another process's additions.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(self.path, "write.lock"), timeout=300, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            with self._lock:
+                self.refresh()
+                yield self
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+    def _ensure_capacity(self, rows, dim):
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if rows <= capacity:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        new_capacity = max(rows, capacity * 2, 1024)
+        tmp_path = self._vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, dim))
+        if self._size:
+            grown[:self._size] = self._vectors[:self._size]
+        grown.flush()
+        del grown
+        self._vectors = None
+        os.replace(tmp_path, self._vectors_path)
+        self._vectors = np.load(self._vectors_path, mmap_mode="r+")
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def add(self, df, embeddings, id_column="article_id"):
+        """
+        Add or replace articles.
+
+        Parameters:
+            df (pd.DataFrame): Articles with 'article_id' and optional 'published_at',
+                'category' and 'sentiment' columns (used for filtering).
+            embeddings (np.ndarray): One embedding per row of df.
+        """
+        if df.empty:
+            return 0
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        ids = df[id_column].tolist()
+        published = pd.to_datetime(df["published_at"], errors="coerce", utc=True) \
+            if "published_at" in df.columns else pd.Series(pd.NaT, index=df.index)
+        published = published.to_numpy(dtype="datetime64[ns]").astype("int64")
+        categories = df["category"].tolist() if "category" in df.columns else [None] * len(df)
+        sentiments = df["sentiment"].tolist() if "sentiment" in df.columns else [None] * len(df)
+
+        with self._lock:
+            # Later duplicates win; existing ids are overwritten in place, new ids appended
+            latest = {article_id: i for i, article_id in enumerate(ids)}
+            n_new = sum(1 for a in latest if a not in self._row_of)
+            self._ensure_capacity(self._size + n_new, vectors.shape[1])
+
+            if n_new:
+                self.article_ids = np.concatenate([self.article_ids, np.empty(n_new, dtype=object)])
+                self.published = np.concatenate([self.published, np.zeros(n_new, dtype="int64")])
+                self.category_codes = np.concatenate([self.category_codes, np.full(n_new, -1, dtype="int32")])
+                self.sentiment_codes = np.concatenate([self.sentiment_codes, np.full(n_new, -1, dtype="int8")])
+
+            rows = []
+            for article_id in latest:
+                if article_id not in self._row_of:
+                    self._row_of[article_id] = self._size
+                    self._size += 1
+                rows.append(self._row_of[article_id])
+            rows = np.asarray(rows)
+            src = list(latest.values())
+
+            self._vectors[rows] = vectors[src]
+            self.article_ids[rows] = [ids[i] for i in src]
+            self.published[rows] = published[src]
+            self.category_codes[rows] = [self._category_code(categories[i]) for i in src]
+            self.sentiment_codes[rows] = [SENTIMENT_CODES.get(sentiments[i], -1) for i in src]
+            self._update_ivf(rows)
+            self.version += 1
+        return len(rows)
+
+    def _category_code(self, category):
+        if category is None or (isinstance(category, float) and np.isnan(category)):
+            return -1
+        if category not in self.categories:
+            self.categories.append(category)
+        return self.categories.index(category)
+
+    # -----------------------------
+    # Filters
+    # -----------------------------
+    def _mask(self, start=None, end=None, category=None, sentiment=None, article_ids=None):
+        n = self._size
+        mask = np.ones(n, dtype=bool)
+        if start is not None:
+            mask &= self.published >= _to_ns(start)
+        if end is not None:
+            mask &= self.published <= _to_ns(end)
+        if category is not None:
+            code = self.categories.index(category) if category in self.categories else -2
+            mask &= self.category_codes == code
+        if sentiment is not None:
+            mask &= self.sentiment_codes == SENTIMENT_CODES.get(sentiment, -2)
+        if article_ids is not None:
+            allowed = np.zeros(n, dtype=bool)
+            rows = [self._row_of[a] for a in article_ids if a in self._row_of]
+            allowed[rows] = True
+            mask &= allowed
+        return mask
+
+    # -----------------------------
+    # Coarse quantizer (IVF)
+    # -----------------------------
+    def _assign(self, rows):
+        """Nearest centroid for each row (blockwise to bound memory)."""
+        out = np.empty(len(rows), dtype="int32")
+        for b in range(0, len(rows), 65536):
+            block = self._vectors[rows[b:b + 65536]]
+            out[b:b + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return out
+
+    def train_ivf(self, iters=8, seed=0):
+        """
+        Partition the vectors into ~sqrt(n) cells with spherical k-means, so a
+        search only scores the rows in the `nprobe` cells nearest the query.
+        """
+        with self._lock:
+            n = self._size
+            nlist = max(1, int(np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            sample = np.asarray(self._vectors[np.sort(rng.choice(n, min(n, nlist * 32), replace=False))])
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(iters):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                order = np.argsort(assign, kind="stable")
+                nonempty = np.bincount(assign, minlength=nlist) > 0
+                starts = np.searchsorted(assign[order], np.flatnonzero(nonempty))
+                centroids[nonempty] = np.add.reduceat(sample[order], starts, axis=0)
+                centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+            self.centroids = centroids.astype(np.float32)
+            self.list_of = self._assign(np.arange(n))
+            self._trained_size = n
+            self._lists = None
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.list_of, kind="stable")
+            offsets = np.searchsorted(self.list_of[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def _ivf_candidates(self, q, nprobe):
+        order, offsets = self._inverted_lists()
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+        return np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+
+    def _update_ivf(self, rows):
+        """Keep the quantizer current after an add (retrain once the index has doubled)."""
+        if self.centroids is None:
+            if self._size >= VECTOR_INDEX_IVF_MIN_ROWS:
+                self.train_ivf()
+            return
+        if self._size >= 2 * self._trained_size:
+            self.train_ivf()
+            return
+        if len(self.list_of) < self._size:
+            self.list_of = np.concatenate([self.list_of, np.zeros(self._size - len(self.list_of), dtype="int32")])
+        self.list_of[rows] = self._assign(rows)
+        self._lists = None
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def search(self, query_vector, k=5, start=None, end=None, category=None, sentiment=None,
+               article_ids=None, nprobe=VECTOR_INDEX_NPROBE):
+        """
+        Top-k most similar articles that pass the filters.
+
+        Parameters:
+            query_vector (np.ndarray): Query embedding (normalized internally).
+            k (int): Number of results.
+            start, end (datetime-like): 'published_at' bounds.
+            category, sentiment (str): Equality filters.
+            article_ids (iterable): Restrict to these articles (e.g. from the entity index).
+            nprobe (int): IVF cells scanned (only once the index is large enough to be partitioned).
+
+        Returns:
+            pd.DataFrame: 'article_id' and cosine 'score', best first.
+        """
+        empty = pd.DataFrame(columns=["article_id", "score"])
+        with self._lock:
+            if self._size == 0:
+                return empty
+            q = np.asarray(query_vector, dtype=np.float32).ravel()
+            q = q / (np.linalg.norm(q) or 1.0)
+
+            filtered = any(f is not None for f in (start, end, category, sentiment, article_ids))
+            mask = self._mask(start, end, category, sentiment, article_ids) if filtered else None
+
+            if mask is not None and mask.sum() <= VECTOR_INDEX_BRUTE_FORCE_MAX:
+                # Selective filters: exact scan of the passing rows only
+                rows = np.flatnonzero(mask)
+            elif self.centroids is not None:
+                # Approximate: scan the nearest cells, widening until k rows pass the filters
+                while True:
+                    rows = self._ivf_candidates(q, nprobe)
+                    if mask is not None:
+                        rows = rows[mask[rows]]
+                    if len(rows) >= k or nprobe >= len(self.centroids):
+                        break
+                    nprobe *= 4
+            else:
+                rows = np.flatnonzero(mask) if mask is not None else np.arange(self._size)
+
+            if len(rows) == 0:
+                return empty
+            rows = np.sort(rows)  # Sequential access into the memory map
+            scores = np.asarray(self._vectors[rows]) @ q
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return pd.DataFrame({"article_id": self.article_ids[rows[top]], "score": scores[top]})
+
+    def __len__(self):
+        return self._size
+
+_indexes = {}
+_index_lock = threading.Lock()
+
+def vector_index_path(db_path=ARTICLE_STORE_DB):
+    """
+    Vector index directory belonging to an article store: VECTOR_INDEX_DIR for
+    the default store, a sibling "<store>_vector_index" directory otherwise.
+    """
+    if os.path.abspath(db_path) == os.path.abspath(ARTICLE_STORE_DB):
+        return VECTOR_INDEX_DIR
+    return f"{os.path.splitext(db_path)[0]}_vector_index"
+
+def get_vector_index(path=VECTOR_INDEX_DIR):
+    """Return the process-wide vector index at `path` (reloaded if another process saved it)."""
+    with _index_lock:
+        if path not in _indexes:
+            _indexes[path] = VectorIndex(path)
+        index = _indexes[path]
+    index.refresh()
+    return index
+
+def index_articles(df, text_column="clean_text", path=VECTOR_INDEX_DIR):
+    """
+    Embed analyzed articles and add them to the vector index at `path`
+    (embeddings come from the persistent embedding store, so already-embedded
+    texts are free).
+    """
+    if df.empty:
+        return 0
+    from modules.embedding_store import embed_texts
+    embeddings = embed_texts(df[text_column].fillna("").tolist())
+    index = get_vector_index(path)
+    with index.exclusive():
+        added = index.add(df, embeddings)
+        index.save()
+    return added
@@ -0,0 +1 @@
+"""Headless entry points for News Pulse Analyzer (see ``python -m newspulse --help``)."""
@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+from config import (
+    ARTICLE_STORE_DB, PIPELINE_CHUNK_SIZE, PIPELINE_QUEUE_SIZE, SCHEDULER_INTERVAL, SCHEDULER_PAGE_SIZE,
+    SCHEDULER_CATEGORIES, SCHEDULER_LANGUAGES
+)
+
+def cmd_run(args):
+    from modules.pipeline import Pipeline
+    from utils.metrics import metrics, profiled, write_prometheus
+    pipeline = Pipeline(
+        out=args.out,
+        chunk_size=args.chunk_size,
+        queue_size=args.queue_size,
+        checkpoint_path=args.checkpoint,
+        parallel=args.parallel
+    )
+    with profiled(args.profile) if args.profile else nullcontext():
+        summary = pipeline.run(args.input, resume=not args.no_resume)
+    summary["metrics"] = json.loads(metrics.summary().to_json(orient="records"))
+    if args.metrics_file:
+        write_prometheus(args.metrics_file)
+    print(json.dumps(summary, indent=2))
+
+def cmd_schedule(args):
+    import logging
+    from modules.scheduler import RefreshScheduler
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    scheduler = RefreshScheduler(
+        categories=args.categories,
+        languages=args.languages,
+        interval=args.interval,
+        page_size=args.page_size,
+        db_path=args.out
+    )
+    if args.once:
+        print(json.dumps(scheduler.run_cycle(), indent=2))
+        return
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="newspulse", description="News Pulse Analyzer headless tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Analyze an article file in streaming chunks and write results to the store")
+    run.add_argument("--input", required=True, help="Articles as .csv or .jsonl (one article per line)")
+    run.add_argument("--out", default=ARTICLE_STORE_DB, help="SQLite article store to write (default: %(default)s)")
+    run.add_argument("--chunk-size", type=int, default=PIPELINE_CHUNK_SIZE, help="Articles per chunk")
+    run.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE, help="Chunks buffered between stages")
+    run.add_argument("--checkpoint", help="Checkpoint file (default: <out>.checkpoint.json)")
+    run.add_argument("--parallel", action="store_true",
+                     help="Shard preprocessing/sentiment/NER across process pools (config.STAGE_WORKERS)")
+    run.add_argument("--no-resume", action="store_true", help="Ignore any existing checkpoint and start over")
+    run.add_argument("--profile", metavar="PATH", help="Run under cProfile and dump the stats to PATH (.prof)")
+    run.add_argument("--metrics-file", metavar="PATH", help="Write per-stage metrics in Prometheus text format")
+    run.set_defaults(func=cmd_run)
+
+    schedule = sub.add_parser("schedule", help="Keep the store fresh: poll every category/language pair within quota")
+    schedule.add_argument("--out", default=ARTICLE_STORE_DB, help="SQLite article store to write (default: %(default)s)")
+    schedule.add_argument("--interval", type=int, default=SCHEDULER_INTERVAL, help="Seconds between polling cycles")
+    schedule.add_argument("--page-size", type=int, default=SCHEDULER_PAGE_SIZE,
+                          help="Articles per provider per pair")
+    schedule.add_argument("--categories", nargs="+", default=SCHEDULER_CATEGORIES)
+    schedule.add_argument("--languages", nargs="+", default=SCHEDULER_LANGUAGES)
+    schedule.add_argument("--once", action="store_true", help="Run a single cycle and print its summary")
+    schedule.set_defaults(func=cmd_schedule)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
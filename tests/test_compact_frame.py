@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.compact_frame import compact_frame, decode_ragged, encode_ragged, Vocabulary
+
+def _analyzed(n):
+    return pd.DataFrame({
+        "article_id": [f"a{i}" for i in range(n)],
+        "language": ["en", "hi", None, "en"][:n],
+        "sentiment": ["Positive", np.nan, "Negative", "Positive"][:n],
+        "score": [0.9, 0.1, 0.5, 0.7][:n],
+        "tokens": [["rbi", "rates"], [], ["modi", "visit", "modi"], ["rates"]][:n],
+        "lemmas": [["rbi", "rate"], [], ["modi", "visit", "modi"], ["rate"]][:n],
+        "entities": [[("RBI", "ORG")], [], [("Modi", "PERSON"), ("Delhi", "GPE")], []][:n],
+    })
+
+@pytest.mark.parametrize("n", [0, 1, 4])
+def test_round_trip(n):
+    df = _analyzed(n)
+    restored = compact_frame(df).to_frame()
+    pd.testing.assert_frame_equal(restored, df, check_dtype=False)
+
+def test_round_trip_without_list_columns():
+    df = _analyzed(4).drop(columns=["tokens", "lemmas", "entities"])
+    df["source"] = pd.Series(["bbc", None, "cnn", None], dtype=object)
+    pd.testing.assert_frame_equal(compact_frame(df).to_frame(), df, check_dtype=False)
+
+def test_ragged_round_trip_empty():
+    values, offsets = encode_ragged([], Vocabulary())
+    assert decode_ragged(values, offsets, Vocabulary()) == []
+
+def test_term_counts():
+    compact = compact_frame(_analyzed(4))
+    assert compact.term_counts("lemmas").to_dict() == {"rate": 2, "modi": 2, "rbi": 1, "visit": 1}
+    assert compact.row_terms("tokens", 2) == ["modi", "visit", "modi"]
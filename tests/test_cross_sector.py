@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.cross_sector import StreamingCorrelation, compute_category_correlation
+
+CATEGORIES = ["business", "sports", "technology"]
+
+def _articles(hours=60, seed=3, gaps=()):
+    """Articles with random per-hour counts; `gaps` are hours without any article."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2026-01-01", tz="UTC")
+    rows = []
+    for hour in range(hours):
+        if hour in gaps:
+            continue
+        for category in CATEGORIES:
+            rows += [(start + pd.Timedelta(hours=hour, minutes=int(m)), category)
+                     for m in rng.integers(0, 60, rng.integers(1, 8))]
+    return pd.DataFrame(rows, columns=["published_at", "category"])
+
+def _dense_counts(df):
+    """Hour x category counts with missing hours as zero rows (what the stream sees)."""
+    counts = df.assign(bucket=df["published_at"].dt.floor("h")) \
+        .pivot_table(index="bucket", columns="category", values="published_at", aggfunc="size", fill_value=0)
+    hours = pd.date_range(counts.index.min(), counts.index.max(), freq="h")
+    return counts.reindex(hours, fill_value=0)[CATEGORIES].to_numpy(dtype=float)
+
+def _numpy_lagged(x, lag):
+    k = x.shape[1]
+    lead, behind = (x[lag:], x[:-lag]) if lag else (x, x)
+    return np.array([[np.corrcoef(lead[:, a], behind[:, b])[0, 1] for b in range(k)] for a in range(k)])
+
+def _stream(df, window, chunks=7):
+    state = StreamingCorrelation(bucket="hour", window=window, max_lag=3)
+    df = df.sort_values("published_at", kind="stable")
+    size = -(-len(df) // chunks)
+    for i in range(0, len(df), size):
+        state.update(df.iloc[i:i + size])
+    return state
+
+def test_unbounded_lag_zero_matches_batch():
+    df = _articles()
+    state = _stream(df, window=None)
+    trends = df.assign(published_at=df["published_at"].dt.floor("h")) \
+        .groupby(["published_at", "category"]).size().reset_index(name="article_count")
+    expected = compute_category_correlation(trends)
+    got = state.correlation().loc[expected.index, expected.columns]
+    np.testing.assert_allclose(got.to_numpy(), expected.to_numpy(), atol=1e-9)
+
+@pytest.mark.parametrize("window", [None, 20])
+@pytest.mark.parametrize("lag", [0, 1, 3])
+def test_lagged_correlation_matches_numpy(window, lag):
+    df = _articles(gaps={10, 11, 30})
+    state = _stream(df, window=window)
+    counts = _dense_counts(df)
+    if window is not None:
+        counts = counts[-window:]
+    got = state.correlation(lag)[CATEGORIES].loc[CATEGORIES].to_numpy()
+    np.testing.assert_allclose(got, _numpy_lagged(counts, lag), atol=1e-9)
+
+def test_late_articles_are_ignored():
+    df = _articles(hours=10)
+    state = _stream(df, window=None)
+    before = state.correlation().to_numpy()
+    state.update(df.iloc[:5])  # Older than the open bucket
+    assert state.late == 5
+    np.testing.assert_allclose(state.correlation().to_numpy(), before)
+
+def test_lag_beyond_max_lag_is_rejected():
+    with pytest.raises(ValueError):
+        StreamingCorrelation(bucket="hour", max_lag=2).correlation(3)
@@ -0,0 +1,32 @@
+import pandas as pd
+from modules.dedup import assign_clusters, cluster_heads, representatives
+from modules.pipeline import prepare_articles
+
+BODY = ("The central bank raised interest rates by a quarter point on Thursday citing "
+        "persistent inflation in food and fuel prices across the country")
+
+def _articles(rows):
+    return prepare_articles(pd.DataFrame(rows, columns=["url", "title", "content"]))
+
+def test_copy_in_later_batch_is_not_a_representative(tmp_path):
+    db = str(tmp_path / "store.db")
+    first = assign_clusters(_articles([
+        ("http://a.com/1", "RBI raises rates again - Reuters", BODY),
+    ]), db_path=db)
+    later = assign_clusters(_articles([
+        ("http://b.com/1", "RBI raises rates again - BBC", BODY),
+        ("http://b.com/2", "Elections announced in five states", "Polling dates were announced today"),
+        ("http://b.com/3", "Elections announced in five states - AP", "Polling dates were announced today"),
+    ]), db_path=db)
+
+    assert later["cluster_id"].iloc[0] == first["cluster_id"].iloc[0]
+    assert later["is_representative"].tolist() == [False, True, False]
+    # Each cluster is still analyzed once within the frame
+    assert len(cluster_heads(later)) == 2
+    assert len(representatives(later)) == 1
+
+def test_reanalyzed_original_stays_representative(tmp_path):
+    db = str(tmp_path / "store.db")
+    frame = _articles([("http://a.com/1", "RBI raises rates again - Reuters", BODY)])
+    assign_clusters(frame, db_path=db)
+    assert assign_clusters(frame, db_path=db)["is_representative"].tolist() == [True]
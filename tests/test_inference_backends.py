@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import modules.inference_backends as backends
+
+class _StubSentiment:
+    """Pipeline-like stub: label from the text length, score offset per backend."""
+
+    def __init__(self, offset):
+        self.offset = offset
+
+    def __call__(self, texts, batch_size=None, truncation=None, max_length=None):
+        return [{"label": f"{len(t) % 5 + 1} stars", "score": 0.5 + self.offset} for t in texts]
+
+class _StubEncoder:
+    def __init__(self, noise):
+        self.noise = noise
+
+    def encode(self, texts, batch_size=None, normalize_embeddings=False):
+        vectors = np.array([[len(t), t.count(" ") + 1, 1.0] for t in texts]).reshape(-1, 3) + self.noise
+        if normalize_embeddings:
+            vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
+
+@pytest.fixture
+def stub_backends(monkeypatch):
+    monkeypatch.setattr(backends, "load_sentiment_backend",
+                        lambda name: _StubSentiment(0.0 if name == backends.REFERENCE_BACKEND else 0.01))
+    monkeypatch.setattr(backends, "load_embedding_backend",
+                        lambda name: _StubEncoder(0.0 if name == backends.REFERENCE_BACKEND else 0.001))
+
+TEXTS = ["Markets rallied today.", "Floods hit the region", "Team wins final", ""]
+
+def test_sentiment_parity(stub_backends):
+    report = backends.check_sentiment_parity(TEXTS, "pytorch-int8")
+    assert report["label_agreement"] == 1.0
+    assert report["max_score_diff"] == pytest.approx(0.01)
+    assert report["n_texts"] == len(TEXTS)
+
+def test_embedding_parity(stub_backends):
+    report = backends.check_embedding_parity(TEXTS, "onnx")
+    assert 0.999 < report["min_cosine"] <= report["mean_cosine"] <= 1.0 + 1e-9
+    assert backends.check_embedding_parity([], "onnx")["mean_cosine"] == 1.0
+
+@pytest.mark.parametrize("task", ["sentiment", "embedding"])
+def test_benchmark_throughput(stub_backends, task):
+    report = backends.benchmark_throughput(task, "pytorch", TEXTS, batch_size=2, repeats=2)
+    assert report["n_texts"] == len(TEXTS) and report["texts_per_sec"] > 0
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        backends.load_sentiment_backend("tensorrt")
+    with pytest.raises(ValueError):
+        backends.benchmark_throughput("translation", "pytorch", TEXTS)
+
+def test_int8_quantization_keeps_predictions():
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    # Tiny randomly initialized classifier: no download needed
+    config = transformers.BertConfig(vocab_size=100, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                                     intermediate_size=64, num_labels=5)
+    torch.manual_seed(0)
+    model = transformers.BertForSequenceClassification(config).eval()
+    quantized = backends._quantize(model)
+    inputs = torch.randint(0, 100, (16, 12))
+    with torch.no_grad():
+        ref = torch.softmax(model(input_ids=inputs).logits, dim=-1)
+        out = torch.softmax(quantized(input_ids=inputs).logits, dim=-1)
+    assert (ref - out).abs().max().item() < 0.05
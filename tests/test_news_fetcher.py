@@ -0,0 +1,126 @@
+import time
+import pytest
+from benchmarks.stub_server import StubNewsServer
+from modules import news_fetcher
+from modules.news_fetcher import ResponseCache, get_news_batch, get_quota
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    """Point the fetcher at a stub server, with fresh quotas and an empty response cache."""
+    with StubNewsServer(latency_ms=300) as server:
+        monkeypatch.setattr(news_fetcher, "NEWSAPI_BASE_URL", server.newsapi_url)
+        monkeypatch.setattr(news_fetcher, "NEWSDATA_BASE_URL", server.newsdata_url)
+        monkeypatch.setattr(news_fetcher, "RATE_LIMIT_DB", str(tmp_path / "rate_limits.db"))
+        monkeypatch.setattr(news_fetcher, "_buckets", {})
+        monkeypatch.setattr(news_fetcher, "_response_cache",
+                            ResponseCache(ttl=60, stale_ttl=60, disk_path=str(tmp_path / "responses.db")))
+        yield server
+
+def _age(cache, seconds):
+    # Backdate every in-memory entry as if it was stored `seconds` ago
+    for entry in cache._memory.values():
+        entry["stored_at"] = time.time() - seconds
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+# -----------------------------
+# Stale-while-revalidate
+# -----------------------------
+def test_fresh_entries_are_served_without_a_request(stub):
+    first = get_news_batch(["business"], ["de"])  # German: NewsAPI only, one request
+    second = get_news_batch(["business"], ["de"])
+    assert stub.requests_served == 1
+    assert second.equals(first)
+    assert news_fetcher.get_cache_stats()["hits"] == 1
+
+def test_stale_entry_is_served_while_it_revalidates(stub):
+    first = get_news_batch(["business"], ["de"])
+    cache = news_fetcher.get_response_cache()
+    _age(cache, cache.ttl + 1)
+
+    started = time.monotonic()
+    stale = get_news_batch(["business"], ["de"])
+    elapsed = time.monotonic() - started
+
+    # Answered from the stale copy, before the revalidation request completes
+    assert stale.equals(first)
+    assert elapsed < 0.3
+    assert cache.stats()["stale_hits"] == 1
+
+    # The background refetch refreshes the entry; the next lookup is a plain hit
+    assert _wait_for(lambda: stub.requests_served == 2)
+    assert _wait_for(lambda: not cache._revalidating)
+    get_news_batch(["business"], ["de"])
+    assert stub.requests_served == 2
+    assert cache.stats()["hits"] == 1
+
+def test_expired_entry_is_refetched_synchronously(stub):
+    get_news_batch(["business"], ["de"])
+    cache = news_fetcher.get_response_cache()
+    _age(cache, cache.ttl + cache.stale_ttl + 1)
+
+    get_news_batch(["business"], ["de"])
+    assert stub.requests_served == 2
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["stale_hits"] == 0
+
+# -----------------------------
+# LRU eviction
+# -----------------------------
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, disk_path=None)
+    for key in ("a", "b"):
+        cache.put(key, {"payload": key, "stored_at": time.time()})
+    cache.get("a")  # "b" is now the least recently used
+    cache.put("c", {"payload": "c", "stored_at": time.time()})
+
+    assert cache.get("b") is None
+    assert cache.get("a")["payload"] == "a"
+    assert cache.get("c")["payload"] == "c"
+    assert cache.stats()["entries"] == 2
+
+def test_evicted_entries_are_reloaded_from_disk(stub, tmp_path, monkeypatch):
+    cache = ResponseCache(max_entries=2, disk_path=str(tmp_path / "lru.db"))
+    monkeypatch.setattr(news_fetcher, "_response_cache", cache)
+
+    get_news_batch(["business", "sports", "science"], ["de"])
+    assert stub.requests_served == 3
+    assert cache.stats()["entries"] == 2
+
+    # The first category fell out of memory but is still on disk: no new request
+    get_news_batch(["business"], ["de"])
+    assert stub.requests_served == 3
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["entries"] == 2
+
+# -----------------------------
+# Provider quota
+# -----------------------------
+def _too_many_requests(handler):
+    with handler._count_lock:
+        type(handler).requests_served += 1
+    handler.send_response(429)
+    handler.send_header("Content-Type", "application/json")
+    handler.end_headers()
+    handler.wfile.write(b'{"status": "error", "code": "rateLimited"}')
+
+def test_provider_429_drains_the_bucket(stub, monkeypatch):
+    monkeypatch.setattr(stub.handler, "do_GET", _too_many_requests)
+
+    df = get_news_batch(["business"], ["de"], use_cache=False)
+    assert df.empty
+    assert stub.requests_served == 1  # Not retried
+    assert get_quota("newsapi").available() < 1
+    assert get_quota("newsdataio").available() == pytest.approx(10, abs=0.1)
+
+    # Every caller backs off until the bucket refills: nothing reaches the provider
+    started = time.monotonic()
+    assert get_news_batch(["sports"], ["de"], use_cache=False).empty
+    assert stub.requests_served == 1
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,49 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from modules.pipeline import Pipeline
+
+class _MemoryPipeline(Pipeline):
+    """Pipeline whose sink only collects chunks (no store or index writes)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stored = []
+
+    def _sink(self, df, trend_state):
+        self.stored.append(len(df))
+
+def _slow_stage(df):
+    # Slower than the queue put timeout, so producers find full queues
+    time.sleep(0.3)
+    return df
+
+def _failing_stage(df):
+    if df["n"].iloc[0] >= 3:
+        raise ValueError("stage failed")
+    return df
+
+@pytest.mark.parametrize("position", [0, 1, 2])
+def test_failing_stage_stops_the_run(tmp_path, position):
+    path = tmp_path / "articles.csv"
+    pd.DataFrame({"n": range(50), "title": "t", "content": "c"}).to_csv(path, index=False)
+    stages = [("slow-1", _slow_stage), ("slow-2", _slow_stage)]
+    stages.insert(position, ("failing", _failing_stage))
+    pipeline = _MemoryPipeline(out=str(tmp_path / "store.db"), chunk_size=1, queue_size=1, stages=stages)
+
+    outcome = {}
+    def run():
+        try:
+            pipeline.run(str(path), resume=False)
+        except Exception as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive(), "pipeline deadlocked after a stage failed"
+    assert isinstance(outcome.get("error"), RuntimeError)
+    assert isinstance(outcome["error"].__cause__, ValueError)
+    assert "failing" in str(outcome["error"])
+    assert sum(pipeline.stored) <= 3
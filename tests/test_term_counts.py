@@ -0,0 +1,22 @@
+import pandas as pd
+from modules.term_counts import TermCounter
+
+def _frame(ids):
+    lemmas = {1: ["rate", "bank"], 2: ["rate", "cricket"], 3: ["election", "rate"], 4: ["bank", "2024", "a"]}
+    return pd.DataFrame({"article_id": ids, "lemmas": [lemmas[i] for i in ids]})
+
+def test_sync_matches_a_fresh_count():
+    terms = TermCounter()
+    terms.add(_frame([1, 2, 3]))
+    assert terms.sync(_frame([2, 3, 4])) == (1, 1)
+
+    fresh = TermCounter()
+    fresh.add(_frame([2, 3, 4]))
+    assert terms.counts == fresh.counts
+    assert terms.top(1) == {"rate": 2}
+    assert "2024" not in terms.counts and "a" not in terms.counts
+
+def test_articles_are_counted_once():
+    terms = TermCounter()
+    assert terms.add(_frame([1, 1, 2])) == 2
+    assert terms.counts["rate"] == 2
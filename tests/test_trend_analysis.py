@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.trend_analysis import TrendState, detect_trends, TREND_COLUMNS
+
+KEY = ["topic", "published_at"]
+
+def _articles(n=400, hours=40, seed=1):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "published_at": pd.Timestamp("2026-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, hours * 3600, n), unit="s"),
+        "topic": rng.integers(0, 4, n),
+        "sentiment": rng.choice(["Positive", "Negative", "Neutral"], n),
+    })
+
+def _feed(state, df, chunks):
+    size = -(-len(df) // chunks)
+    emitted = [state.update(df.iloc[i:i + size]) for i in range(0, len(df), size)]
+    # Re-emitted buckets supersede earlier rows for the same (topic, bucket)
+    return pd.concat(emitted).drop_duplicates(KEY, keep="last").set_index(KEY).sort_index()
+
+def _assert_matches_batch(got, df):
+    expected = detect_trends(df).set_index(KEY).sort_index()
+    assert got.index.equals(expected.index)
+    numeric = [c for c in TREND_COLUMNS if c != "spike_flag"]
+    np.testing.assert_allclose(got[numeric].astype(float), expected[numeric].astype(float), atol=1e-9)
+    assert (got["spike_flag"].astype(bool) == expected["spike_flag"].astype(bool)).all()
+
+@pytest.mark.parametrize("reorder_buckets", [0, 48])
+def test_in_order_chunks_match_batch(reorder_buckets):
+    df = _articles().sort_values("published_at", kind="stable")
+    state = TrendState(reorder_buckets=reorder_buckets)
+    _assert_matches_batch(_feed(state, df, chunks=10), df)
+    assert state.late == 0
+
+def test_out_of_order_within_reorder_window_matches_batch():
+    df = _articles()
+    state = TrendState(reorder_buckets=48)  # Covers the whole 40-hour span
+    _assert_matches_batch(_feed(state, df.sample(frac=1, random_state=2), chunks=10), df)
+    assert state.late == 0
+
+def test_articles_older_than_the_reorder_window_are_counted_as_late():
+    df = _articles()
+    state = TrendState(reorder_buckets=2)
+    got = _feed(state, df.sample(frac=1, random_state=2), chunks=10)
+    assert state.late > 0
+    assert got["article_count"].sum() + state.late == len(df)
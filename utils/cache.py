@@ -0,0 +1,108 @@
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+
+# -----------------------------
+# Hashing
+# -----------------------------
+def content_hash(*parts) -> str:
+    """Stable SHA-256 hex digest over the string form of all parts."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")  # Separator so ("ab", "c") != ("a", "bc")
+    return h.hexdigest()
+
+# -----------------------------
+# SQLite-backed key/value cache
+# -----------------------------
+class DiskCache:
+    """
+    Small persistent key/value store on SQLite.
+
+    Values are pickled; every entry records when it was stored so callers
+    can apply their own TTL policy. Safe to share between threads.
+    """
+
+    def __init__(self, path, max_entries=None, prune_every=64):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, stored_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_stored_at ON cache (stored_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """Return (value, stored_at) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys that are present."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+            found.update((k, pickle.loads(v)) for k, v in rows)
+        return found
+
+    def set(self, key, value, stored_at=None):
+        self.set_many({key: value}, stored_at=stored_at)
+
+    def set_many(self, items, stored_at=None):
+        """Store a {key: value} mapping in one transaction."""
+        if not items:
+            return
+        stored_at = time.time() if stored_at is None else stored_at
+        rows = [(k, pickle.dumps(v, protocol=pickle.HIGHEST_PROTOCOL), stored_at) for k, v in items.items()]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (key, value, stored_at) VALUES (?, ?, ?)", rows
+                )
+            self._writes += len(rows)
+            if self.max_entries and self._writes >= self.prune_every:
+                self._writes = 0
+                self._prune()
+
+    def delete(self, key):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _prune(self):
+        # Oldest entries beyond max_entries are dropped (caller holds the lock)
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
@@ -0,0 +1,274 @@
+import cProfile
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from config import METRICS_TRACE_MEMORY, METRICS_HISTORY, METRICS_PROM_FILE
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# -----------------------------
+# Stage metrics registry
+# -----------------------------
+def _max_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+
+class StageRun:
+    """One timed execution of a stage; returned by `track()` so the stage can report counts."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.items = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.seconds = None
+        self.peak_bytes = None
+        self.rss_growth = None
+
+    def count(self, items):
+        self.items += int(items)
+
+    def cache(self, hits=0, misses=0):
+        self.cache_hits += int(hits)
+        self.cache_misses += int(misses)
+
+class StageMetrics:
+    """
+    Process-wide per-stage counters: calls, wall time, items, cache hits and
+    peak memory, plus the most recent runs.
+
+    Peak memory is the tracemalloc peak of the stage when
+    config.METRICS_TRACE_MEMORY is on (costly; off by default) and always the
+    growth of the process's max RSS during the stage, which is non-zero only
+    when the stage pushed the process to a new high-water mark.
+    Safe to update from several threads.
+    """
+
+    def __init__(self, history=METRICS_HISTORY, trace_memory=METRICS_TRACE_MEMORY):
+        self.trace_memory = trace_memory
+        self._stages = {}
+        self._recent = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def _totals(self, stage):
+        return self._stages.setdefault(stage, {
+            "calls": 0, "seconds": 0.0, "last_seconds": 0.0, "items": 0,
+            "cache_hits": 0, "cache_misses": 0, "peak_bytes": None, "rss_growth": 0,
+        })
+
+    @contextmanager
+    def track(self, stage, items=None):
+        """
+        Time a block as one run of `stage`.
+
+        Parameters:
+            stage (str): Stage name ("sentiment", "topics.fit", ...).
+            items (int or None): Items processed (can also be added with run.count()).
+
+        Yields:
+            StageRun: Report items/cache hits on it while the block runs.
+        """
+        run = StageRun(stage)
+        if items is not None:
+            run.count(items)
+        # Only the outermost traced block owns tracemalloc; nested stages are timed only
+        owns_trace = self.trace_memory and not tracemalloc.is_tracing()
+        if owns_trace:
+            tracemalloc.start()
+        rss_before = _max_rss_bytes()
+        start = time.perf_counter()
+        try:
+            yield run
+        finally:
+            run.seconds = time.perf_counter() - start
+            if owns_trace:
+                run.peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            rss_after = _max_rss_bytes()
+            if rss_before is not None:
+                run.rss_growth = rss_after - rss_before
+            self._add(run)
+
+    def _add(self, run):
+        with self._lock:
+            totals = self._totals(run.stage)
+            totals["calls"] += 1
+            totals["seconds"] += run.seconds
+            totals["last_seconds"] = run.seconds
+            totals["items"] += run.items
+            totals["cache_hits"] += run.cache_hits
+            totals["cache_misses"] += run.cache_misses
+            if run.peak_bytes is not None:
+                totals["peak_bytes"] = max(totals["peak_bytes"] or 0, run.peak_bytes)
+            totals["rss_growth"] += run.rss_growth or 0
+            self._recent.append({
+                "stage": run.stage, "at": time.time(), "seconds": run.seconds, "items": run.items,
+                "cache_hits": run.cache_hits, "cache_misses": run.cache_misses,
+                "peak_bytes": run.peak_bytes, "rss_growth": run.rss_growth,
+            })
+
+    def record_cache(self, stage, hit):
+        """Count one cache lookup for `stage` outside a tracked block (e.g. per HTTP request)."""
+        with self._lock:
+            self._totals(stage)["cache_hits" if hit else "cache_misses"] += 1
+
+    def summary(self):
+        """
+        Per-stage totals.
+
+        Returns:
+            pd.DataFrame: One row per stage with calls, seconds, last_seconds,
+            items, items_per_sec, cache_hits, cache_misses, cache_hit_rate,
+            peak_bytes and rss_growth, slowest stage first.
+        """
+        with self._lock:
+            rows = [dict(stage=stage, **totals) for stage, totals in self._stages.items()]
+        df = pd.DataFrame(rows, columns=["stage", "calls", "seconds", "last_seconds", "items",
+                                         "cache_hits", "cache_misses", "peak_bytes", "rss_growth"])
+        if df.empty:
+            return df
+        df["items_per_sec"] = (df["items"] / df["seconds"]).where(df["seconds"] > 0)
+        lookups = df["cache_hits"] + df["cache_misses"]
+        df["cache_hit_rate"] = (df["cache_hits"] / lookups).where(lookups > 0)
+        return df.sort_values("seconds", ascending=False).reset_index(drop=True)
+
+    def recent(self):
+        """The most recent runs (oldest first) as a DataFrame."""
+        with self._lock:
+            return pd.DataFrame(list(self._recent))
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._recent.clear()
+
+metrics = StageMetrics()
+
+def track(stage, items=None):
+    """Time a block as one run of `stage` in the process-wide registry (see StageMetrics.track)."""
+    return metrics.track(stage, items)
+
+def record_cache(stage, hit):
+    metrics.record_cache(stage, hit)
+
+# -----------------------------
+# Prometheus text exposition
+# -----------------------------
+_PROM_METRICS = [
+    # (metric name, summary column, type, help)
+    ("newspulse_stage_calls_total", "calls", "counter", "Completed runs of the stage"),
+    ("newspulse_stage_seconds_total", "seconds", "counter", "Wall time spent in the stage"),
+    ("newspulse_stage_last_seconds", "last_seconds", "gauge", "Wall time of the stage's latest run"),
+    ("newspulse_stage_items_total", "items", "counter", "Items (articles, texts, requests) processed"),
+    ("newspulse_stage_cache_hits_total", "cache_hits", "counter", "Cache hits in the stage"),
+    ("newspulse_stage_cache_misses_total", "cache_misses", "counter", "Cache misses in the stage"),
+    ("newspulse_stage_peak_bytes", "peak_bytes", "gauge", "Largest traced Python allocation peak of a run"),
+    ("newspulse_stage_rss_growth_bytes_total", "rss_growth", "counter", "Growth of the process max RSS"),
+]
+
+def prometheus_text(registry=None):
+    """Render the registry in the Prometheus text exposition format (version 0.0.4)."""
+    summary = (registry or metrics).summary()
+    lines = []
+    for name, column, kind, help_text in _PROM_METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage, value in zip(summary.get("stage", []), summary.get(column, [])):
+            if pd.notna(value):
+                label = str(stage).replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{name}{{stage="{label}"}} {float(value):g}')
+    max_rss = _max_rss_bytes()
+    if max_rss is not None:
+        lines += ["# HELP newspulse_process_max_rss_bytes Peak resident set size of the process",
+                  "# TYPE newspulse_process_max_rss_bytes gauge",
+                  f"newspulse_process_max_rss_bytes {max_rss}"]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path=METRICS_PROM_FILE, registry=None):
+    """
+    Write the metrics to a .prom file (e.g. for node_exporter's textfile collector).
+
+    The file is replaced atomically so a scraper never reads a partial write.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(registry))
+    os.replace(tmp, path)
+    return path
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve /metrics on a daemon thread (once per process; later calls return the running server)."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+# -----------------------------
+# Profiling hook
+# -----------------------------
+@contextmanager
+def profiled(path=None, top=25):
+    """
+    Run a block under cProfile.
+
+    Only the calling thread is profiled: a profiler can only be switched off
+    from its own thread, so profiling threads started inside the block (pool
+    workers, the scheduler) would leave them profiling after it ends. Work
+    handed to other threads shows up as waiting time here, and the per-stage
+    metrics above time it. The stats are dumped to `path` (a .prof file for
+    pstats/snakeviz) and the `top` functions by cumulative time are printed to
+    stderr. For every thread without instrumentation overhead, run the same
+    command under py-spy instead (py-spy record -o profile.svg -- python -m newspulse ...).
+
+    Parameters:
+        path (str or None): Where to dump the stats (None = print only).
+        top (int): Number of functions to print (0 = none).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            stats.dump_stats(path)
+        if top:
+            stats.sort_stats("cumulative").print_stats(top)
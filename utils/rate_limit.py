@@ -0,0 +1,120 @@
+import random
+import sqlite3
+import threading
+import time
+
+# -----------------------------
+# Token bucket
+# -----------------------------
+class TokenBucket:
+    """
+    Token-bucket rate limiter.
+
+    Holds up to `capacity` tokens, refilled continuously at `refill_per_sec`;
+    each request takes one token. With a `db_path` the bucket state lives in
+    SQLite (one row per bucket name), so every process using the same file
+    (dashboard, scheduler, CLI) draws from one shared quota.
+    """
+
+    def __init__(self, name, capacity, refill_per_sec, db_path=None):
+        self.name = name
+        self.capacity = float(capacity)
+        self.refill_per_sec = float(refill_per_sec)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = time.time()
+        if db_path:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS token_buckets "
+                        "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+                    )
+                    conn.execute("INSERT OR IGNORE INTO token_buckets VALUES (?, ?, ?)",
+                                 (name, self.capacity, time.time()))
+            finally:
+                conn.close()
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def _refilled(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.refill_per_sec)
+
+    def _update(self, fn):
+        """Apply fn(tokens) -> (new_tokens, result) to the refilled state atomically."""
+        with self._lock:
+            now = time.time()
+            if not self.db_path:
+                self._tokens, result = fn(self._refilled(self._tokens, self._updated, now))
+                self._updated = now
+                return result
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")  # Serializes concurrent processes
+                tokens, updated = conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens, result = fn(self._refilled(tokens, updated, now))
+                conn.execute("UPDATE token_buckets SET tokens = ?, updated = ? WHERE name = ?",
+                             (tokens, now, self.name))
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def available(self):
+        """Tokens available right now."""
+        return self._update(lambda tokens: (tokens, tokens))
+
+    def take(self, n=1, timeout=0.0):
+        """
+        Take n tokens, waiting up to `timeout` seconds for them to refill.
+
+        Returns:
+            bool: True if the tokens were taken.
+        """
+        deadline = time.monotonic() + timeout
+
+        def _try(tokens):
+            if tokens >= n:
+                return tokens - n, 0.0
+            wait = (n - tokens) / self.refill_per_sec if self.refill_per_sec > 0 else float("inf")
+            return tokens, wait
+
+        while True:
+            wait = self._update(_try)
+            if wait == 0.0:
+                return True
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                return False
+            time.sleep(wait)
+
+    def drain(self):
+        """Empty the bucket (e.g. after the provider answered 429), so callers back off."""
+        self._update(lambda tokens: (0.0, None))
+
+# -----------------------------
+# Backoff
+# -----------------------------
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    A numeric Retry-After from the server wins (capped); otherwise exponential
+    backoff with full jitter: uniform(0, min(cap, base * 2**attempt)).
+    """
+    if retry_after is not None:
+        try:
+            return min(cap, max(0.0, float(retry_after)))
+        except (TypeError, ValueError):
+            pass  # HTTP-date form: fall back to exponential backoff
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -1,8 +1,12 @@
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
 import plotly.express as px
+import numpy as np
 import pandas as pd
 import streamlit as st
+from config import TIMELINE_BUCKET, TIMELINE_MAX_POINTS, WORDCLOUD_MAX_WORDS
+from modules.trend_analysis import BUCKET_FREQS
+from utils.cache import content_hash
 
 # -----------------------------
 # Sentiment Pie Chart
@@ -58,19 +62,103 @@ def generate_wordcloud(text, title="Word Cloud", max_words=100):
     st.pyplot(plt)  # Streamlit-friendly display
     plt.close()
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _wordcloud_image(counts_key, _frequencies, max_words):
+    # Cached by the hash of the counts (the leading underscore keeps
+    # Streamlit from hashing the frequencies themselves)
+    wordcloud = WordCloud(width=800, height=400, background_color="white", max_words=max_words)
+    return wordcloud.generate_from_frequencies(_frequencies).to_array()
+
+def generate_wordcloud_from_counts(frequencies, title="Word Cloud", max_words=WORDCLOUD_MAX_WORDS):
+    """
+    Display a word cloud of precomputed term counts ({term: count}).
+
+    No text is re-tokenized, and the rendered image is reused whenever the
+    same counts are shown again.
+    """
+    if not frequencies:
+        st.warning("No terms available for Word Cloud.")
+        return
+
+    counts_key = content_hash(sorted(frequencies.items()))
+    st.image(_wordcloud_image(counts_key, frequencies, max_words), caption=title)
+
 # -----------------------------
 # Timeline Plot
 # -----------------------------
-def plot_timeline(df, date_col="published_at", category_col="category"):
-    """Plot a timeline of article counts over time."""
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's average, which preserves
+    peaks and dips far better than striding.
+
+    Parameters:
+        x (array-like): Increasing numeric x values.
+        y (array-like): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the kept points, in order.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)  # Buckets over points 1..n-2
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_lo, next_hi = (hi, edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = kept[i + 1] = lo + int(np.argmax(area))
+    return kept
+
+def timeline_counts(df, date_col="published_at", category_col="category", bucket=TIMELINE_BUCKET):
+    """
+    Article counts per (time bucket, category), without modifying `df`.
+
+    Returns:
+        pd.DataFrame: date_col (bucket start, UTC), category_col and "count", in time order.
+    """
+    if df.empty or date_col not in df.columns or category_col not in df.columns:
+        return pd.DataFrame(columns=[date_col, category_col, "count"])
+    dates = pd.to_datetime(df[date_col], errors="coerce", utc=True)
+    valid = dates.notna() & df[category_col].notna()
+    frame = pd.DataFrame({
+        date_col: dates[valid].dt.floor(BUCKET_FREQS.get(bucket, bucket)),
+        category_col: df[category_col][valid]
+    })
+    return frame.groupby([date_col, category_col]).size().reset_index(name="count").sort_values(date_col)
+
+def plot_timeline(df, date_col="published_at", category_col="category", max_points=TIMELINE_MAX_POINTS):
+    """
+    Plot a timeline of article counts over time.
+
+    Accepts articles (bucketed here) or the output of timeline_counts();
+    each category's series is LTTB-downsampled to at most `max_points`.
+    The input frame is not modified.
+    """
     if df.empty or date_col not in df.columns or category_col not in df.columns:
         st.warning("Insufficient data for timeline plotting.")
         return None
 
-    df[date_col] = pd.to_datetime(df[date_col])
-    timeline = df.groupby([date_col, category_col]).size().reset_index(name="count")
+    timeline = df if "count" in df.columns else timeline_counts(df, date_col, category_col)
+    series = []
+    for _, group in timeline.groupby(category_col, sort=False):
+        group = group.sort_values(date_col)
+        x = pd.to_datetime(group[date_col], utc=True).to_numpy(dtype="datetime64[ns]").astype("int64")
+        series.append(group.iloc[lttb(x, group["count"].to_numpy(), max_points)])
     fig = px.line(
-        timeline,
+        pd.concat(series, ignore_index=True),
         x=date_col,
         y="count",
         color=category_col,